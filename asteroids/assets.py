@@ -1,29 +1,228 @@
-import glob
+"""Module assets loads the sprites and fonts of the game.
+
+Assets are read from the bundle built by `bundle.py` if there is an up to
+date one, from the `assets` directory otherwise. Either way, paths are
+relative to this file and not to the working directory.
+
+Nothing is decoded up front: `ASSETS` and `FONT_ASSETS` decode each asset on
+first access. `load()` also starts decoding all assets in a background thread
+pool, the ones needed for the first menu frame first.
+"""
+
+from __future__ import annotations
+
+from collections.abc import MutableMapping
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import io
+import os
 import os.path as path
+from typing import Callable
 
 import pygame
 import pygame.freetype as freetype
 
-ASSETS = {}
-FONT_ASSETS = {}
+from bundle import ASSET_DIR, BUNDLE_PATH, Bundle
+
+SPRITE_EXTENSIONS = (".png", ".jpg")
+FONT_EXTENSIONS = (".ttf",)
+
+# assets of the first menu frame, decoded before all others
+MENU_ASSETS = ("bkgrd.jpg", "logo_400.png", "monogram.ttf")
+ASSET_WORKERS = 4
+
+# small sprites are packed into one atlas surface, `ASSETS` then holds
+# subsurfaces of it
+ATLAS = None
+ATLAS_PREFIXES = ("shot_", "mjolnir_", "asteroid_", "explosion_", "taurus_engine")
+ATLAS_WIDTH = 1024
+ATLAS_PADDING = 1
+
+
+class LazyAssets(MutableMapping):
+    """Mapping of asset names to assets, which are decoded on first access
+
+    `decode(name)` turns a registered name into its asset. Decoding can be
+    started ahead of time in an executor with `preload()`. If set,
+    `prepare(name, asset)` is applied to every asset on its first access.
+    """
+
+    def __init__(self):
+        self.decode: Callable[[str], object] | None = None
+        self.prepare: Callable[[str, object], object] | None = None
+        self._names = set()
+        self._values = {}
+        self._pending: dict[str, Future] = {}
+
+    def register(self, names, decode: Callable[[str], object]):
+        self._names.update(names)
+        self.decode = decode
+
+    def preload(self, names, executor: Executor):
+        """Start decoding `names` in `executor`"""
+        for name in names:
+            if name in self._names and name not in self._values:
+                self._pending.setdefault(name, executor.submit(self.decode, name))
+
+    def raw(self, name: str):
+        """Decode `name` (or wait for its preloading), without preparing it"""
+        if name not in self._names:
+            raise KeyError(name)
+        future = self._pending.pop(name, None)
+        if future is not None:
+            return future.result()
+        return self.decode(name)
+
+    def loaded(self) -> dict:
+        """All assets that have been accessed so far"""
+        return dict(self._values)
+
+    def __getitem__(self, name: str):
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        value = self.raw(name)
+        if self.prepare is not None:
+            value = self.prepare(name, value)
+        # `prepare` may already have stored the asset itself
+        return self._values.setdefault(name, value)
+
+    def __setitem__(self, name: str, value):
+        self._names.add(name)
+        self._values[name] = value
+
+    def __delitem__(self, name: str):
+        self._names.remove(name)
+        self._values.pop(name, None)
+        self._pending.pop(name, None)
+
+    def __iter__(self):
+        return iter(sorted(self._names))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name) -> bool:
+        return name in self._names
+
+
+ASSETS = LazyAssets()
+FONT_ASSETS = LazyAssets()
+
+_executor = None
+
+
+def bundle_is_current() -> bool:
+    """Is there a bundle that's newer than all asset files?"""
+    if not path.isfile(BUNDLE_PATH):
+        return False
+    built = path.getmtime(BUNDLE_PATH)
+    return all(
+        path.getmtime(path.join(ASSET_DIR, n)) <= built for n in os.listdir(ASSET_DIR)
+    )
+
+
+def _reader(use_bundle: bool | None) -> tuple[list[str], Callable[[str], bytes]]:
+    """Return the available file names and a function reading a file"""
+    if use_bundle is None:
+        use_bundle = bundle_is_current()
+    if use_bundle:
+        bundle = Bundle(BUNDLE_PATH)
+        return bundle.names(), bundle.read
+
+    def read(name):
+        with open(path.join(ASSET_DIR, name), "rb") as f:
+            return f.read()
+
+    return os.listdir(ASSET_DIR), read
+
+
+def load(use_bundle: bool | None = None):
+    """Register all the game assets and start decoding them in the background
+
+    With `use_bundle` None, the bundle is used if it's up to date."""
+    global _executor
+    names, read = _reader(use_bundle)
+
+    def decode_sprite(name):
+        return pygame.image.load(io.BytesIO(read(name)), name)
+
+    def decode_font(name):
+        return freetype.Font(io.BytesIO(read(name)))
+
+    ASSETS.register([n for n in names if n.endswith(SPRITE_EXTENSIONS)], decode_sprite)
+    FONT_ASSETS.register([n for n in names if n.endswith(FONT_EXTENSIONS)], decode_font)
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(ASSET_WORKERS, thread_name_prefix="assets")
+    for assets in (ASSETS, FONT_ASSETS):
+        assets.preload([n for n in MENU_ASSETS if n in assets], _executor)
+    for assets in (ASSETS, FONT_ASSETS):
+        assets.preload(list(assets), _executor)
+
+
+def _pack(sizes: dict[str, tuple[int, int]]) -> tuple[dict[str, pygame.Rect], tuple]:
+    """Pack rectangles of the given sizes into rows ("shelves")
+
+    Returns the rect of every key and the total size of the packed area."""
+    rects = {}
+    x = y = shelf_h = 0
+    width = 0
+    for key, (w, h) in sorted(sizes.items(), key=lambda i: (-i[1][1], i[0])):
+        if x + w > ATLAS_WIDTH:
+            x = 0
+            y += shelf_h + ATLAS_PADDING
+            shelf_h = 0
+        rects[key] = pygame.Rect(x, y, w, h)
+        x += w + ATLAS_PADDING
+        shelf_h = max(shelf_h, h)
+        width = max(width, x)
+    return rects, (width, y + shelf_h)
+
+
+def _convert(img: pygame.Surface) -> pygame.Surface:
+    if img.get_flags() & pygame.SRCALPHA:
+        return img.convert_alpha()
+    return img.convert()
+
+
+def _build_atlas(decoded: dict[str, pygame.Surface]):
+    """Pack all small sprites into `ATLAS` and store subsurfaces in `ASSETS`
 
+    `decoded` holds sprites that have already been decoded."""
+    global ATLAS
+    keys = [k for k in ASSETS if k.startswith(ATLAS_PREFIXES)]
+    sprites = {k: decoded[k] if k in decoded else ASSETS.raw(k) for k in keys}
+    rects, size = _pack({k: s.get_size() for k, s in sprites.items()})
+    ATLAS = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+    ATLAS.fill((0, 0, 0, 0))
+    for key, rect in rects.items():
+        # max-blending onto the empty atlas copies the pixels unchanged
+        ATLAS.blit(sprites[key], rect, special_flags=pygame.BLEND_RGBA_MAX)
+        ASSETS[key] = ATLAS.subsurface(rect)
 
-def _load_sprite_assets():
-    extensions = ["png", "jpg"]
-    assetfiles = glob.glob("assets/*.png") + glob.glob("assets/*.jpg")
-    for filename in assetfiles:
-        key = path.basename(filename)
-        ASSETS[key] = pygame.image.load(filename)
 
+def _prepare(name: str, img: pygame.Surface) -> pygame.Surface:
+    """Bring a sprite into the display format on its first access"""
+    if name.startswith(ATLAS_PREFIXES):
+        # the first small sprite accessed builds the whole atlas
+        _build_atlas({name: img})
+        return ASSETS[name]
+    return _convert(img)
 
-def _load_font_assets():
-    fontfiles = glob.glob("assets/*.ttf")
-    for filename in fontfiles:
-        key = path.basename(filename)
-        FONT_ASSETS[key] = freetype.Font(filename)
 
+def convert():
+    """Convert all sprites to the display format and build the atlas
 
-def load():
-    """Load all the game assets"""
-    _load_sprite_assets()
-    _load_font_assets()
+    Surfaces in the display format blit without per-pixel conversion. This
+    needs the display, so it has to be called after `pygame.display.set_mode`.
+    Sprites that haven't been accessed yet are converted on first access.
+    """
+    loaded = ASSETS.loaded()
+    ASSETS.prepare = _prepare
+    small = {k: v for k, v in loaded.items() if k.startswith(ATLAS_PREFIXES)}
+    for key, img in loaded.items():
+        if key not in small:
+            ASSETS[key] = _convert(img)
+    if small:
+        _build_atlas(small)
@@ -1,32 +1,37 @@
 from __future__ import annotations
-import random
 
 import pygame
 from pygame import Vector2
 
 from assets import ASSETS
-from circleshape import CircleShape
+from store import StoredShape
 from constants import *
 from explosion import Explosion
 
 
-class Asteroid(CircleShape):
+class Asteroid(StoredShape):
 
-    def __init__(self, position, radius, size, kind=None):
-        super().__init__(position, radius)
+    world_groups = ("asteroids", "drawable")
+    world_store = "asteroid_store"
+    pool_cap = ASTEROID_POOL_CAP
+
+    def __init__(self, world, position, radius, size, kind=None):
+        super().__init__(world, position, radius)
         self.size = size
         if kind is None:
-            kind = random.randint(1, ASTEROID_KINDS)
+            kind = world.random.randint(1, ASTEROID_KINDS)
         self.kind = kind
 
-    def draw(self, screen: pygame.Surface):
+    def draw(self, screen: pygame.Surface, alpha=1.0):
         """Asteroids are just drawn as circles"""
         img = ASSETS[f"asteroid_{self.size}_{self.kind}.png"]
-        x = self.position.x - img.get_width() / 2
-        y = self.position.y - img.get_height() / 2
-        screen.blit(img, (x, y))
+        position = self.interpolated(alpha)
+        x = position.x - img.get_width() / 2
+        y = position.y - img.get_height() / 2
+        rect = screen.blit(img, (x, y))
         if DEBUG_SHOW_HITBOX:
             self.debug_draw_hitbox(screen)
+        return rect
 
     def update(self, dt: float):
         """Asteroids move by their velicity (which is a Vector2) at each frame"""
@@ -46,33 +51,34 @@ class Asteroid(CircleShape):
             return
 
         split_size = self.size - 1
-        split_angle = random.uniform(20, 50)
+        split_angle = self.world.random.uniform(20, 50)
         v1 = self.velocity.rotate(split_angle) * 1.2
         v2 = self.velocity.rotate(-split_angle) * 1.2
         radius = ASTEROID_MIN_RADIUS * split_size
-        a1 = Asteroid(self.position, radius, split_size, self.kind)
-        a2 = Asteroid(self.position, radius, split_size, self.kind)
+        a1 = Asteroid(self.world, self.position, radius, split_size, self.kind)
+        a2 = Asteroid(self.world, self.position, radius, split_size, self.kind)
         a1.velocity = v1
         a2.velocity = v2
 
     def explode(self):
-        Explosion(self.position, self.radius)
+        Explosion(self.world, self.position, self.radius)
 
     @classmethod
-    def spawn(cls, size=None):
+    def spawn(cls, world, size=None):
         """Spawn an asteroid
 
         The asteroid will be spawned randomly at one of the 4 screen edges, and
-        have a velocity away from it. The asteroid will be added to all `*groups`
+        have a velocity away from it. The asteroid will be added to `world`
         """
+        rng = world.random
         if size is None:
-            size = random.randint(1, ASTEROID_SIZES)
+            size = rng.randint(1, ASTEROID_SIZES)
         radius = ASTEROID_MIN_RADIUS * size
         half_r = radius / 2
-        position_mod = random.uniform(0, 1)
-        speed = random.randint(40, 100)
-        rotation = random.randint(-30, 30)
-        edge = random.choice(("top", "bottom", "left", "right"))
+        position_mod = rng.uniform(0, 1)
+        speed = rng.randint(40, 100)
+        rotation = rng.randint(-30, 30)
+        edge = rng.choice(("top", "bottom", "left", "right"))
         match edge:
             case "top":
                 velocity = Vector2(0, 1).rotate(rotation) * speed
@@ -87,5 +93,5 @@ class Asteroid(CircleShape):
                 velocity = Vector2(-1, 0).rotate(rotation) * speed
                 position = Vector2(SCREEN_WIDTH + half_r, SCREEN_HEIGHT * position_mod)
 
-        asteroid = Asteroid(position, radius, size)
+        asteroid = Asteroid(world, position, radius, size)
         asteroid.velocity = velocity
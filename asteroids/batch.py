@@ -0,0 +1,160 @@
+"""Module batch plays many seeded headless games in parallel.
+
+Every game is a `Session`: a game mode, a seed and an input policy. Sessions
+are distributed over a pool of worker processes, each running the headless
+loop without display or drawing, and the results are streamed back as soon
+as each game is over. Since the games are independent, throughput scales
+with the number of cores.
+
+A session is reproducible from its seed alone: the seed seeds the game's
+world as well as the policy.
+
+Run e.g. `python batch.py endless --games 10000 -o results.jsonl`, which
+writes one JSON object per game, in the order the games finish.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import statistics
+import time
+from typing import Callable, Iterable, Iterator
+
+import pygame
+
+import controls
+from constants import *
+import headless
+import state
+
+BATCH_FRAMES = 60 * 60 * 10
+BATCH_CHUNK_SIZE = 4
+
+
+def _idle_policy(seed):
+    """No input at all"""
+    return None
+
+
+# input policies by name, as `policy(seed)` returning a script for
+# `controls.ScriptedControls`
+POLICIES: dict[str, Callable] = {
+    "random": headless.random_policy,
+    "idle": _idle_policy,
+}
+
+
+class Session:
+    """One game to play: mode (see `headless.MODES`), seed and policy
+
+    The game ends when the ship is destroyed, or after `frames` steps."""
+
+    def __init__(
+        self,
+        mode: str,
+        seed: int,
+        policy: str = "random",
+        frames: int = BATCH_FRAMES,
+        dt: float = SIMULATION_DT,
+    ):
+        self.mode = mode
+        self.seed = seed
+        self.policy = policy
+        self.frames = frames
+        self.dt = dt
+
+
+def _init_worker():
+    headless.init(render=False)
+    # SDL turns SIGTERM into a QUIT event, which would leave the worker
+    # running on `Pool.terminate()`
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def play(session: Session) -> dict:
+    """Play `session` to its end and return its results
+
+    Must run in a process where `headless.init()` has been called."""
+    loop = headless.MODES[session.mode](pygame.display.get_surface(), session.seed)
+    world = loop.world
+    level = getattr(loop, "level", None)
+    peaks = {name: 0 for name in world.GROUPS}
+
+    def on_frame(current: state.Loop):
+        nonlocal world, level
+        # a new level has a new world
+        world = getattr(current, "world", world)
+        level = getattr(current, "level", level)
+        for name in world.GROUPS:
+            peaks[name] = max(peaks[name], len(getattr(world, name)))
+
+    source = controls.ScriptedControls(POLICIES[session.policy](session.seed))
+    start = time.perf_counter()
+    loop, frames = headless.run(
+        loop, session.frames, session.dt, source, on_frame=on_frame
+    )
+    return {
+        "mode": session.mode,
+        "seed": session.seed,
+        "policy": session.policy,
+        "score": headless.score(loop),
+        "frames": frames,
+        "survival_time": round(frames * session.dt, 4),
+        "game_over": isinstance(loop, state.GameOver),
+        "level": level,
+        "entity_peaks": peaks,
+        "cpu_time": round(time.perf_counter() - start, 4),
+    }
+
+
+def run_batch(
+    sessions: Iterable[Session],
+    workers: int | None = None,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+) -> Iterator[dict]:
+    """Play `sessions` in a pool of `workers` processes (one per core by
+    default), yielding the results in the order the games finish"""
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        yield from pool.imap_unordered(play, sessions, chunk_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many headless games")
+    parser.add_argument("mode", choices=headless.MODES)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--policy", choices=POLICIES, default="random")
+    parser.add_argument("--frames", type=int, default=BATCH_FRAMES)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE)
+    parser.add_argument("-o", "--output", default="batch.jsonl")
+    args = parser.parse_args()
+
+    sessions = (
+        Session(args.mode, args.seed + i, args.policy, args.frames)
+        for i in range(args.games)
+    )
+    scores = []
+    frames = 0
+    start = time.perf_counter()
+    with open(args.output, "w") as f:
+        for result in run_batch(sessions, args.workers, args.chunk_size):
+            f.write(json.dumps(result) + "\n")
+            scores.append(result["score"])
+            frames += result["frames"]
+            if len(scores) % 100 == 0:
+                f.flush()
+                print(f"{len(scores)}/{args.games} games", flush=True)
+    elapsed = time.perf_counter() - start
+
+    print(f"games:  {len(scores)} in {elapsed:.2f}s ({len(scores) / elapsed:.1f}/s)")
+    print(f"frames: {frames} ({frames / elapsed:.0f} FPS total)")
+    print(f"score:  mean {statistics.mean(scores):.2f}, max {max(scores)}")
+
+
+if __name__ == "__main__":
+    main()
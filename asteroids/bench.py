@@ -0,0 +1,298 @@
+"""Module bench runs reproducible benchmark scenarios of the game loops.
+
+Every scenario builds a game state from a fixed seed and steps it for a fixed
+number of frames in headless mode, measuring the time of every
+`Loop.step()`. Results are written to a JSON file, so that runs from
+different commits can be compared with `--compare`.
+
+The ship is taken out of the game, so that a scenario can't end early by
+the ship being hit. Instead, the harness fires a steady stream of shots
+from the middle of the screen.
+
+Run e.g. `python bench.py -o before.json`, change things, then
+`python bench.py -o after.json --compare before.json`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os.path as path
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+import pygame
+
+import assets
+from asteroid import Asteroid
+import bundle
+from constants import *
+from dirty import DIRTY
+import headless
+from shot import Shot
+import state
+
+BENCH_FRAMES = 300
+BENCH_DT = 1 / 60
+# degrees the stream of shots turns each frame
+BENCH_SHOT_TURN = 7
+STARTUP_RUNS = 5
+
+# cold-starts the game in a fresh interpreter and prints the time it took
+# until the first `Menu` frame was on the screen
+_STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import os, sys
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+sys.path.insert(0, {base_dir!r})
+import pygame
+import assets, state
+pygame.init()
+screen = pygame.display.set_mode(({width}, {height}))
+assets.load(use_bundle={use_bundle!r})
+assets.convert()
+state.Menu(screen, {{}}).step(0)
+pygame.display.flip()
+print(time.perf_counter() - start)
+"""
+
+
+class Scenario:
+    """A named, reproducible benchmark setup
+
+    `build(screen, seed)` returns the state to benchmark, playing with `seed`."""
+
+    def __init__(self, name: str, build: Callable[[pygame.Surface, int], state.Loop]):
+        self.name = name
+        self.build = build
+
+
+def _remove_player(loop: state.Loop):
+    """Take the ship out of the game, so it can never be hit"""
+    loop.player.kill()
+    loop.player.position = pygame.Vector2(-(10**6), -(10**6))
+    # and don't let it sweep through the field on its way out
+    loop.player.previous_position = loop.player.position
+
+
+def _seed_field(world, count: int):
+    """Spawn `count` slow asteroids, flying away from the middle of the screen"""
+    center = pygame.Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+    rng = world.random
+    for _ in range(count):
+        size = rng.randint(1, ASTEROID_SIZES)
+        position = pygame.Vector2(
+            rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT)
+        )
+        asteroid = Asteroid(world, position, ASTEROID_MIN_RADIUS * size, size)
+        direction = position - center
+        if direction.length() > 0:
+            direction.normalize_ip()
+        asteroid.velocity = direction * rng.uniform(5, 20)
+
+
+def level_scenario(level: int) -> Scenario:
+    def build(screen, seed):
+        loop = state.Level(screen, {}, level=level, seed=seed)
+        _remove_player(loop)
+        return loop
+
+    return Scenario(f"level_{level}", build)
+
+
+def endless_scenario(asteroids: int) -> Scenario:
+    def build(screen, seed):
+        loop = state.Endless(screen, {}, seed=seed)
+        _remove_player(loop)
+        _seed_field(loop.world, asteroids)
+        return loop
+
+    return Scenario(f"endless_{asteroids}", build)
+
+
+SCENARIOS = [
+    level_scenario(1),
+    level_scenario(10),
+    level_scenario(100),
+    level_scenario(500),
+    endless_scenario(100),
+    endless_scenario(1000),
+    endless_scenario(10000),
+]
+
+
+def _fire(world, frame: int):
+    """Fire the shot of `frame` from the middle of the screen"""
+    direction = pygame.Vector2(0, 1).rotate(frame * BENCH_SHOT_TURN)
+    shot = Shot(world, pygame.Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2))
+    shot.velocity = direction * SHOT_SPEED
+
+
+def _entity_counts(loop: state.Loop) -> dict[str, int]:
+    world = getattr(loop, "world", None)
+    if world is None:
+        return {}
+    return {name: len(getattr(world, name)) for name in world.GROUPS}
+
+
+def run_scenario(
+    screen: pygame.Surface,
+    scenario: Scenario,
+    frames: int = BENCH_FRAMES,
+    seed: int = 0,
+) -> dict:
+    """Run `scenario` and return its statistics"""
+    DIRTY.invalidate()
+    loop = scenario.build(screen, seed)
+    world = loop.world
+    start_state = type(loop)
+    pipeline = loop.pipeline
+
+    times = []
+    counts = []
+    for frame in range(frames):
+        _fire(world, frame)
+        start = time.perf_counter()
+        loop = loop.step(BENCH_DT)
+        if loop.render:
+            DIRTY.flip()
+        times.append(time.perf_counter() - start)
+        counts.append(_entity_counts(loop))
+        if type(loop) is not start_state:
+            break
+
+    ms = np.array(times) * 1000
+    entities = {
+        name: {
+            "mean": round(float(np.mean([c[name] for c in counts])), 1),
+            "max": max(c[name] for c in counts),
+        }
+        for name in counts[0]
+    }
+    return {
+        "frames": len(times),
+        "end_state": type(loop).__name__,
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4),
+        "entities": entities,
+        "stages_ms": {
+            name: round(seconds * 1000, 4)
+            for name, seconds in pipeline.averages().items()
+        },
+    }
+
+
+def measure_startup(use_bundle: bool, runs: int = STARTUP_RUNS) -> dict:
+    """Cold-start time until the first menu frame, in fresh interpreters"""
+    script = _STARTUP_SCRIPT.format(
+        base_dir=path.dirname(path.abspath(__file__)),
+        width=SCREEN_WIDTH,
+        height=SCREEN_HEIGHT,
+        use_bundle=use_bundle,
+    )
+    times = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        times.append(float(out.stdout.split()[-1]) * 1000)
+    return {
+        "median_ms": round(statistics.median(times), 2),
+        "min_ms": round(min(times), 2),
+    }
+
+
+def compare(old: dict, new: dict):
+    """Print the relative change of the frame times between two result files"""
+    print(f"{'scenario':<16}{'p50':>18}{'p95':>18}{'p99':>18}")
+    for name, result in new["scenarios"].items():
+        previous = old["scenarios"].get(name)
+        if previous is None:
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            change = (result[key] - previous[key]) / previous[key] * 100
+            cells.append(f"{result[key]:8.3f} ({change:+5.1f}%)")
+        print(f"{name:<16}" + "".join(f"{c:>18}" for c in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game loops")
+    parser.add_argument("-o", "--output", default="bench.json")
+    parser.add_argument("--frames", type=int, default=BENCH_FRAMES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-draw", action="store_true", help="skip all drawing")
+    parser.add_argument("--dirty", action="store_true", help="dirty-rect rendering")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=[s.name for s in SCENARIOS],
+        help="only run the given scenario, may be repeated",
+    )
+    parser.add_argument("--compare", metavar="JSON", help="earlier results")
+    parser.add_argument(
+        "--startup",
+        action="store_true",
+        help="also measure the cold-start time to the first menu frame",
+    )
+    args = parser.parse_args()
+
+    screen = headless.init(render=not args.no_draw)
+    DIRTY.enabled = args.dirty
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "frames": args.frames,
+            "seed": args.seed,
+            "render": not args.no_draw,
+            "dirty": args.dirty,
+        },
+        "scenarios": {},
+    }
+    for scenario in SCENARIOS:
+        if args.scenario and scenario.name not in args.scenario:
+            continue
+        result = run_scenario(screen, scenario, args.frames, args.seed)
+        results["scenarios"][scenario.name] = result
+        print(
+            f"{scenario.name:<16}"
+            f"p50 {result['p50_ms']:8.3f}ms  "
+            f"p95 {result['p95_ms']:8.3f}ms  "
+            f"p99 {result['p99_ms']:8.3f}ms  "
+            f"asteroids {result['entities']['asteroids']['max']:>6}"
+        )
+
+    if args.startup:
+        if not assets.bundle_is_current():
+            # measure the bundle the game would really start from
+            print(f"building {bundle.BUNDLE_PATH} first, see bundle.py")
+            bundle.build()
+        results["startup"] = {
+            "bundle": measure_startup(use_bundle=True),
+            "directory": measure_startup(use_bundle=False),
+        }
+        for source, result in results["startup"].items():
+            print(f"startup from {source:<10} {result['median_ms']:8.2f}ms")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
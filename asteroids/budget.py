@@ -0,0 +1,60 @@
+"""Module budget measures how much of the frame budget the game uses.
+
+The main loop brackets the work of each frame, simulation steps, drawing
+and flipping but not the wait for the next frame, with `BUDGET.begin_frame()`
+and `BUDGET.end_frame()`. `load()` is the average work time of the last
+`BUDGET_FRAMES` frames as a fraction of `FRAME_BUDGET`: above 1 the game
+can't keep its frame rate anymore.
+
+Systems that can trade quality for time, e.g. the spawn scheduler (see
+`spawner.py`), throttle themselves by the load. Headless runs never measure
+anything, so their load stays 0 and they are never throttled.
+"""
+
+from __future__ import annotations
+
+import time
+
+from constants import *
+
+
+class FrameBudget:
+    """Rolling window of the work times of the last `frames` frames"""
+
+    def __init__(self, frames: int = BUDGET_FRAMES, budget: float = FRAME_BUDGET):
+        self.budget = budget
+        self.times = [0.0] * frames
+        self.head = 0
+        self.count = 0
+        self.total = 0.0
+        self._start: float | None = None
+
+    def begin_frame(self):
+        self._start = time.perf_counter()
+
+    def end_frame(self):
+        if self._start is None:
+            return
+        self.add(time.perf_counter() - self._start)
+        self._start = None
+
+    def add(self, seconds: float):
+        """Add the work time of a frame"""
+        self.total += seconds - self.times[self.head]
+        self.times[self.head] = seconds
+        self.head = (self.head + 1) % len(self.times)
+        self.count = min(self.count + 1, len(self.times))
+
+    def reset(self):
+        self.times = [0.0] * len(self.times)
+        self.head = self.count = 0
+        self.total = 0.0
+
+    def load(self) -> float:
+        """Average work time per frame as a fraction of the budget"""
+        if self.count == 0:
+            return 0.0
+        return self.total / self.count / self.budget
+
+
+BUDGET = FrameBudget()
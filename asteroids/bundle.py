@@ -0,0 +1,79 @@
+"""Module bundle packs all asset files into one indexed bundle file.
+
+Layout of a bundle:
+
+- the magic bytes `BUNDLE_MAGIC`
+- the length of the index as little-endian unsigned 32 bit integer
+- the index, a JSON object mapping file names to `[offset, length]`
+- the file contents, offsets are relative to the end of the index
+
+Run `python bundle.py` to (re-)build `assets.bundle` from `assets/`.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import os.path as path
+import struct
+
+BASE_DIR = path.dirname(path.abspath(__file__))
+ASSET_DIR = path.join(BASE_DIR, "assets")
+BUNDLE_PATH = path.join(BASE_DIR, "assets.bundle")
+BUNDLE_MAGIC = b"ASTBNDL1"
+_LENGTH = struct.Struct("<I")
+
+
+def build(source: str = ASSET_DIR, target: str = BUNDLE_PATH) -> dict:
+    """Pack all files in `source` into the bundle `target`, returns the index"""
+    names = sorted(
+        n for n in os.listdir(source) if path.isfile(path.join(source, n))
+    )
+    index = {}
+    offset = 0
+    for name in names:
+        length = path.getsize(path.join(source, name))
+        index[name] = [offset, length]
+        offset += length
+
+    header = json.dumps(index, separators=(",", ":")).encode()
+    with open(target, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(_LENGTH.pack(len(header)))
+        f.write(header)
+        for name in names:
+            with open(path.join(source, name), "rb") as asset:
+                f.write(asset.read())
+    return index
+
+
+class Bundle:
+    """A memory-mapped bundle file
+
+    `read(name)` returns the raw content of a packed file."""
+
+    def __init__(self, filename: str = BUNDLE_PATH):
+        with open(filename, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+            raise ValueError(f"{filename} is not an asset bundle")
+        start = len(BUNDLE_MAGIC)
+        (length,) = _LENGTH.unpack_from(self._map, start)
+        start += _LENGTH.size
+        self.index = json.loads(self._map[start : start + length])
+        self._data_start = start + length
+
+    def names(self) -> list[str]:
+        return list(self.index)
+
+    def read(self, name: str) -> bytes:
+        offset, length = self.index[name]
+        start = self._data_start + offset
+        return self._map[start : start + length]
+
+
+if __name__ == "__main__":
+    index = build()
+    size = sum(length for _, length in index.values())
+    print(f"packed {len(index)} files ({size} bytes) into {BUNDLE_PATH}")
@@ -1,22 +1,80 @@
 from __future__ import annotations
 import pygame
 
+from render import draw_shape
+
+
+class Pool:
+    """Keeps killed instances of a class around for re-use
+
+    Every world has its own pools (see `world.World.pool_of`). Instances
+    killed during a frame only become available after the next call to
+    `collect()`, because they usually are still in use for the rest of the
+    frame (e.g. an asteroid splitting and exploding after `kill()`). At most
+    `cap` instances are kept.
+    """
+
+    def __init__(self, cap: int):
+        self.cap = cap
+        self.free = []
+        self.pending = []
+        # instances re-used, newly created, and thrown away because of the cap
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+
+    def release(self, instance):
+        if len(self.free) + len(self.pending) < self.cap:
+            self.pending.append(instance)
+        else:
+            self.dropped += 1
+
+    def collect(self):
+        """Make the instances killed since the last call available"""
+        self.free.extend(self.pending)
+        self.pending.clear()
+
 
 class CircleShape(pygame.sprite.Sprite):
     """Base Class for our ingame objects
 
     Our subclass of Sprite stores position, velocity and radius.
+
+    Every instance lives in a `world.World`. It's added to the world's groups
+    named in `world_groups`, and if `world_store` is set, its state is kept in
+    that store of the world.
+
+    If a class has a `pool_cap`, its killed instances are kept in a `Pool` of
+    their world, and creating an instance re-uses a killed one if available:
+    `__init__` runs again on it, which resets its state and adds it to the
+    world's groups.
     """
 
-    __groups = []
+    # names of the `World` groups and store instances belong to
+    world_groups: tuple[str, ...] = ()
+    world_store: str | None = None
+    # maximum number of killed instances kept for re-use, None for no re-use
+    pool_cap: int | None = None
+
+    # number of instances spawned so far, see `generation`
+    spawned = 0
 
-    @classmethod
-    def set_default_groups(cls, *groups):
-        """Set the default `pygame.sprite.Group`s instances of this class belong to"""
-        cls.__groups = groups
+    def __new__(cls, world, *args, **kwargs):
+        pool = world.pool_of(cls)
+        if pool is None:
+            return super().__new__(cls)
+        if pool.free:
+            pool.hits += 1
+            return pool.free.pop()
+        pool.misses += 1
+        return super().__new__(cls)
 
-    def __init__(self, position, radius):
-        super().__init__(*self.__groups)
+    def __init__(self, world, position, radius):
+        self.world = world
+        # tells the spawns of an instance apart, which differ when it's re-used
+        CircleShape.spawned += 1
+        self.generation = CircleShape.spawned
+        super().__init__(*world.groups_of(type(self)))
 
         # The reason we are re-building a vector here: because otherwise
         # multiple objects would suddenly SHARE position-vectors with all sorts
@@ -24,20 +82,39 @@ class CircleShape(pygame.sprite.Sprite):
         self.position = pygame.Vector2(position.x, position.y)
         self.velocity = pygame.Vector2(0, 0)
         self.radius = radius
+        # position before the last simulation step, for interpolated drawing
+        self.previous_position = pygame.Vector2(position.x, position.y)
+
+    def kill(self):
+        if self.alive():
+            pool = self.world.pool_of(type(self))
+            if pool is not None:
+                pool.release(self)
+        super().kill()
 
     def debug_draw_hitbox(self, screen):
         """Draws the hitbox on the screen for debug purposes"""
-        pygame.draw.circle(
-            surface=screen,
+        draw_shape(
+            screen,
+            pygame.draw.circle,
             color="#FF0000",
-            center=self.position,
+            center=pygame.Vector2(self.position),
             radius=self.radius,
             width=1,
         )
 
-    def draw(self, screen):
+    def interpolated(self, alpha: float) -> pygame.Vector2:
+        """Position `alpha` of the way from `previous_position` to `position`"""
+        if alpha >= 1:
+            return self.position
+        return self.previous_position.lerp(self.position, alpha)
+
+    def draw(self, screen, alpha=1.0):
         """Every object should have a "draw" method that draws itself onto
-        a screen
+        a screen, and returns the `pygame.Rect` it has drawn to
+
+        Rendering runs at its own rate, so `alpha` tells how far the time drawn
+        is between the last two simulation steps (see `interpolated()`).
 
         Needs to be overridden by subclasses.
         """
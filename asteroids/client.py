@@ -0,0 +1,300 @@
+"""Module client plays multiplayer games hosted by `server.py`.
+
+A `Client` sends the input of its ship to the server once per frame, and
+decodes the snapshots it receives into `entities` (see `netcode.py`). The
+newest snapshot decoded is acknowledged with every input, so the server can
+send the next ones as changes to it.
+
+To show the game, a `Mirror` keeps a local world with an entity for every
+networked one and draws them with their own `draw()`, interpolating between
+the last two snapshots.
+
+Run e.g. `python client.py --port 9999` to play, or with `--bot` to connect
+a headless client pressing random keys.
+"""
+
+from __future__ import annotations
+
+import argparse
+import socket
+import time
+
+import pygame
+
+from assets import ASSETS
+import assets
+from asteroid import Asteroid
+from constants import *
+import controls
+from explosion import Explosion
+import headless
+import netcode
+from player import Player
+from replay import pack_input
+from server import SERVER_PORT, SERVER_SNAPSHOT_HISTORY
+from shot import Mjolnir, Shot
+from taurus import Taurus
+import text
+from world import World
+
+CLIENT_CONNECT_TIMEOUT = 5.0
+CLIENT_HELLO_INTERVAL = 0.2
+
+
+class Client:
+    """Connection to a game server at `address`
+
+    `sock` is an unbound UDP socket, e.g. a `netcode.LossySocket`, by
+    default a new one."""
+
+    def __init__(self, address=("127.0.0.1", SERVER_PORT), sock=None):
+        self.address = address
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        self.sock = sock
+        self.ship_id: int | None = None
+        self.mode: str | None = None
+        self.tick_rate = SIMULATION_HZ
+        self.snapshot_interval = 1
+        self.sequence = 0
+        # decoded snapshots that can serve as baselines, by tick
+        self.snapshots: dict[int, dict[int, netcode.Entity]] = {}
+        # the newest snapshot: its tick, entities and when it arrived
+        self.tick: int | None = None
+        self.entities: dict[int, netcode.Entity] = {}
+        self.received_at = 0.0
+        self.score = 0
+        self.packets_received = 0
+        self.bytes_received = 0
+        # snapshots older than the newest, and ones whose baseline is gone
+        self.stale_snapshots = 0
+        self.undecodable_snapshots = 0
+
+    def connect(self, timeout: float = CLIENT_CONNECT_TIMEOUT):
+        """Join the game, raises `TimeoutError` if the server doesn't answer"""
+        deadline = time.perf_counter() + timeout
+        next_hello = 0.0
+        while self.ship_id is None:
+            now = time.perf_counter()
+            if now > deadline:
+                raise TimeoutError(f"no answer from {self.address}")
+            if now >= next_hello:
+                self.sock.sendto(netcode.encode_hello(), self.address)
+                next_hello = now + CLIENT_HELLO_INTERVAL
+            self.poll()
+            time.sleep(0.01)
+
+    def close(self):
+        """Leave the game"""
+        if self.ship_id is not None:
+            self.sock.sendto(bytes([netcode.BYE]), self.address)
+        self.sock.close()
+
+    def send_input(self, source: controls.Controls):
+        """Send the current state of `source` as the ship's input"""
+        bits = pack_input(source.get_pressed(), source.mouse_pressed())
+        x, y = (max(-32768, min(int(v), 32767)) for v in source.mouse_pos())
+        ack = netcode.NO_BASELINE if self.tick is None else self.tick
+        self.sock.sendto(
+            netcode.encode_input(self.sequence, ack, bits, x, y), self.address
+        )
+        self.sequence += 1
+
+    def poll(self) -> bool:
+        """Receive all pending packets, returns if a newer snapshot arrived"""
+        newer = False
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(netcode.MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return newer
+            except ConnectionResetError:
+                # the server isn't there (yet), on Windows
+                continue
+            if not data:
+                continue
+            self.packets_received += 1
+            self.bytes_received += len(data)
+            if data[0] == netcode.WELCOME:
+                welcome = netcode.decode_welcome(data)
+                self.ship_id, self.mode, self.tick_rate, self.snapshot_interval = (
+                    welcome
+                )
+            elif data[0] == netcode.SNAPSHOT:
+                newer |= self._snapshot(data)
+
+    def _snapshot(self, data: bytes) -> bool:
+        tick, baseline_tick = netcode.decode_snapshot_header(data)
+        if tick in self.snapshots:
+            self.stale_snapshots += 1
+            return False
+        if baseline_tick is None:
+            baseline = {}
+        elif baseline_tick in self.snapshots:
+            baseline = self.snapshots[baseline_tick]
+        else:
+            self.undecodable_snapshots += 1
+            return False
+        entities, score = netcode.decode_snapshot(data, baseline)
+        self.snapshots[tick] = entities
+        oldest = tick - SERVER_SNAPSHOT_HISTORY * self.snapshot_interval
+        for old in [t for t in self.snapshots if t <= oldest]:
+            del self.snapshots[old]
+        if self.tick is not None and tick < self.tick:
+            self.stale_snapshots += 1
+            return False
+        self.tick = tick
+        self.entities = entities
+        self.score = score
+        self.received_at = time.perf_counter()
+        return True
+
+    def alpha(self) -> float:
+        """How far to interpolate between the last two snapshots"""
+        period = self.snapshot_interval / self.tick_rate
+        return min((time.perf_counter() - self.received_at) / period, 1.0)
+
+
+def _dequantize(value: int) -> float:
+    return value / netcode.POSITION_SCALE
+
+
+class Mirror:
+    """Local copies of the networked entities, for drawing"""
+
+    def __init__(self):
+        self.world = World(0)
+        self.sprites = {}
+
+    def update(self, entities: dict[int, netcode.Entity]):
+        """Update the copies to `entities`, the previous positions are kept
+        for interpolation"""
+        self.world.collect_pools()
+        for entity_id in set(self.sprites) - set(entities):
+            self.sprites.pop(entity_id).kill()
+        for entity_id, entity in entities.items():
+            kind, x, y, *fields = entity
+            position = pygame.Vector2(_dequantize(x), _dequantize(y))
+            sprite = self.sprites.get(entity_id)
+            if sprite is None:
+                sprite = self.sprites[entity_id] = self._create(kind, position, fields)
+            else:
+                sprite.previous_position = sprite.position
+                sprite.position = position
+            self._apply(sprite, kind, fields)
+
+    def _create(self, kind: int, position: pygame.Vector2, fields: list[int]):
+        if kind == netcode.PLAYER:
+            return Player(self.world, position)
+        if kind == netcode.TAURUS:
+            return Taurus(self.world, position)
+        if kind == netcode.ASTEROID:
+            size, asteroid_kind = fields[2:4]
+            radius = ASTEROID_MIN_RADIUS * size
+            return Asteroid(self.world, position, radius, size, asteroid_kind)
+        if kind == netcode.SHOT:
+            return Shot(self.world, position)
+        if kind == netcode.MJOLNIR:
+            return Mjolnir(self.world, position)
+        return Explosion(self.world, position, fields[0] / 2)
+
+    def _apply(self, sprite, kind: int, fields: list[int]):
+        """Set the state of `sprite` from the fields after its position"""
+        if kind == netcode.EXPLOSION:
+            sprite.step = fields[1]
+            return
+        sprite.velocity = pygame.Vector2(
+            _dequantize(fields[0]), _dequantize(fields[1])
+        )
+        if kind == netcode.PLAYER:
+            sprite.velocity /= SHIP_VELOCITY_HZ
+            sprite.rotation = fields[2] * 360 / 256
+            sprite.engine_running = bool(fields[3] & 1)
+        elif kind == netcode.TAURUS:
+            sprite.velocity /= SHIP_VELOCITY_HZ
+            flags = fields[2]
+            sprite.engine_top = bool(flags & 1)
+            sprite.engine_bottom = bool(flags & 2)
+            sprite.engine_left = bool(flags & 4)
+            sprite.engine_right = bool(flags & 8)
+            sprite.mjolnir_cooldown = 1 if flags & 16 else 0
+        else:
+            sprite.kind = fields[-1]
+
+    def draw(self, screen: pygame.Surface, alpha: float = 1.0):
+        for sprite in self.world.drawable:
+            sprite.draw(screen, alpha)
+
+
+def play(client: Client):
+    """Play in a window until it's closed or Q is pressed"""
+    pygame.init()
+    assets.load()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    assets.convert()
+    clock = pygame.time.Clock()
+    mirror = Mirror()
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (
+                event.type == pygame.KEYDOWN and event.key == pygame.K_q
+            ):
+                return
+        if client.poll():
+            mirror.update(client.entities)
+        client.send_input(controls.source())
+
+        screen.blit(ASSETS["bkgrd.jpg"], (0, 0))
+        mirror.draw(screen, client.alpha())
+        text.draw_bottom_right(screen, f"SCORE: {client.score}")
+        pygame.display.flip()
+        clock.tick(RENDER_FPS)
+
+
+def run_bot(client: Client, seconds: float, seed: int | None = None):
+    """Send random input for `seconds`, without a window"""
+    source = controls.ScriptedControls(headless.random_policy(seed))
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        source.advance()
+        client.poll()
+        client.send_input(source)
+        time.sleep(1 / client.tick_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Join a multiplayer game")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--bot", action="store_true", help="random input, no window")
+    parser.add_argument("--seconds", type=float, default=60, help="bot only")
+    parser.add_argument("--seed", type=int, help="bot only")
+    parser.add_argument("--loss", type=float, default=0.0, help="packet loss, 0-1")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    args = parser.parse_args()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    if args.loss or args.latency or args.jitter:
+        sock = netcode.LossySocket(sock, args.loss, args.latency, args.jitter)
+    client = Client((args.host, args.port), sock)
+    client.connect()
+    print(f"joined {client.mode} as ship {client.ship_id}", flush=True)
+    try:
+        if args.bot:
+            run_bot(client, args.seconds, args.seed)
+        else:
+            play(client)
+    finally:
+        client.close()
+    print(f"score:    {client.score}")
+    print(f"received: {client.packets_received} packets, {client.bytes_received} B")
+    print(
+        f"dropped:  {client.stale_snapshots} stale, "
+        f"{client.undecodable_snapshots} undecodable snapshots"
+    )
+
+
+if __name__ == "__main__":
+    main()
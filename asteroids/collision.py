@@ -0,0 +1,394 @@
+"""Module collision contains the batched collision kernels of the game.
+
+The kernels work on plain position/radius arrays and keep the rules of the
+game loops:
+
+- every asteroid is hit at most once per frame, by the first shot touching it
+- a normal shot is consumed by its hit and can't hit any further asteroid
+- a piercing shot (the Mjolnir) passes through and can hit any number of them
+
+`hit_pairs` only tests the positions at the end of a step, so fast shots can
+pass through asteroids between two steps, the lower the tick rate the more.
+`impact_pairs` tests continuously instead: shapes move in a straight line
+from their position before the step to the one after it, and the time of
+impact is when two of them first touch. Hits are resolved in the order of
+their time of impact, so the first shot to touch an asteroid is the one that
+really got there first. The game uses it with `CONTINUOUS_COLLISION`.
+
+`ship_impacts` finds the asteroid each ship ran into first, the same way.
+
+If NumPy is not available, pure-Python implementations are used instead.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from constants import *
+
+
+def hit_pairs(
+    asteroid_pos,
+    asteroid_r,
+    shot_pos,
+    shot_r,
+    piercing: Sequence[bool],
+    chunk_size: int = COLLISION_CHUNK_SIZE,
+) -> list[tuple[int, int]]:
+    """Return the (asteroid index, shot index) pairs that hit each other
+
+    Positions are (N, 2) arrays, radii (N,) arrays. Asteroids are resolved
+    in order, so the result is the same as looping over the asteroids and,
+    for each, over the shots not consumed yet.
+    """
+    if len(asteroid_pos) == 0 or len(shot_pos) == 0:
+        return []
+    if np is None:
+        return hit_pairs_python(asteroid_pos, asteroid_r, shot_pos, shot_r, piercing)
+
+    asteroid_pos = np.asarray(asteroid_pos, dtype=np.float64)
+    asteroid_r = np.asarray(asteroid_r, dtype=np.float64)
+    shot_pos = np.asarray(shot_pos, dtype=np.float64)
+    shot_r = np.asarray(shot_r, dtype=np.float64)
+    piercing = np.asarray(piercing, dtype=bool)
+
+    consumed = np.zeros(len(shot_pos), dtype=bool)
+    pairs = []
+    # test as many asteroids at once as fit into a chunk
+    rows = max(1, chunk_size // len(shot_pos))
+    for start in range(0, len(asteroid_pos), rows):
+        stop = start + rows
+        # same arithmetic as `pygame.Vector2.distance_to`, so that results
+        # are identical to `CircleShape.collides_with`
+        dx = asteroid_pos[start:stop, 0, None] - shot_pos[None, :, 0]
+        dy = asteroid_pos[start:stop, 1, None] - shot_pos[None, :, 1]
+        distance = np.sqrt(dx * dx + dy * dy)
+        hit = distance <= asteroid_r[start:stop, None] + shot_r[None, :]
+
+        # only the few asteroids that were hit at all need resolving one by one
+        for row in np.flatnonzero(hit.any(axis=1)):
+            candidates = hit[row] & ~consumed
+            if not candidates.any():
+                continue
+            shot = int(candidates.argmax())
+            pairs.append((start + int(row), shot))
+            if not piercing[shot]:
+                consumed[shot] = True
+    return pairs
+
+
+def hit_pairs_python(
+    asteroid_pos,
+    asteroid_r,
+    shot_pos,
+    shot_r,
+    piercing: Sequence[bool],
+) -> list[tuple[int, int]]:
+    """Pure-Python implementation of `hit_pairs`"""
+    consumed = [False] * len(shot_pos)
+    pairs = []
+    for i, (ax, ay) in enumerate(asteroid_pos):
+        ar = asteroid_r[i]
+        for j, (sx, sy) in enumerate(shot_pos):
+            if consumed[j]:
+                continue
+            dx = ax - sx
+            dy = ay - sy
+            if math.sqrt(dx * dx + dy * dy) <= ar + shot_r[j]:
+                pairs.append((i, j))
+                if not piercing[j]:
+                    consumed[j] = True
+                break
+    return pairs
+
+
+def time_of_impact(start, end, other_start, other_end, radius: float):
+    """Return when two moving circles first touch, as a fraction of the step
+
+    The circles move in a straight line from `start` to `end` and from
+    `other_start` to `other_end`, and touch at a distance of `radius` (the
+    sum of both radii). Returns None if they don't touch during the step, 0
+    if they already touch at its start.
+    """
+    dx = other_start[0] - start[0]
+    dy = other_start[1] - start[1]
+    # motion of the other circle relative to the first one
+    vx = (other_end[0] - other_start[0]) - (end[0] - start[0])
+    vy = (other_end[1] - other_start[1]) - (end[1] - start[1])
+    c = dx * dx + dy * dy - radius * radius
+    if c <= 0:
+        return 0.0
+    a = vx * vx + vy * vy
+    b = dx * vx + dy * vy
+    if a == 0 or b >= 0:
+        # not moving relative to each other, or moving apart
+        return None
+    discriminant = b * b - a * c
+    if discriminant < 0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / a
+    return t if t <= 1 else None
+
+
+def impact_pairs(
+    asteroid_start,
+    asteroid_end,
+    asteroid_r,
+    shot_start,
+    shot_end,
+    shot_r,
+    piercing: Sequence[bool],
+    chunk_size: int = COLLISION_CHUNK_SIZE,
+) -> list[tuple[float, int, int]]:
+    """Return the (time, asteroid index, shot index) of shots hitting asteroids
+    while moving from their start to their end positions
+
+    Positions are (N, 2) arrays, radii (N,) arrays. Hits are resolved in the
+    order of their time of impact (see `time_of_impact`), ties in asteroid
+    and then shot order, which is also the order of the result.
+    """
+    if len(asteroid_start) == 0 or len(shot_start) == 0:
+        return []
+    if np is None:
+        return impact_pairs_python(
+            asteroid_start,
+            asteroid_end,
+            asteroid_r,
+            shot_start,
+            shot_end,
+            shot_r,
+            piercing,
+        )
+
+    asteroid_start = np.asarray(asteroid_start, dtype=np.float64)
+    asteroid_move = np.asarray(asteroid_end, dtype=np.float64) - asteroid_start
+    asteroid_r = np.asarray(asteroid_r, dtype=np.float64)
+    shot_start = np.asarray(shot_start, dtype=np.float64)
+    shot_move = np.asarray(shot_end, dtype=np.float64) - shot_start
+    shot_r = np.asarray(shot_r, dtype=np.float64)
+
+    times, rows, cols = [], [], []
+    # test as many asteroids at once as fit into a chunk
+    chunk_rows = max(1, chunk_size // len(shot_start))
+    for start in range(0, len(asteroid_start), chunk_rows):
+        stop = start + chunk_rows
+        # same arithmetic as `time_of_impact`, for all pairs at once
+        dx = asteroid_start[start:stop, 0, None] - shot_start[None, :, 0]
+        dy = asteroid_start[start:stop, 1, None] - shot_start[None, :, 1]
+        vx = asteroid_move[start:stop, 0, None] - shot_move[None, :, 0]
+        vy = asteroid_move[start:stop, 1, None] - shot_move[None, :, 1]
+        r = asteroid_r[start:stop, None] + shot_r[None, :]
+        c = dx * dx + dy * dy - r * r
+        a = vx * vx + vy * vy
+        b = dx * vx + dy * vy
+        discriminant = b * b - a * c
+        touching = c <= 0
+        approaching = ~touching & (b < 0) & (discriminant >= 0)
+        row, col = np.nonzero(touching | approaching)
+        if len(row) == 0:
+            continue
+        t = np.zeros(len(row))
+        sweep = approaching[row, col]
+        i, j = row[sweep], col[sweep]
+        t[sweep] = (-b[i, j] - np.sqrt(discriminant[i, j])) / a[i, j]
+        hit = t <= 1
+        times.append(t[hit])
+        rows.append(row[hit] + start)
+        cols.append(col[hit])
+    if not times:
+        return []
+
+    times = np.concatenate(times)
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    order = np.lexsort((cols, rows, times))
+    return _resolve(
+        zip(times[order].tolist(), rows[order].tolist(), cols[order].tolist()),
+        len(asteroid_start),
+        len(shot_start),
+        piercing,
+    )
+
+
+def impact_pairs_python(
+    asteroid_start,
+    asteroid_end,
+    asteroid_r,
+    shot_start,
+    shot_end,
+    shot_r,
+    piercing: Sequence[bool],
+) -> list[tuple[float, int, int]]:
+    """Pure-Python implementation of `impact_pairs`"""
+    hits = []
+    for i in range(len(asteroid_start)):
+        for j in range(len(shot_start)):
+            t = time_of_impact(
+                asteroid_start[i],
+                asteroid_end[i],
+                shot_start[j],
+                shot_end[j],
+                asteroid_r[i] + shot_r[j],
+            )
+            if t is not None:
+                hits.append((t, i, j))
+    hits.sort()
+    return _resolve(hits, len(asteroid_start), len(shot_start), piercing)
+
+
+def _resolve(hits, asteroids: int, shots: int, piercing: Sequence[bool]):
+    """Apply the rules of the game to the (time, asteroid, shot) `hits`, in
+    order"""
+    hit = [False] * asteroids
+    consumed = [False] * shots
+    pairs = []
+    for t, i, j in hits:
+        if hit[i] or consumed[j]:
+            continue
+        pairs.append((t, i, j))
+        hit[i] = True
+        if not piercing[j]:
+            consumed[j] = True
+    return pairs
+
+
+def shot_impacts(asteroids: list, shots: list) -> list[tuple]:
+    """Return the (time, asteroid, shot) of shots hitting asteroids in the
+    last step, in the order they hit
+
+    `asteroids` and `shots` are lists of `StoredShape`s, all asteroids living
+    in one store and all shots in another one. Shots with a true `piercing`
+    attribute are not consumed by a hit. With `CONTINUOUS_COLLISION`, the
+    shapes are swept over the step, otherwise only their positions at its end
+    are tested, and all times are 0.
+    """
+    if not asteroids or not shots:
+        return []
+    asteroid_pos, asteroid_r, asteroid_prev = _gather(asteroids)
+    shot_pos, shot_r, shot_prev = _gather(shots)
+    piercing = [s.piercing for s in shots]
+    if not CONTINUOUS_COLLISION:
+        pairs = hit_pairs(asteroid_pos, asteroid_r, shot_pos, shot_r, piercing)
+        return [(0.0, asteroids[i], shots[j]) for i, j in pairs]
+    hits = impact_pairs(
+        asteroid_prev, asteroid_pos, asteroid_r, shot_prev, shot_pos, shot_r, piercing
+    )
+    return [(t, asteroids[i], shots[j]) for t, i, j in hits]
+
+
+def ship_impacts(ships: list, asteroids: list, gone: dict | None = None) -> list:
+    """Return the (time, asteroid) each of `ships` ran into first during the
+    last step, or None for ships that didn't run into any
+
+    Ties go to the first of `asteroids`, which are `StoredShape`s living in
+    one store. `gone` are the times asteroids were destroyed during the step,
+    e.g. by shots (see `hit_times`), which can't be run into after that.
+    Without `CONTINUOUS_COLLISION`, only the positions at the end of the step
+    are tested, like `CircleShape.collides_with` does, and all times are 0.
+    """
+    if not asteroids or not ships:
+        return [None] * len(ships)
+    if np is None:
+        return ship_impacts_python(ships, asteroids, gone)
+
+    asteroid_pos, asteroid_r, asteroid_prev = _gather(asteroids)
+    ship_pos = np.array([tuple(s.position) for s in ships], dtype=np.float64)
+    ship_prev = np.array([tuple(s.previous_position) for s in ships], dtype=np.float64)
+    ship_r = np.array([s.radius for s in ships], dtype=np.float64)
+    r = ship_r[:, None] + asteroid_r[None, :]
+
+    if not CONTINUOUS_COLLISION:
+        # same arithmetic as `hit_pairs`
+        dx = ship_pos[:, 0, None] - asteroid_pos[None, :, 0]
+        dy = ship_pos[:, 1, None] - asteroid_pos[None, :, 1]
+        t = np.where(np.sqrt(dx * dx + dy * dy) <= r, 0.0, np.inf)
+    else:
+        # same arithmetic as `time_of_impact`, the ships being the first
+        # circles
+        ship_move = ship_pos - ship_prev
+        asteroid_move = asteroid_pos - asteroid_prev
+        dx = asteroid_prev[None, :, 0] - ship_prev[:, 0, None]
+        dy = asteroid_prev[None, :, 1] - ship_prev[:, 1, None]
+        vx = asteroid_move[None, :, 0] - ship_move[:, 0, None]
+        vy = asteroid_move[None, :, 1] - ship_move[:, 1, None]
+        c = dx * dx + dy * dy - r * r
+        a = vx * vx + vy * vy
+        b = dx * vx + dy * vy
+        discriminant = b * b - a * c
+        approaching = (c > 0) & (b < 0) & (discriminant >= 0)
+        t = np.full(c.shape, np.inf)
+        t[c <= 0] = 0.0
+        t[approaching] = (
+            -b[approaching] - np.sqrt(discriminant[approaching])
+        ) / a[approaching]
+        t[t > 1] = np.inf
+        if gone:
+            store = asteroids[0].store
+            limit = np.ones(len(store.position))
+            limit[[a.slot for a in gone]] = list(gone.values())
+            slots = np.fromiter(
+                (a.slot for a in asteroids), dtype=np.intp, count=len(asteroids)
+            )
+            t[t > limit[slots][None, :]] = np.inf
+
+    # the first minimum, so ties go to the first asteroid
+    first = t.argmin(axis=1)
+    impacts = []
+    for row, col in enumerate(first.tolist()):
+        hit = t[row, col]
+        impacts.append(None if hit == np.inf else (float(hit), asteroids[col]))
+    return impacts
+
+
+def ship_impacts_python(ships: list, asteroids: list, gone: dict | None = None):
+    """Pure-Python implementation of `ship_impacts`"""
+    if gone is None:
+        gone = {}
+    impacts = []
+    for ship in ships:
+        first = None
+        for a in asteroids:
+            if not CONTINUOUS_COLLISION:
+                t = 0.0 if ship.collides_with(a) else None
+            else:
+                t = time_of_impact(
+                    ship.previous_position,
+                    ship.position,
+                    a.previous_position,
+                    a.position,
+                    ship.radius + a.radius,
+                )
+                if t is not None and gone.get(a, 1.0) < t:
+                    t = None
+            if t is not None and (first is None or t < first[0]):
+                first = (t, a)
+        impacts.append(first)
+    return impacts
+
+
+def shot_hits(asteroids: list, shots: list) -> list[tuple]:
+    """Return the (asteroid, shot) pairs hitting each other, see `shot_impacts`"""
+    return [(a, s) for _, a, s in shot_impacts(asteroids, shots)]
+
+
+def hit_times(impacts: list[tuple]) -> dict:
+    """Times the asteroids of `shot_impacts` were hit, by asteroid"""
+    return {a: t for t, a, _ in impacts}
+
+
+def _gather(shapes: list):
+    """Gather positions, radii and positions before the last step of `shapes`
+    in order"""
+    if np is None:
+        positions = [tuple(s.position) for s in shapes]
+        previous = [tuple(s.previous_position) for s in shapes]
+        return positions, [s.radius for s in shapes], previous
+    store = shapes[0].store
+    slots = np.fromiter((s.slot for s in shapes), dtype=np.intp, count=len(shapes))
+    return store.position[slots], store.radius[slots], store.previous[slots]
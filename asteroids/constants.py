@@ -10,11 +10,14 @@ ASTEROID_SPAWN_COOLDOWN = 0.8  # seconds
 
 EXPLOSION_STEPS = 8
 EXPLOSION_STEP_DURATION = 0.1  # seconds
+SHIP_EXPLOSION_SCALE = 1.5  # ship explosions are bigger than the ship
 
 PLAYER_RADIUS = 20
 PLAYER_TURN_SPEED = 300
 PLAYER_ACCELERATION = 10
 PLAYER_MAX_SPEED = 20
+# ship velocities are in pixels per 1/60th of a second
+SHIP_VELOCITY_HZ = 60
 
 TAURUS_RADIUS = 50
 TAURUS_ACCELERATION = 2
@@ -36,3 +39,86 @@ SCORE_COLOR = "#FFFFFF"
 MENU_SIZE = SCREEN_HEIGHT // 18
 MENU_SPACING = 10
 MENU_COLOR = "#ff6b41"
+
+# maximum number of shot/asteroid pairs tested at once by the collision kernel
+COLLISION_CHUNK_SIZE = 1 << 16
+# sweep shots, ships and asteroids over each simulation step when testing for
+# collisions, so that nothing passes through anything between two steps
+CONTINUOUS_COLLISION = True
+
+# frame profiler, toggled with F3
+PROFILER_FRAMES = 240  # length of the ring buffer
+PROFILER_SIZE = SCREEN_HEIGHT // 36
+PROFILER_COLOR = "#7CFC00"
+PROFILER_BUDGET = 1000 / 60  # milliseconds
+
+# the work of a frame is measured over the last BUDGET_FRAMES frames, see
+# `budget.py`
+FRAME_BUDGET = 1 / 60  # seconds
+BUDGET_FRAMES = 30
+
+# hard caps of the endless modes, asteroids count as the number of pieces they
+# can split into, so splitting never goes over the cap. Crowded games hit
+# them, which holds spawns back and skips explosions there
+SPAWN_MAX_ASTEROIDS = 96
+SPAWN_MAX_EXPLOSIONS = 32
+# above these fractions of the frame budget, explosions of asteroids are
+# skipped and asteroid spawns deferred, for at most SPAWN_MAX_DEFER seconds
+EXPLOSION_THROTTLE_LOAD = 0.8
+SPAWN_THROTTLE_LOAD = 0.9
+SPAWN_MAX_DEFER = 3.0  # seconds
+# number of spawn decisions kept for telemetry
+SPAWN_LOG_SIZE = 256
+
+# lower the render quality in tiers while frames take too long, see
+# `quality.py`: a tier down above QUALITY_DEGRADE_LOAD of the frame budget, a
+# tier up after QUALITY_RESTORE_FRAMES frames below QUALITY_RESTORE_LOAD
+ADAPTIVE_QUALITY = True
+QUALITY_DEGRADE_LOAD = 0.75
+QUALITY_RESTORE_LOAD = 0.5
+QUALITY_RESTORE_FRAMES = 120
+# frames the tier holds after a change, until the load is measured anew
+QUALITY_HOLD_FRAMES = BUDGET_FRAMES
+QUALITY_ROTATION_STEP = 6  # degrees
+QUALITY_MAX_SHOTS = 32
+# number of tier changes kept for telemetry
+QUALITY_LOG_SIZE = 64
+
+# rotated sprites are cached, with angles rounded to ROTATION_STEP degrees
+ROTATION_STEP = 1
+ROTATION_CACHE_SIZE = 1024
+# scaled explosion frames are cached, EXPLOSION_STEPS frames per size
+EXPLOSION_CACHE_SIZE = EXPLOSION_STEPS * 8
+
+# rendered lines of text and layouts of text blocks are cached
+TEXT_CACHE_SIZE = 128
+
+# only redraw and update the screen areas that changed
+DIRTY_RENDERING = False
+# above this fraction of the screen area, the full screen is updated instead
+DIRTY_MAX_AREA = 0.5
+
+# maximum number of killed instances kept for re-use, per class
+ASTEROID_POOL_CAP = 256
+SHOT_POOL_CAP = 256
+EXPLOSION_POOL_CAP = 64
+
+# the simulation runs at a fixed rate, independent of the rendering
+SIMULATION_HZ = 60
+SIMULATION_DT = 1 / SIMULATION_HZ
+# maximum number of simulation steps run to catch up before drawing a frame
+MAX_SIMULATION_STEPS = 5
+# maximum rendered frames per second, 0 for unlimited
+RENDER_FPS = 60
+# composite frames on a background thread while the next one is simulated,
+# see `render.py`
+RENDER_THREAD = False
+
+# record the input of every game session played into `recorder.RECORDING_DIR`
+RECORD_SESSIONS = False
+# recordings are buffered for up to this many simulation steps, and written
+# by a background thread in batches, at least every RECORDING_FLUSH_INTERVAL
+RECORDING_BUFFER_FRAMES = 1 << 14
+RECORDING_BATCH_FRAMES = 1 << 10
+RECORDING_FLUSH_INTERVAL = 1.0  # seconds
+RECORDING_COMPRESS = True
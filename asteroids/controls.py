@@ -0,0 +1,113 @@
+"""Module controls abstracts the input devices the ships are steered with.
+
+Ships don't poll `pygame.key` and `pygame.mouse` themselves, but go through
+the functions of this module. By default they read the real devices, but any
+other input source can be installed with `use()`, e.g. a `ScriptedControls`
+for headless runs.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+import pygame
+
+
+class Controls:
+    """Input source reading the real keyboard and mouse"""
+
+    def get_pressed(self):
+        """State of all keyboard keys, indexable by key constant"""
+        return pygame.key.get_pressed()
+
+    def mouse_pressed(self) -> tuple[bool, bool, bool]:
+        """State of the left, middle and right mouse buttons"""
+        return pygame.mouse.get_pressed()
+
+    def mouse_pos(self) -> tuple[int, int]:
+        return pygame.mouse.get_pos()
+
+    def advance(self):
+        """Called once per frame by drivers that step the game themselves"""
+        pass
+
+
+class KeyState:
+    """Keyboard state built from a set of pressed keys
+
+    Mimics the sequence returned by `pygame.key.get_pressed()`."""
+
+    def __init__(self, pressed: Iterable[int] = ()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.pressed
+
+
+class ScriptedControls(Controls):
+    """Input source that is set by code instead of the real devices
+
+    The state can be changed directly with `press()`, `release()` and
+    `set_mouse()`, or by a `script`. The script is called by `advance()` at
+    the start of every frame, as `script(frame, controls)`.
+    """
+
+    def __init__(self, script: Callable[[int, ScriptedControls], None] | None = None):
+        self.script = script
+        self.frame = 0
+        self.keys = set()
+        self.mouse_buttons = (False, False, False)
+        self.mouse_position = (0, 0)
+
+    def press(self, *keys: int):
+        self.keys.update(keys)
+
+    def release(self, *keys: int):
+        self.keys.difference_update(keys)
+
+    def set_mouse(self, pos=None, buttons=None):
+        if pos is not None:
+            self.mouse_position = (int(pos[0]), int(pos[1]))
+        if buttons is not None:
+            self.mouse_buttons = tuple(bool(b) for b in buttons)
+
+    def get_pressed(self) -> KeyState:
+        return KeyState(self.keys)
+
+    def mouse_pressed(self) -> tuple[bool, bool, bool]:
+        return self.mouse_buttons
+
+    def mouse_pos(self) -> tuple[int, int]:
+        return self.mouse_position
+
+    def advance(self):
+        if self.script is not None:
+            self.script(self.frame, self)
+        self.frame += 1
+
+
+_source = Controls()
+
+
+def use(source: Controls) -> Controls:
+    """Install `source` as the input source, returns the previous one"""
+    global _source
+    previous, _source = _source, source
+    return previous
+
+
+def source() -> Controls:
+    """The currently installed input source"""
+    return _source
+
+
+def get_pressed():
+    return _source.get_pressed()
+
+
+def mouse_pressed() -> tuple[bool, bool, bool]:
+    return _source.mouse_pressed()
+
+
+def mouse_pos() -> tuple[int, int]:
+    return _source.mouse_pos()
@@ -0,0 +1,96 @@
+"""Module dirty implements rendering with dirty rectangles.
+
+Instead of blitting the full background and flipping the full screen every
+frame, only the areas drawn to in the previous frame get their background
+restored, and only those plus the areas drawn to in the current frame are
+pushed to the display with `pygame.display.update(rects)`. Frames that don't
+restore the background (e.g. no simulation step, or the pause text drawn over
+the frozen game) keep collecting areas until the next one does.
+
+For this to work, everything drawn to the screen has to report its rect
+with `DIRTY.add()`. If the dirty area grows too large, the full screen is
+flipped instead.
+"""
+
+from __future__ import annotations
+
+import pygame
+from pygame import Rect, Surface
+
+from constants import *
+
+_SCREEN_AREA = SCREEN_WIDTH * SCREEN_HEIGHT
+
+
+class DirtyRenderer:
+    """Keeps track of the areas drawn to in the previous and current frame"""
+
+    def __init__(self, enabled: bool = DIRTY_RENDERING):
+        self.enabled = enabled
+        # areas drawn to whose background hasn't been restored yet
+        self.previous: list[Rect] = []
+        # areas whose background has been restored in this frame
+        self.restored: list[Rect] = []
+        self.current: list[Rect] = []
+        # the full screen has to be redrawn and updated
+        self.full = True
+        self.full_updates = 0
+        self.partial_updates = 0
+
+    def invalidate(self):
+        """Redraw and update the full screen with the next frame"""
+        self.full = True
+
+    def add(self, rect: Rect | None):
+        """Mark `rect` as drawn to in this frame"""
+        if self.enabled and rect is not None:
+            self.current.append(rect)
+
+    def draw_background(self, screen: Surface, background: Surface):
+        """Restore the background where the previous frame drew to"""
+        if not self.enabled or self.full:
+            screen.blit(background, (0, 0))
+        else:
+            screen.blits([(background, r, r) for r in self.previous], doreturn=False)
+        self.restored += self.previous
+        self.previous = []
+
+    def end_frame(self) -> list[Rect] | None:
+        """Finish the frame, returns the areas of the display to update, or
+        None for all of it"""
+        if not self.enabled:
+            self.previous, self.restored = [], []
+            return None
+
+        rects = self.restored + self.current
+        area = sum(r.w * r.h for r in rects)
+        full = self.full or area > _SCREEN_AREA * DIRTY_MAX_AREA
+        if full:
+            self.full_updates += 1
+        else:
+            self.partial_updates += 1
+        self.full = False
+        if self.previous:
+            # nothing was restored this frame: merge everything pending into
+            # one area, so that the list can't grow while e.g. paused
+            self.previous = [self.previous[0].unionall(self.previous + self.current)]
+        else:
+            self.previous = self.current
+        self.restored = []
+        self.current = []
+        return None if full else rects
+
+    def flip(self):
+        """Push the changed areas to the display, falls back to a full flip"""
+        present(self.end_frame())
+
+
+def present(rects: list[Rect] | None):
+    """Push `rects` to the display, or all of it if None"""
+    if rects is None:
+        pygame.display.flip()
+    else:
+        pygame.display.update(rects)
+
+
+DIRTY = DirtyRenderer()
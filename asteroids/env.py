@@ -0,0 +1,389 @@
+"""Module env wraps the game modes in a reset/step environment for agents.
+
+`AsteroidsEnv` follows the Gymnasium API without depending on it:
+`reset(seed)` starts a new game and returns `(observation, info)`,
+`step(action)` runs one simulation step and returns `(observation, reward,
+terminated, truncated, info)`. The reward is the score gained in the step,
+the game terminates when the ship is destroyed. In level mode, a cleared
+level continues with the next one.
+
+Actions replace the keyboard and mouse, see `ship_actions()` and
+`taurus_actions()`. They are either discrete, an index into the table of
+input combinations of the mode, or continuous:
+
+- ship modes: `[turn, thrust, fire]`; turns left below -0.5 and right above
+  0.5, thrusts and fires above 0
+- taurus: `[move_x, move_y, aim_x, aim_y, plasma, mjolnir]`; moves along an
+  axis beyond ±0.5, fires above 0 in the direction of `(aim_x, aim_y)`
+
+Observations are dicts of arrays:
+
+- `ship`: position, velocity, heading, shot and Mjolnir cooldown
+- `asteroids` and `shots`: position, velocity and radius of the
+  `ENV_MAX_ASTEROIDS` / `ENV_MAX_SHOTS` nearest to the ship, nearest first,
+  zero-padded; `asteroid_count` and `shot_count` are the numbers in play
+- `frame`, with `frame=True` only: the rendered frame as `(height, width,
+  3)` RGB array. The env draws into a Surface built on top of this array
+  (`pygame.image.frombuffer`), so it's a view without any copying
+
+The arrays are reused and overwritten by the next step, copy what you keep.
+
+`VectorEnv` steps many environments in lockstep and returns batched arrays.
+"""
+
+from __future__ import annotations
+
+import itertools
+import random
+
+import numpy as np
+import pygame
+
+import controls
+from constants import *
+from dirty import DIRTY
+import headless
+import state
+
+ENV_MAX_ASTEROIDS = 32
+ENV_MAX_SHOTS = 16
+ENV_MAX_STEPS = 60 * 60 * 5
+
+SHIP_MODES = ("endless", "level")
+# distance of the aim point from the taurus, see `_apply()`
+_AIM_DISTANCE = TAURUS_RADIUS * 2
+_DIRECTIONS = [
+    pygame.Vector2(x, y).normalize()
+    for x, y in ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+]
+
+
+class Action:
+    """Input of one step: pressed keys, mouse buttons, and the direction the
+    mouse is in, seen from the ship"""
+
+    def __init__(
+        self,
+        keys: tuple[int, ...] = (),
+        buttons: tuple[bool, bool, bool] = (False, False, False),
+        aim: pygame.Vector2 | None = None,
+    ):
+        self.keys = set(keys)
+        self.buttons = buttons
+        self.aim = aim
+
+
+def ship_actions() -> list[Action]:
+    """Discrete actions of the ship: turn, thrust and fire, in any combination"""
+    return [
+        Action(tuple(k for k in keys if k is not None))
+        for keys in itertools.product(
+            (None, pygame.K_LEFT, pygame.K_RIGHT),
+            (None, pygame.K_UP),
+            (None, pygame.K_SPACE),
+        )
+    ]
+
+
+def taurus_actions() -> list[Action]:
+    """Discrete actions of the taurus: move in one of 8 directions or not,
+    combined with no fire, or plasma or Mjolnir fired in one of 8 directions"""
+    moves = [()] + [
+        tuple(k for k in keys if k is not None)
+        for keys in itertools.product(
+            (None, pygame.K_a, pygame.K_d), (None, pygame.K_w, pygame.K_s)
+        )
+        if keys != (None, None)
+    ]
+    fire = [((False, False, False), None)]
+    for buttons in ((True, False, False), (False, False, True)):
+        fire += [(buttons, direction) for direction in _DIRECTIONS]
+    return [Action(keys, buttons, aim) for keys in moves for buttons, aim in fire]
+
+
+def continuous_action(mode: str, action) -> Action:
+    """Input for the continuous `action` of `mode`, see the module docs"""
+    if mode in SHIP_MODES:
+        turn, thrust, fire = (float(a) for a in action)
+        keys = []
+        if turn < -0.5:
+            keys.append(pygame.K_LEFT)
+        elif turn > 0.5:
+            keys.append(pygame.K_RIGHT)
+        if thrust > 0:
+            keys.append(pygame.K_UP)
+        if fire > 0:
+            keys.append(pygame.K_SPACE)
+        return Action(tuple(keys))
+
+    move_x, move_y, aim_x, aim_y, plasma, mjolnir = (float(a) for a in action)
+    keys = []
+    if move_x < -0.5:
+        keys.append(pygame.K_a)
+    elif move_x > 0.5:
+        keys.append(pygame.K_d)
+    if move_y < -0.5:
+        keys.append(pygame.K_w)
+    elif move_y > 0.5:
+        keys.append(pygame.K_s)
+    aim = pygame.Vector2(aim_x, aim_y)
+    if aim.length_squared() > 0:
+        aim.normalize_ip()
+    else:
+        aim = pygame.Vector2(0, -1)
+    return Action(tuple(keys), (plasma > 0, False, mjolnir > 0), aim)
+
+
+def observation_buffers(frame: bool = False) -> dict[str, np.ndarray]:
+    """Zeroed arrays for one observation"""
+    buffers = {
+        "ship": np.zeros(8, dtype=np.float32),
+        "asteroids": np.zeros((ENV_MAX_ASTEROIDS, 5), dtype=np.float32),
+        "asteroid_count": np.zeros((), dtype=np.int32),
+        "shots": np.zeros((ENV_MAX_SHOTS, 5), dtype=np.float32),
+        "shot_count": np.zeros((), dtype=np.int32),
+    }
+    if frame:
+        buffers["frame"] = np.zeros((SCREEN_HEIGHT, SCREEN_WIDTH, 4), dtype=np.uint8)
+    return buffers
+
+
+def _nearest(store, center: np.ndarray, out: np.ndarray) -> int:
+    """Write the entities of `store` nearest to `center` into `out`, returns
+    the number of entities in the store"""
+    slots = store.live_slots()
+    count = len(slots)
+    distance = np.sum((store.position[slots] - center) ** 2, axis=1)
+    if count > len(out):
+        nearest = np.argpartition(distance, len(out) - 1)[: len(out)]
+        slots, distance = slots[nearest], distance[nearest]
+    slots = slots[np.argsort(distance, kind="stable")]
+    n = len(slots)
+    out[:n, 0:2] = store.position[slots]
+    out[:n, 2:4] = store.velocity[slots]
+    out[:n, 4] = store.radius[slots]
+    out[n:] = 0
+    return count
+
+
+class AsteroidsEnv:
+    """Environment playing one game of `mode` (see `headless.MODES`)
+
+    `action` is "discrete" or "continuous". With `frame`, every step is also
+    drawn and the observation holds the frame. An episode is truncated after
+    `max_steps` steps of `dt` seconds.
+
+    Observations are written into `buffers` (see `observation_buffers()`),
+    which `VectorEnv` uses to hand in views of its batched arrays.
+
+    Requires `init()` to have been called.
+    """
+
+    def __init__(
+        self,
+        mode: str = "endless",
+        action: str = "discrete",
+        frame: bool = False,
+        max_steps: int = ENV_MAX_STEPS,
+        dt: float = SIMULATION_DT,
+        buffers: dict[str, np.ndarray] | None = None,
+    ):
+        if mode not in headless.MODES:
+            raise ValueError(f"unknown mode {mode!r}")
+        if action not in ("discrete", "continuous"):
+            raise ValueError(f"unknown action type {action!r}")
+        self.mode = mode
+        self.action_type = action
+        self.actions = taurus_actions() if mode == "taurus" else ship_actions()
+        self.frame = frame
+        self.max_steps = max_steps
+        self.dt = dt
+        self.buffers = buffers if buffers is not None else observation_buffers(frame)
+        self.observation = {
+            name: buffer[..., :3] if name == "frame" else buffer
+            for name, buffer in self.buffers.items()
+        }
+        self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        if frame:
+            self.screen = pygame.image.frombuffer(
+                self.buffers["frame"], (SCREEN_WIDTH, SCREEN_HEIGHT), "RGBX"
+            )
+        self.controls = controls.ScriptedControls()
+        # draws the seeds of the games after the first one
+        self.seeds = random.Random()
+        self.loop: state.Loop | None = None
+        # the last game state, observed after the game is over as well
+        self.game: state.Loop | None = None
+        self.steps = 0
+        self.score = 0
+
+    @property
+    def action_count(self) -> int:
+        """Number of discrete actions, or the length of a continuous one"""
+        if self.action_type == "discrete":
+            return len(self.actions)
+        return 3 if self.mode in SHIP_MODES else 6
+
+    def reset(self, seed: int | None = None) -> tuple[dict[str, np.ndarray], dict]:
+        """Start a new game, with `seed` or the next one of the env's seeds
+
+        Seeding the first reset makes all following games reproducible."""
+        if seed is not None:
+            self.seeds.seed(seed)
+        else:
+            seed = self.seeds.getrandbits(32)
+        self.loop = self.game = headless.MODES[self.mode](self.screen, seed)
+        self.steps = 0
+        self.score = 0
+        if self.frame:
+            self.loop.draw()
+        return self.observe(), self._info()
+
+    def step(self, action) -> tuple[dict[str, np.ndarray], float, bool, bool, dict]:
+        """Run one simulation step with `action`"""
+        if self.loop is None or isinstance(self.loop, state.GameOver):
+            raise RuntimeError("reset() the env before stepping it")
+        self._apply(action)
+        previous = controls.use(self.controls)
+        try:
+            loop = self.loop.update(self.dt)
+        finally:
+            controls.use(previous)
+        if isinstance(loop, state.LevelCleared):
+            loop = state.Level(
+                self.screen, loop.storage, loop.level + 1, seed=loop.seed
+            )
+        self.loop = loop
+        if hasattr(loop, "world"):
+            self.game = loop
+        self.steps += 1
+
+        score = headless.score(loop)
+        reward = float(score - self.score)
+        self.score = score
+        terminated = isinstance(loop, (state.GameOver, state.Quit))
+        truncated = not terminated and self.steps >= self.max_steps
+        if self.frame:
+            loop.draw()
+        return self.observe(), reward, terminated, truncated, self._info()
+
+    def _apply(self, action):
+        """Set the controls to `action`"""
+        if self.action_type == "discrete":
+            action = self.actions[int(action)]
+        else:
+            action = continuous_action(self.mode, action)
+        self.controls.keys = action.keys
+        mouse = None
+        if action.aim is not None:
+            mouse = self.game.player.position + action.aim * _AIM_DISTANCE
+        self.controls.set_mouse(pos=mouse, buttons=action.buttons)
+
+    def observe(self) -> dict[str, np.ndarray]:
+        """Write the entity state into the observation and return it"""
+        world = self.game.world
+        player = self.game.player
+        ship = self.buffers["ship"]
+        ship[0:2] = player.position
+        ship[2:4] = player.velocity * SHIP_VELOCITY_HZ
+        if hasattr(player, "rotation"):
+            ship[4:6] = pygame.Vector2(0, 1).rotate(player.rotation)
+        else:
+            ship[4:6] = 0
+        ship[6] = max(player.shot_cooldown, 0)
+        ship[7] = max(getattr(player, "mjolnir_cooldown", 0), 0)
+
+        center = ship[0:2].astype(np.float64)
+        self.buffers["asteroid_count"][...] = _nearest(
+            world.asteroid_store, center, self.buffers["asteroids"]
+        )
+        self.buffers["shot_count"][...] = _nearest(
+            world.shot_store, center, self.buffers["shots"]
+        )
+        return self.observation
+
+    def _info(self) -> dict:
+        return {
+            "score": self.score,
+            "steps": self.steps,
+            "level": getattr(self.game, "level", None),
+        }
+
+
+class VectorEnv:
+    """`n` environments of `mode` stepped in lockstep
+
+    Observations, rewards and flags come as arrays with the environments
+    along the first axis; the observation arrays are shared by all envs, so
+    a batched frame is a view as well. An environment whose game ended is
+    reset right away: its observation is the first one of the next game,
+    while reward, flags and `info["score"]` still belong to the game that
+    ended. See `AsteroidsEnv` for the other arguments.
+    """
+
+    def __init__(self, n: int, mode: str = "endless", **kwargs):
+        self.n = n
+        frame = kwargs.get("frame", False)
+        self.buffers = {
+            name: np.zeros((n,) + buffer.shape, dtype=buffer.dtype)
+            for name, buffer in observation_buffers(frame).items()
+        }
+        self.envs = [
+            AsteroidsEnv(
+                mode,
+                # `[i, ...]`: views, even of the scalar counts
+                buffers={name: b[i, ...] for name, b in self.buffers.items()},
+                **kwargs,
+            )
+            for i in range(n)
+        ]
+        self.observation = {
+            name: buffer[..., :3] if name == "frame" else buffer
+            for name, buffer in self.buffers.items()
+        }
+        self.rewards = np.zeros(n, dtype=np.float32)
+        self.terminated = np.zeros(n, dtype=bool)
+        self.truncated = np.zeros(n, dtype=bool)
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+
+    def reset(self, seed: int | None = None) -> tuple[dict[str, np.ndarray], dict]:
+        """Start new games in all environments, env `i` with `seed + i`"""
+        for i, env in enumerate(self.envs):
+            env.reset(None if seed is None else seed + i)
+        self.scores[:] = 0
+        self.steps[:] = 0
+        return self.observation, self._info()
+
+    def step(self, actions) -> tuple:
+        """Run one step in every environment, `actions[i]` in env `i`
+
+        Returns `(observations, rewards, terminated, truncated, info)`."""
+        for i, env in enumerate(self.envs):
+            _, reward, terminated, truncated, info = env.step(actions[i])
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+            self.scores[i] = info["score"]
+            self.steps[i] = info["steps"]
+            if terminated or truncated:
+                env.reset()
+        return (
+            self.observation,
+            self.rewards,
+            self.terminated,
+            self.truncated,
+            self._info(),
+        )
+
+    def _info(self) -> dict[str, np.ndarray]:
+        return {"score": self.scores, "steps": self.steps}
+
+
+def init():
+    """Initialize pygame for environments, see `headless.init()`
+
+    The envs draw on their own Surfaces, not on the display, so nothing is
+    drawn unless asked for and dirty rendering is off."""
+    headless.init(render=False)
+    DIRTY.enabled = False
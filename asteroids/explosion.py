@@ -3,6 +3,8 @@ import pygame
 from assets import ASSETS
 from circleshape import CircleShape
 from constants import *
+from quality import QUALITY
+from spritecache import SCALES
 
 
 class Explosion(CircleShape):
@@ -12,12 +14,24 @@ class Explosion(CircleShape):
     step to the next  being controlled by `EXPLOSION_STEP_DURATION`. After the
     maximum step is reached, explosions automatically despawn."""
 
-    def __init__(self, position, radius):
-        super().__init__(position, radius)
+    world_groups = ("drawable", "updateable", "explosions")
+    pool_cap = EXPLOSION_POOL_CAP
+
+    def __init__(self, world, position, radius):
+        super().__init__(world, position, radius)
         self.step = 1
         self.step_time = 0
         self.size = 2 * radius
 
+    @staticmethod
+    def warm(radii):
+        """Scale all explosion frames for the given radii up front"""
+        for radius in radii:
+            size = 2 * radius
+            for step in range(1, EXPLOSION_STEPS + 1):
+                asset_name = f"explosion_{step}.png"
+                SCALES.scaled(asset_name, ASSETS[asset_name], (size, size))
+
     def update(self, dt: float):
         self.step_time += dt
         if self.step_time >= EXPLOSION_STEP_DURATION:
@@ -26,13 +40,13 @@ class Explosion(CircleShape):
         if self.step > EXPLOSION_STEPS:
             self.kill()
 
-    def draw(self, screen: pygame.Surface):
+    def draw(self, screen: pygame.Surface, alpha=1.0):
         """Draw the current stage of the explosion with the correct radius"""
 
-        asset_name = f"explosion_{self.step}.png"
+        asset_name = f"explosion_{QUALITY.explosion_step(self.step)}.png"
         base_img = ASSETS[asset_name]
         # transform stage image to correct radius
-        scaled_img = pygame.transform.scale(base_img, (self.size, self.size))
+        scaled_img = SCALES.scaled(asset_name, base_img, (self.size, self.size))
         x = self.position.x - self.radius
         y = self.position.y - self.radius
-        screen.blit(scaled_img, (x, y))
+        return screen.blit(scaled_img, (x, y))
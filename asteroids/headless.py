@@ -0,0 +1,137 @@
+"""Module headless runs the game without display, real input or frame limit.
+
+The SDL dummy video driver stands in for the window, `dt` is fixed instead
+of measured, and the ships are steered by a `controls.ScriptedControls`.
+With drawing disabled, games run thousands of times faster than real time.
+
+Run e.g. `python headless.py endless --frames 10000 --no-draw` to play a
+session with a random policy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+from typing import Callable
+
+import pygame
+
+import assets
+import controls
+from constants import *
+import state
+
+HEADLESS_DT = 1 / 60
+
+# game modes by name, as `mode(screen, seed)`
+MODES: dict[str, Callable[[pygame.Surface, int | None], state.Loop]] = {
+    "endless": lambda screen, seed=None: state.Endless(screen, {}, seed=seed),
+    "level": lambda screen, seed=None: state.Level(screen, {}, level=1, seed=seed),
+    "taurus": lambda screen, seed=None: state.EndlessTaurus(screen, {}, seed=seed),
+}
+
+
+def init(render: bool = True) -> pygame.Surface:
+    """Initialize pygame without a display, load assets and return the screen
+
+    With `render=False` the states skip all their drawing."""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    assets.load()
+    assets.convert()
+    state.Loop.set_render(render)
+    return screen
+
+
+def run(
+    loop: state.Loop,
+    frames: int,
+    dt: float = HEADLESS_DT,
+    source: controls.Controls | None = None,
+    auto_continue: bool = True,
+    on_frame: Callable[[state.Loop], None] | None = None,
+) -> tuple[state.Loop, int]:
+    """Step `loop` up to `frames` times with a fixed `dt`
+
+    `source` is installed as input source for the duration of the run. The
+    run stops early on `GameOver` or `Quit`. With `auto_continue`, a cleared
+    level immediately continues with the next one. `on_frame(loop)` is called
+    after every frame.
+
+    Returns the last state and the number of frames that were run.
+    """
+    previous = controls.use(source) if source is not None else None
+    try:
+        frame = 0
+        while frame < frames:
+            controls.source().advance()
+            loop = loop.step(dt)
+            frame += 1
+            if on_frame is not None:
+                on_frame(loop)
+            if isinstance(loop, (state.GameOver, state.Quit)):
+                break
+            if auto_continue and isinstance(loop, state.LevelCleared):
+                loop = state.Level(
+                    loop.screen, loop.storage, loop.level + 1, seed=loop.seed
+                )
+    finally:
+        if previous is not None:
+            controls.use(previous)
+    return loop, frame
+
+
+def score(loop: state.Loop) -> int:
+    """The score of the game `loop` is in or ended with"""
+    if hasattr(loop, "score"):
+        return loop.score
+    return loop.storage.get("score", 0)
+
+
+def random_policy(seed=None, hold: int = 10):
+    """Script for `ScriptedControls` pressing random keys and mouse buttons
+
+    Every input is held for `hold` frames before the next one is chosen."""
+    rng = random.Random(seed)
+    keys = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE)
+
+    def script(frame: int, source: controls.ScriptedControls):
+        if frame % hold:
+            return
+        source.keys = {k for k in keys if rng.random() < 0.3}
+        source.set_mouse(
+            pos=(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT)),
+            buttons=(rng.random() < 0.5, False, rng.random() < 0.05),
+        )
+
+    return script
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a game without display")
+    parser.add_argument("mode", choices=MODES)
+    parser.add_argument("--frames", type=int, default=3600)
+    parser.add_argument("--dt", type=float, default=HEADLESS_DT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-draw", action="store_true", help="skip all drawing")
+    args = parser.parse_args()
+
+    screen = init(render=not args.no_draw)
+    source = controls.ScriptedControls(random_policy(args.seed))
+
+    start = time.perf_counter()
+    loop = MODES[args.mode](screen, args.seed)
+    loop, frames = run(loop, args.frames, args.dt, source)
+    elapsed = time.perf_counter() - start
+
+    print(f"state:  {type(loop).__name__}")
+    print(f"score:  {score(loop)}")
+    print(f"frames: {frames} in {elapsed:.3f}s ({frames / elapsed:.0f} FPS)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,15 @@ import pygame
 import pygame.freetype
 
 import assets
+from budget import BUDGET
 from constants import *
+import controls
+from dirty import DIRTY
+from profiler import PROFILER
+from quality import QUALITY
+import recorder
+import render
+from spawner import SpawnScheduler
 import state
 
 
@@ -17,34 +25,95 @@ def main():
     # create GUI window as `screen` object
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 
+    # convert assets to the display format, now that there is a display
+    assets.convert()
+
     # A `pygame.time.Clock` is a time-tracking object
     clock = pygame.time.Clock()
-    # delta time
-    dt = 0
+    # real time that has passed, but hasn't been simulated yet
+    accumulator = 0.0
 
     # cross-state value dictionary
     game_vals = {}
 
-    # current_state = state.Endless(screen, game_vals)
-    current_state = state.Menu(screen, game_vals)
+    # with `RENDER_THREAD`, the states draw to a canvas instead, which is
+    # composited onto the screen in the background
+    renderer = None
+    canvas = screen
+    if RENDER_THREAD:
+        renderer = render.RenderThread(screen)
+        canvas = renderer.canvas
+
+    # current_state = state.Endless(canvas, game_vals)
+    current_state = state.Menu(canvas, game_vals)
+
+    # record the input of the game sessions, to play them back with `replay.py`
+    sessions = None
+    if RECORD_SESSIONS:
+        sessions = recorder.SessionRecorder()
+        controls.use(sessions.controls)
+        # spawns throttled by the frame load couldn't be replayed
+        SpawnScheduler.set_adaptive(False)
+
+    # game loop, left on quitting, but also on errors or Ctrl-C
+    try:
+        while 1:
+            PROFILER.begin_frame()
+            BUDGET.begin_frame()
+
+            # advance the simulation in fixed steps of `SIMULATION_DT`, as many as
+            # fit into the time that has passed
+            steps = 0
+            while accumulator >= SIMULATION_DT:
+                if steps == MAX_SIMULATION_STEPS:
+                    # the simulation can't keep up, drop the remaining time
+                    # instead of falling further and further behind
+                    accumulator = 0.0
+                    break
+                controls.source().advance()
+                next_state = current_state.update(SIMULATION_DT)
+                if sessions is not None:
+                    sessions.record(current_state, next_state)
+                current_state = next_state
+                if isinstance(current_state, state.Quit):
+                    return
+                accumulator -= SIMULATION_DT
+                steps += 1
+
+            # draw the state between the last two simulation steps, by the
+            # fraction of a step that is left over
+            current_state.draw(accumulator / SIMULATION_DT)
 
-    # game loop
-    while 1:
+            # draw the profiler overlay (only while enabled with F3)
+            DIRTY.add(PROFILER.draw(canvas, current_state))
 
-        current_state = current_state.step(dt)
-        if isinstance(current_state, state.Quit):
-            return
+            # Draw the surface to the actual display
+            # https://www.pygame.org/docs/ref/display.html#pygame.display.flip
+            # (or only the changed areas of it, with `DIRTY_RENDERING`)
+            if renderer is not None:
+                # shows the previous frame, this one is composited meanwhile
+                renderer.submit(DIRTY.end_frame())
+            else:
+                DIRTY.flip()
+            PROFILER.mark("flip")
+            PROFILER.end_frame()
+            # the work of this frame, for throttling spawns and the render
+            # quality by the frame load
+            BUDGET.end_frame()
+            QUALITY.update()
 
-        # Draw the surface to the actual display
-        # https://www.pygame.org/docs/ref/display.html#pygame.display.flip
-        pygame.display.flip()
+            # limit the framerate to a maximum of `RENDER_FPS`
+            # this also returns the time that has passed since the last
+            # time Clock.tick() has been called, in milliseconds
+            accumulator += clock.tick(RENDER_FPS) / 1000
 
-        # limit the framerate to a maximum of 60FPS
-        # this also returns the delta-time that has passed since the last
-        # time Clock.tick() has been called
-        # The argument to `tick` is the intended framerate in FPS
-        dt_milliseconds = clock.tick(60)
-        dt = dt_milliseconds / 1000
+    finally:
+        if sessions is not None:
+            # wait until the recordings are completely written, so that they
+            # can be played back
+            sessions.close()
+        if renderer is not None:
+            renderer.close()
 
 
 if __name__ == "__main__":
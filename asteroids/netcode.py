@@ -0,0 +1,296 @@
+"""Module netcode contains the network protocol of multiplayer games.
+
+The server (`server.py`) runs the simulation, clients (`client.py`) only
+send their input and show the state they receive. All packets are single
+UDP datagrams starting with their type:
+
+- `HELLO` (client): protocol version
+- `WELCOME` (server): the client's ship id, the game mode, tick rate
+- `INPUT` (client): sequence number, the last snapshot tick received, and
+  the input as in `replay.pack_input()` plus the mouse position
+- `SNAPSHOT` (server): tick, baseline tick, score, and the changes of the
+  entities since the baseline
+- `BYE` (client): leaving the game
+
+Every entity is described by its kind and a tuple of quantized integer
+fields (see `FIELDS`): positions and velocities in 1/`POSITION_SCALE`
+pixels (per second), angles in 1/256 turns. A snapshot is sent as the
+difference to the last snapshot the client acknowledged, its baseline: only
+entities that changed are sent, with only the fields that changed, as
+zigzag varint differences. Entities that are gone are listed by id. Without
+a baseline, every entity is sent in full.
+
+Packets can get lost or arrive out of order: inputs are states held until
+the next input arrives, and snapshots only build on acknowledged ones. To
+test this on localhost, wrap a socket in a `LossySocket`.
+"""
+
+from __future__ import annotations
+
+import heapq
+import random
+import socket
+import struct
+import time
+
+from constants import *
+from asteroid import Asteroid
+from explosion import Explosion
+from player import Player
+from replay import read_varint, unzigzag, write_varint, zigzag
+from shot import Mjolnir, Shot
+from taurus import Taurus
+
+PROTOCOL_VERSION = 1
+
+HELLO = 1
+WELCOME = 2
+INPUT = 3
+SNAPSHOT = 4
+BYE = 5
+
+_HELLO = struct.Struct("<BH")
+_WELCOME = struct.Struct("<BB8sHH")
+_INPUT = struct.Struct("<BIIHhh")
+_SNAPSHOT = struct.Struct("<BII")
+NO_BASELINE = 0xFFFFFFFF
+
+# largest payload of a UDP datagram
+MAX_DATAGRAM = 65507
+
+POSITION_SCALE = 4
+
+# entity kinds and their fields
+PLAYER = 0
+TAURUS = 1
+ASTEROID = 2
+SHOT = 3
+MJOLNIR = 4
+EXPLOSION = 5
+
+FIELDS = {
+    PLAYER: ("x", "y", "vx", "vy", "rotation", "flags", "owner"),
+    TAURUS: ("x", "y", "vx", "vy", "flags", "owner"),
+    ASTEROID: ("x", "y", "vx", "vy", "size", "kind"),
+    SHOT: ("x", "y", "vx", "vy", "kind"),
+    MJOLNIR: ("x", "y", "vx", "vy", "kind"),
+    EXPLOSION: ("x", "y", "size", "step"),
+}
+# set in the field mask of entities not in the baseline
+_NEW = 0x80
+
+# taurus flags: its four engines, then the Mjolnir cooldown
+_ENGINES = ("engine_top", "engine_bottom", "engine_left", "engine_right")
+_COOLDOWN = 1 << len(_ENGINES)
+
+Entity = tuple[int, ...]
+
+
+def _q(value: float) -> int:
+    return round(value * POSITION_SCALE)
+
+
+def quantize(sprite, owner: int = 0) -> Entity | None:
+    """The entity of `sprite` as `(kind, *fields)`, None if not networked
+
+    `owner` is the id of the client steering a ship."""
+    x, y = sprite.position
+    if isinstance(sprite, Player):
+        vx, vy = sprite.velocity * SHIP_VELOCITY_HZ
+        rotation = round(sprite.rotation % 360 * 256 / 360) % 256
+        flags = int(sprite.engine_running)
+        return (PLAYER, _q(x), _q(y), _q(vx), _q(vy), rotation, flags, owner)
+    if isinstance(sprite, Taurus):
+        vx, vy = sprite.velocity * SHIP_VELOCITY_HZ
+        flags = sum(1 << i for i, e in enumerate(_ENGINES) if getattr(sprite, e))
+        if sprite.mjolnir_cooldown > 0:
+            flags |= _COOLDOWN
+        return (TAURUS, _q(x), _q(y), _q(vx), _q(vy), flags, owner)
+    if isinstance(sprite, Explosion):
+        return (EXPLOSION, _q(x), _q(y), round(sprite.size), sprite.step)
+    vx, vy = sprite.velocity
+    if isinstance(sprite, Mjolnir):
+        return (MJOLNIR, _q(x), _q(y), _q(vx), _q(vy), sprite.kind)
+    if isinstance(sprite, Shot):
+        return (SHOT, _q(x), _q(y), _q(vx), _q(vy), sprite.kind)
+    if isinstance(sprite, Asteroid):
+        return (ASTEROID, _q(x), _q(y), _q(vx), _q(vy), sprite.size, sprite.kind)
+    return None
+
+
+def encode_hello() -> bytes:
+    return _HELLO.pack(HELLO, PROTOCOL_VERSION)
+
+
+def encode_welcome(ship_id: int, mode: str, tick_rate: int, interval: int) -> bytes:
+    return _WELCOME.pack(WELCOME, ship_id, mode.encode(), tick_rate, interval)
+
+
+def decode_welcome(data: bytes) -> tuple[int, str, int, int]:
+    """Ship id, mode, tick rate and snapshot interval"""
+    _, ship_id, mode, tick_rate, interval = _WELCOME.unpack_from(data)
+    return ship_id, mode.rstrip(b"\0").decode(), tick_rate, interval
+
+
+def encode_input(sequence: int, ack: int, bits: int, x: int, y: int) -> bytes:
+    return _INPUT.pack(INPUT, sequence, ack, bits, x, y)
+
+
+def decode_input(data: bytes) -> tuple[int, int, int, int, int]:
+    """Sequence number, acknowledged tick, input bits, mouse x and y"""
+    return _INPUT.unpack_from(data)[1:]
+
+
+def encode_snapshot(
+    tick: int,
+    baseline_tick: int | None,
+    baseline: dict[int, Entity],
+    entities: dict[int, Entity],
+    score: int,
+) -> bytes:
+    """Snapshot of `entities` (by id) as changes to `baseline`"""
+    out = bytearray(
+        _SNAPSHOT.pack(
+            SNAPSHOT, tick, NO_BASELINE if baseline_tick is None else baseline_tick
+        )
+    )
+    write_varint(out, score)
+
+    records = bytearray()
+    changed = 0
+    last_id = 0
+    for entity_id in sorted(entities):
+        entity = entities[entity_id]
+        old = baseline.get(entity_id)
+        if old == entity:
+            continue
+        if old is None or old[0] != entity[0]:
+            mask = _NEW
+            values = entity[1:]
+        else:
+            mask = 0
+            values = []
+            for i, (new_value, old_value) in enumerate(zip(entity[1:], old[1:])):
+                if new_value != old_value:
+                    mask |= 1 << i
+                    values.append(new_value - old_value)
+        write_varint(records, entity_id - last_id)
+        last_id = entity_id
+        records.append(mask)
+        if mask & _NEW:
+            records.append(entity[0])
+        for value in values:
+            write_varint(records, zigzag(value))
+        changed += 1
+    write_varint(out, changed)
+    out += records
+
+    removed = sorted(set(baseline) - set(entities))
+    write_varint(out, len(removed))
+    last_id = 0
+    for entity_id in removed:
+        write_varint(out, entity_id - last_id)
+        last_id = entity_id
+    return bytes(out)
+
+
+def decode_snapshot_header(data: bytes) -> tuple[int, int | None]:
+    """Tick and baseline tick of a snapshot"""
+    _, tick, baseline_tick = _SNAPSHOT.unpack_from(data)
+    return tick, None if baseline_tick == NO_BASELINE else baseline_tick
+
+
+def decode_snapshot(
+    data: bytes, baseline: dict[int, Entity]
+) -> tuple[dict[int, Entity], int]:
+    """The entities of a snapshot based on `baseline`, and the score"""
+    offset = _SNAPSHOT.size
+    score, offset = read_varint(data, offset)
+    entities = dict(baseline)
+
+    changed, offset = read_varint(data, offset)
+    entity_id = 0
+    for _ in range(changed):
+        gap, offset = read_varint(data, offset)
+        entity_id += gap
+        mask = data[offset]
+        offset += 1
+        if mask & _NEW:
+            kind = data[offset]
+            offset += 1
+            fields = []
+            for _ in FIELDS[kind]:
+                value, offset = read_varint(data, offset)
+                fields.append(unzigzag(value))
+            entities[entity_id] = (kind, *fields)
+        else:
+            entity = list(entities[entity_id])
+            for i in range(len(entity) - 1):
+                if mask >> i & 1:
+                    value, offset = read_varint(data, offset)
+                    entity[i + 1] += unzigzag(value)
+            entities[entity_id] = tuple(entity)
+
+    removed, offset = read_varint(data, offset)
+    entity_id = 0
+    for _ in range(removed):
+        gap, offset = read_varint(data, offset)
+        entity_id += gap
+        del entities[entity_id]
+    return entities, score
+
+
+class LossySocket:
+    """Wraps a UDP socket, losing and delaying the packets sent through it
+
+    A stand-in for a bad network when testing on localhost: every packet is
+    lost with probability `loss`, the others are delayed by `latency` plus
+    up to `jitter` seconds, which also reorders them. Delayed packets go
+    out with the next call of `sendto()`, `recvfrom()` or `flush()`.
+    """
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        loss: float = 0.0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.sock = sock
+        self.loss = loss
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.lost = 0
+        # delayed packets, as (time due, count, data, address)
+        self._queue = []
+        self._count = 0
+
+    def sendto(self, data: bytes, address) -> int:
+        self.flush()
+        if self.random.random() < self.loss:
+            self.lost += 1
+            return len(data)
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay <= 0:
+            return self.sock.sendto(data, address)
+        self._count += 1
+        heapq.heappush(
+            self._queue, (time.perf_counter() + delay, self._count, data, address)
+        )
+        return len(data)
+
+    def recvfrom(self, size: int):
+        self.flush()
+        return self.sock.recvfrom(size)
+
+    def flush(self):
+        """Send the delayed packets that are due"""
+        now = time.perf_counter()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, data, address = heapq.heappop(self._queue)
+            self.sock.sendto(data, address)
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
@@ -0,0 +1,128 @@
+"""Module pipeline runs the step of a game as a sequence of stages.
+
+A game state is made of systems: functions doing one part of a step, like
+handling input, spawning, moving everything or resolving collisions. A
+`Pipeline` runs them in order as its `Stage`s, the update stages with
+`update(game, dt)` and the drawing stages with `draw(game, alpha)`. An
+update system returns None to go on with the next stage, or the state to
+change into, which ends the step right there (e.g. `GameOver`).
+
+The stages of a game are declared once (see the states in `state.py` and
+the `Arena` of `server.py`, which share their systems), and every game gets
+its own copy. Stages can be reordered, swapped for other
+systems, e.g. a different integrator or broadphase, or skipped, by name.
+
+Every stage is timed, the times are kept per stage in `last`, `total` and
+`runs`, see `averages()`. The time of each stage is also attributed to its
+`phase` of the frame profiler (see `profiler.py`).
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Iterable, NamedTuple
+
+from profiler import PROFILER
+
+
+class Stage(NamedTuple):
+    """A named step of a pipeline
+
+    `system(game, dt)` for update stages, `system(game, alpha)` for drawing
+    stages. `phase` is the profiler phase the stage's time counts towards."""
+
+    name: str
+    system: Callable
+    phase: str
+    draw: bool = False
+
+
+class Pipeline:
+    """The stages of a game, in the order they run"""
+
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages = list(stages)
+        self.skipped: set[str] = set()
+        # time of the last run, total time and number of runs, by stage name
+        self.last: dict[str, float] = {}
+        self.total: dict[str, float] = {}
+        self.runs: dict[str, int] = {}
+
+    def names(self) -> list[str]:
+        return [stage.name for stage in self.stages]
+
+    def index(self, name: str) -> int:
+        """Position of the stage `name`, raises `KeyError` if there is none"""
+        for i, stage in enumerate(self.stages):
+            if stage.name == name:
+                return i
+        raise KeyError(name)
+
+    def replace(self, name: str, system: Callable):
+        """Run `system` in the stage `name` instead of its current system"""
+        i = self.index(name)
+        self.stages[i] = self.stages[i]._replace(system=system)
+
+    def insert(self, stage: Stage, before: str | None = None, after: str | None = None):
+        """Add `stage` before or after the stage of that name, or at the end"""
+        if before is not None:
+            self.stages.insert(self.index(before), stage)
+        elif after is not None:
+            self.stages.insert(self.index(after) + 1, stage)
+        else:
+            self.stages.append(stage)
+
+    def remove(self, name: str) -> Stage:
+        return self.stages.pop(self.index(name))
+
+    def move(self, name: str, before: str | None = None, after: str | None = None):
+        """Move the stage `name` before or after another one"""
+        self.insert(self.remove(name), before, after)
+
+    def skip(self, name: str, skipped: bool = True):
+        """Skip the stage `name`, or stop skipping it"""
+        self.index(name)
+        if skipped:
+            self.skipped.add(name)
+        else:
+            self.skipped.discard(name)
+
+    def update(self, game, dt: float):
+        """Run the update stages, returns the state to change into"""
+        for stage in self.stages:
+            if stage.draw or stage.name in self.skipped:
+                continue
+            start = time.perf_counter()
+            next_state = stage.system(game, dt)
+            self._timed(stage, time.perf_counter() - start)
+            if next_state is not None:
+                return next_state
+        return game
+
+    def draw(self, game, alpha: float = 1.0):
+        """Run the drawing stages"""
+        for stage in self.stages:
+            if not stage.draw or stage.name in self.skipped:
+                continue
+            start = time.perf_counter()
+            stage.system(game, alpha)
+            self._timed(stage, time.perf_counter() - start)
+
+    def _timed(self, stage: Stage, seconds: float):
+        self.last[stage.name] = seconds
+        self.total[stage.name] = self.total.get(stage.name, 0.0) + seconds
+        self.runs[stage.name] = self.runs.get(stage.name, 0) + 1
+        PROFILER.mark(stage.phase)
+
+    def averages(self) -> dict[str, float]:
+        """Average time per run of each stage in seconds, in stage order"""
+        return {
+            name: self.total[name] / self.runs[name]
+            for name in self.names()
+            if self.runs.get(name)
+        }
+
+    def reset_timings(self):
+        self.last.clear()
+        self.total.clear()
+        self.runs.clear()
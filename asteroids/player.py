@@ -2,9 +2,12 @@ import pygame
 
 from assets import ASSETS
 from circleshape import CircleShape
+import controls
 from shot import Shot
 from constants import *
 from explosion import Explosion
+from render import draw_shape
+from spritecache import ROTATIONS
 
 
 class Player(CircleShape):
@@ -13,31 +16,38 @@ class Player(CircleShape):
     It's a circular sprite, but also includes a rotational value.
     """
 
-    def __init__(self, position):
-        super().__init__(position, radius=PLAYER_RADIUS)
+    world_groups = ("drawable", "updateable")
+
+    def __init__(self, world, position):
+        super().__init__(world, position, radius=PLAYER_RADIUS)
 
         self.rotation = 0
         self.shot_cooldown = 0
         self.engine_running = False
+        # input source steering this ship, the installed one if None
+        self.input: controls.Controls | None = None
 
-    def draw(self, screen: pygame.Surface):
+    def draw(self, screen: pygame.Surface, alpha=1.0):
         """Override the `CircleShape.draw` method to draw the spaceship"""
         asset_name = "ship_exhaust.png" if self.engine_running else "ship.png"
-        rot_img = pygame.transform.rotate(ASSETS[asset_name], -self.rotation)
+        rot_img = ROTATIONS.rotated(asset_name, ASSETS[asset_name], -self.rotation)
         rot_img_rect = rot_img.get_rect()
         x_offset = rot_img_rect.width / 2
         y_offset = rot_img_rect.height / 2
-        x = self.position.x - x_offset
-        y = self.position.y - y_offset
-        screen.blit(rot_img, (x, y))
+        position = self.interpolated(alpha)
+        x = position.x - x_offset
+        y = position.y - y_offset
+        rect = screen.blit(rot_img, (x, y))
         if DEBUG_SHOW_HITBOX:
-            pygame.draw.polygon(
-                surface=screen,
+            draw_shape(
+                screen,
+                pygame.draw.polygon,
                 color="#FF0000",
                 points=self.triangle(),
                 width=1,
             )
             self.debug_draw_hitbox(screen)
+        return rect
 
     def triangle(self):
         """Returns the 3 points of a triangle pointing forward Accorind gto `self.rotation`"""
@@ -73,7 +83,7 @@ class Player(CircleShape):
         self.shot_cooldown -= dt
         self.engine_running = False
 
-        keys = pygame.key.get_pressed()
+        keys = self.source().get_pressed()
         if keys[pygame.K_RIGHT]:
             self.rotate(dt)
         if keys[pygame.K_LEFT]:
@@ -84,7 +94,11 @@ class Player(CircleShape):
         if keys[pygame.K_SPACE]:
             self.shoot()
 
-        self.move()
+        self.move(dt)
+
+    def source(self) -> controls.Controls:
+        """The input source steering this ship"""
+        return controls.source() if self.input is None else self.input
 
     def rotate(self, dt: float):
         """Update spaceship rotation"""
@@ -100,21 +114,19 @@ class Player(CircleShape):
                 pygame.Vector2(0, 1).rotate(self.rotation) * PLAYER_MAX_SPEED
             )
 
-    def move(self):
+    def move(self, dt: float):
         """Move the player spaceship ahead"""
-
-        # forward pointing unit-vector
-        forward = pygame.Vector2(0, 1).rotate(self.rotation)
-        self.position += self.velocity
+        self.previous_position = pygame.Vector2(self.position)
+        self.position += self.velocity * (dt * SHIP_VELOCITY_HZ)
 
     def shoot(self):
         """Spawn a new shot"""
         if self.shot_cooldown > 0:
             return
         forward = pygame.Vector2(0, 1).rotate(self.rotation)
-        shot = Shot(self.position + forward * self.radius)
+        shot = Shot(self.world, self.position + forward * self.radius)
         shot.velocity = forward * SHOT_SPEED
         self.shot_cooldown = SHOT_COOLDOWN
 
     def explode(self):
-        Explosion(self.position, self.radius * 1.5)
+        Explosion(self.world, self.position, self.radius * SHIP_EXPLOSION_SCALE)
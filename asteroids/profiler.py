@@ -0,0 +1,137 @@
+"""Module profiler measures how long the phases of each frame take.
+
+The game loops mark the end of each phase with `PROFILER.mark(phase)`, the
+main loop marks the start and end of each frame. Timings of the last
+`PROFILER_FRAMES` frames are kept in a ring buffer and shown in an overlay.
+
+While disabled, `mark()` returns right away, so the instrumentation can stay
+in place for normal play.
+"""
+
+from __future__ import annotations
+
+import time
+
+import pygame
+
+from constants import *
+from quality import QUALITY
+from render import draw_shape
+import text
+
+PHASES = (
+    "events",
+    "spawn",
+    "update",
+    "collisions",
+    "background",
+    "draw",
+    "hud",
+    "flip",
+)
+
+
+class FrameProfiler:
+    """Ring buffer of per-phase timings of the last `frames` frames"""
+
+    def __init__(self, frames: int = PROFILER_FRAMES, phases=PHASES):
+        self.enabled = False
+        self.phases = phases
+        self._index = {phase: i for i, phase in enumerate(phases)}
+        self.timings = [[0.0] * len(phases) for _ in range(frames)]
+        self.head = 0
+        self.count = 0
+        self._row = self.timings[0]
+        self._last = 0.0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.head = self.count = 0
+        self.begin_frame()
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._row = self.timings[self.head]
+        for i in range(len(self._row)):
+            self._row[i] = 0.0
+        self._last = time.perf_counter()
+
+    def mark(self, phase: str):
+        """Attribute the time since the last mark to `phase`"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._row[self._index[phase]] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.head = (self.head + 1) % len(self.timings)
+        self.count = min(self.count + 1, len(self.timings))
+
+    def frames(self) -> list[list[float]]:
+        """Timings of the recorded frames, oldest first"""
+        if self.count < len(self.timings):
+            return self.timings[: self.count]
+        return self.timings[self.head :] + self.timings[: self.head]
+
+    def averages(self) -> dict[str, float]:
+        """Average time per phase in seconds"""
+        frames = self.frames()
+        if not frames:
+            return {phase: 0.0 for phase in self.phases}
+        return {
+            phase: sum(f[i] for f in frames) / len(frames)
+            for phase, i in self._index.items()
+        }
+
+    def draw(self, screen: pygame.Surface, loop):
+        """Draw the overlay: frame-time graph, phase breakdown, entity counts"""
+        if not self.enabled:
+            return None
+
+        # frame-time graph, one bar per frame, line at the 60 FPS budget
+        graph_h = SCREEN_HEIGHT // 6
+        bottom = graph_h + PROFILER_SIZE
+        scale = graph_h / (2 * PROFILER_BUDGET)
+        for x, frame in enumerate(self.frames()):
+            h = min(sum(frame) * 1000 * scale, graph_h)
+            draw_shape(
+                screen, pygame.draw.line, PROFILER_COLOR, (x, bottom), (x, bottom - h)
+            )
+        budget_y = bottom - PROFILER_BUDGET * scale
+        draw_shape(
+            screen,
+            pygame.draw.line,
+            "#FF0000",
+            (0, budget_y),
+            (len(self.timings), budget_y),
+        )
+
+        averages = self.averages()
+        total = sum(averages.values())
+        lines = [f"frame {total * 1000:6.2f}ms"]
+        lines += [f"{p:<10} {t * 1000:6.2f}ms" for p, t in averages.items()]
+        world = getattr(loop, "world", None)
+        if world is not None:
+            lines += [
+                f"{name:<10} {len(getattr(world, name)):>6}" for name in world.GROUPS
+            ]
+        lines.append(f"quality    {QUALITY.tier:>6}")
+        spawner = getattr(loop, "spawner", None)
+        if spawner is not None:
+            lines += [
+                f"load       {spawner.load * 100:5.1f}%",
+                f"deferred   {spawner.counts['defer']:>6}",
+                f"skipped    {spawner.counts['skip_explosion']:>6}",
+            ]
+        text_rect = text.draw_lines_top_left(
+            screen, lines, y_start=bottom + PROFILER_SIZE
+        )
+        graph_rect = pygame.Rect(0, PROFILER_SIZE, len(self.timings), graph_h + 1)
+        return graph_rect.union(text_rect)
+
+
+PROFILER = FrameProfiler()
@@ -0,0 +1,138 @@
+"""Module quality lowers the render quality while frames take too long.
+
+The `QUALITY` controller watches the frame load (see `budget.py`) and moves
+through the quality tiers below, each one keeping the savings of the ones
+before:
+
+1. explosions only show every other frame of their animation, which halves
+   the scaled frames they need
+2. rotated sprites are quantized to `QUALITY_ROTATION_STEP` degrees instead
+   of `ROTATION_STEP`, which needs far fewer rotations
+3. the background is cached: only the areas drawn to get it restored, by
+   turning on dirty rendering (see `dirty.py`)
+4. at most `QUALITY_MAX_SHOTS` shots are drawn, the newest ones
+
+The quality drops a tier when the load goes above `QUALITY_DEGRADE_LOAD`,
+and comes back a tier once the load has stayed below `QUALITY_RESTORE_LOAD`
+for a while. Between both loads, the tier stays as it is. After every
+change, the tier holds for `QUALITY_HOLD_FRAMES` frames, so that the load
+window only measures the new tier. And when the quality has to drop again
+right after coming back, the wait before the next try doubles, so that the
+tier doesn't oscillate.
+
+Only the drawing changes, never the simulation.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import NamedTuple
+
+from budget import BUDGET, FrameBudget
+from constants import *
+from dirty import DIRTY
+from spritecache import ROTATIONS
+
+FULL = 0
+HALF_EXPLOSION_FRAMES = 1
+COARSE_ROTATIONS = 2
+CACHED_BACKGROUND = 3
+CAPPED_SHOTS = 4
+TIERS = (
+    "full",
+    "half explosions",
+    "coarse rotations",
+    "cached background",
+    "capped shots",
+)
+
+# maximum factor the wait before restoring the quality grows by
+_MAX_BACKOFF = 16
+
+
+class TierChange(NamedTuple):
+    """The tier changed to `tier` at `frame`, with the frame load at `load`"""
+
+    frame: int
+    tier: int
+    load: float
+
+
+class QualityController:
+    """Picks the render quality tier from the load measured by `meter`"""
+
+    def __init__(self, meter: FrameBudget = BUDGET, enabled: bool = ADAPTIVE_QUALITY):
+        self.meter = meter
+        self.enabled = enabled
+        self.tier = FULL
+        self.frame = 0
+        # frames of the last change and the last restore, and how long the
+        # load has been low
+        self.changed_at = 0
+        self.restored_at: int | None = None
+        self.headroom_frames = 0
+        self.restore_frames = QUALITY_RESTORE_FRAMES
+        self.log: deque[TierChange] = deque(maxlen=QUALITY_LOG_SIZE)
+
+    def update(self):
+        """Pick the tier for the next frame, call once per frame"""
+        self.frame += 1
+        if not self.enabled:
+            return
+        load = self.meter.load()
+        if load < QUALITY_RESTORE_LOAD:
+            self.headroom_frames += 1
+        else:
+            self.headroom_frames = 0
+        if self.frame - self.changed_at < QUALITY_HOLD_FRAMES:
+            return
+
+        if load > QUALITY_DEGRADE_LOAD and self.tier < len(TIERS) - 1:
+            if (
+                self.restored_at is not None
+                and self.frame - self.restored_at < self.restore_frames
+            ):
+                # dropping right after coming back: wait longer next time
+                self.restore_frames = min(
+                    self.restore_frames * 2, QUALITY_RESTORE_FRAMES * _MAX_BACKOFF
+                )
+            self.set_tier(self.tier + 1, load)
+        elif self.headroom_frames >= self.restore_frames:
+            if self.tier > FULL:
+                self.set_tier(self.tier - 1, load)
+                self.restored_at = self.frame
+            else:
+                # full quality with headroom to spare, stop backing off
+                self.restore_frames = QUALITY_RESTORE_FRAMES
+
+    def set_tier(self, tier: int, load: float = 0.0):
+        """Switch to `tier`, takes effect from the next frame on"""
+        self.log.append(TierChange(self.frame, tier, load))
+        self.tier = tier
+        self.changed_at = self.frame
+        self.headroom_frames = 0
+
+        if tier >= COARSE_ROTATIONS:
+            ROTATIONS.step = QUALITY_ROTATION_STEP
+        else:
+            ROTATIONS.step = ROTATION_STEP
+        cached = DIRTY_RENDERING or tier >= CACHED_BACKGROUND
+        if cached and not DIRTY.enabled:
+            DIRTY.invalidate()
+        DIRTY.enabled = cached
+
+    def explosion_step(self, step: int) -> int:
+        """The animation frame to draw for an explosion at `step`"""
+        if self.tier >= HALF_EXPLOSION_FRAMES:
+            return step - (step - 1) % 2
+        return step
+
+    def drawable(self, world):
+        """The sprites of `world` to draw"""
+        if self.tier < CAPPED_SHOTS or len(world.shots) <= QUALITY_MAX_SHOTS:
+            return world.drawable
+        hidden = set(world.shots.sprites()[:-QUALITY_MAX_SHOTS])
+        return [d for d in world.drawable if d not in hidden]
+
+
+QUALITY = QualityController()
@@ -0,0 +1,236 @@
+"""Module recorder records game sessions while they are played.
+
+The game loop must not wait for the disk, so recording is split in two:
+
+- on the game's side, `RecordingSink.append()` packs the input of a step into
+  a preallocated ring buffer, nothing else
+- a background thread takes the steps out of the buffer in batches, encodes
+  them (see `replay.InputEncoder`), optionally compresses them, and writes
+  them to the file
+
+The buffer holds `RECORDING_BUFFER_FRAMES` steps. If the writer falls that
+far behind, further steps are dropped and counted in `dropped`: memory stays
+bounded, but a recording with dropped steps can't be replayed exactly.
+"""
+
+from __future__ import annotations
+
+import os
+import os.path as path
+import struct
+import threading
+import time
+import zlib
+
+from bundle import BASE_DIR
+import controls
+from constants import *
+from replay import (
+    FLAG_ZLIB,
+    MODE_NAMES,
+    InputEncoder,
+    encode_header,
+    pack_input,
+    unpack_input,
+)
+import state
+
+RECORDING_DIR = path.join(BASE_DIR, "recordings")
+# the input of one step in the ring buffer: bits, mouse x and y
+_FRAME = struct.Struct("<Hii")
+
+
+class RecordingSink:
+    """Streams a recording to `filename` from a background thread
+
+    The writer thread wakes up once `batch` steps are buffered, every
+    `interval` seconds, and on `close()`. Appending is lock-free: only the
+    game appends and moves `_head`, only the writer moves `_tail`.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        mode: str,
+        seed: int,
+        dt: float = SIMULATION_DT,
+        compress: bool = RECORDING_COMPRESS,
+        capacity: int = RECORDING_BUFFER_FRAMES,
+        batch: int = RECORDING_BATCH_FRAMES,
+        interval: float = RECORDING_FLUSH_INTERVAL,
+    ):
+        self.filename = filename
+        self.capacity = capacity
+        self.batch = batch
+        self.interval = interval
+        self._buffer = bytearray(capacity * _FRAME.size)
+        # total number of steps appended and taken by the writer
+        self._head = 0
+        self._tail = 0
+        self.dropped = 0
+        self.written = 0
+        self._header = encode_header(mode, seed, dt, FLAG_ZLIB if compress else 0)
+        self._compressor = zlib.compressobj() if compress else None
+        self._encoder = InputEncoder()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+
+    @property
+    def frames(self) -> int:
+        """Number of steps recorded, without the dropped ones"""
+        return self._head
+
+    def append(self, bits: int, x: int, y: int):
+        """Buffer the input of one step"""
+        head = self._head
+        pending = head - self._tail
+        if pending >= self.capacity:
+            self.dropped += 1
+            return
+        offset = head % self.capacity * _FRAME.size
+        _FRAME.pack_into(self._buffer, offset, bits, x, y)
+        self._head = head + 1
+        if pending + 1 >= self.batch and not self._wake.is_set():
+            self._wake.set()
+
+    def close(self, wait: bool = True):
+        """Write the rest of the recording and close the file
+
+        Without `wait`, the writer finishes in the background."""
+        self._closed = True
+        self._wake.set()
+        if wait:
+            self._thread.join()
+
+    def done(self) -> bool:
+        """Has the recording been written completely?"""
+        return not self._thread.is_alive()
+
+    def _take(self) -> list[tuple[int, int, int]]:
+        """Take all buffered steps out of the ring buffer"""
+        head, tail = self._head, self._tail
+        size = _FRAME.size
+        start = tail % self.capacity * size
+        end = start + (head - tail) * size
+        if end <= len(self._buffer):
+            data = bytes(self._buffer[start:end])
+        else:
+            wrapped = end - len(self._buffer)
+            data = bytes(self._buffer[start:]) + bytes(self._buffer[:wrapped])
+        self._tail = head
+        return list(_FRAME.iter_unpack(data))
+
+    def _write(self, f, records: bytes):
+        if self._compressor is not None:
+            records = self._compressor.compress(records)
+        if records:
+            f.write(records)
+
+    def _run(self):
+        with open(self.filename, "wb") as f:
+            f.write(self._header)
+            while True:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                # steps appended before closing are all taken below
+                closed = self._closed
+                frames = self._take()
+                self._write(f, self._encoder.encode(frames))
+                self.written += len(frames)
+                if closed:
+                    break
+            self._write(f, self._encoder.finish())
+            if self._compressor is not None:
+                f.write(self._compressor.flush())
+
+
+class RecordingControls(controls.Controls):
+    """Input source sampling another source once per frame
+
+    The state of `source` is read in `advance()` and returned unchanged for
+    the rest of the frame, as `frame`, so that exactly the input the ships
+    saw can be recorded."""
+
+    def __init__(self, source: controls.Controls):
+        self.source = source
+        self.frame = (0, 0, 0)
+        self._keys, self._buttons = unpack_input(0)
+
+    def advance(self):
+        self.source.advance()
+        bits = pack_input(self.source.get_pressed(), self.source.mouse_pressed())
+        x, y = self.source.mouse_pos()
+        self.frame = (bits, int(x), int(y))
+        self._keys, self._buttons = unpack_input(bits)
+
+    def get_pressed(self) -> controls.KeyState:
+        return self._keys
+
+    def mouse_pressed(self) -> tuple[bool, bool, bool]:
+        return self._buttons
+
+    def mouse_pos(self) -> tuple[int, int]:
+        return self.frame[1], self.frame[2]
+
+
+class SessionRecorder:
+    """Records every game session played, e.g. in `main.main()`
+
+    Install `controls` as input source and call `record(before, after)` after
+    every `before.update()` that changed into `after`. A session starts with
+    the first update of a game state and ends when the game is over or left.
+    Updates of other states (pause, level cleared) aren't recorded, and
+    neither are updates left early because of a key event (e.g. pausing),
+    since they don't advance the game.
+
+    Finished sessions are written in the background, `close()` waits for all
+    of them.
+    """
+
+    def __init__(self, directory: str = RECORDING_DIR):
+        self.directory = directory
+        self.controls = RecordingControls(controls.source())
+        self.sink: RecordingSink | None = None
+        # sinks of finished sessions that are still being written
+        self.closing: list[RecordingSink] = []
+        self.saved: list[str] = []
+        self.dropped = 0
+
+    def record(self, before: state.Loop, after: state.Loop):
+        if type(before) in MODE_NAMES:
+            if self.sink is None:
+                self.sink = self._open(MODE_NAMES[type(before)], before.world.seed)
+            if after is before or isinstance(
+                after, (state.GameOver, state.LevelCleared)
+            ):
+                self.sink.append(*self.controls.frame)
+        if self.sink is not None and isinstance(
+            after, (state.GameOver, state.Menu, state.Quit)
+        ):
+            self.finish()
+
+    def _open(self, mode: str, seed: int) -> RecordingSink:
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        filename = path.join(self.directory, f"{mode}-{stamp}-{seed}.rec")
+        return RecordingSink(filename, mode, seed)
+
+    def finish(self):
+        """End the current session, if there is one"""
+        if self.sink is None:
+            return
+        self.sink.close(wait=False)
+        self.closing = [s for s in self.closing if not s.done()]
+        self.closing.append(self.sink)
+        self.saved.append(self.sink.filename)
+        self.dropped += self.sink.dropped
+        self.sink = None
+
+    def close(self):
+        """End the current session and wait until all sessions are written"""
+        self.finish()
+        for sink in self.closing:
+            sink.close()
+        self.closing.clear()
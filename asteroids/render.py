@@ -0,0 +1,198 @@
+"""Module render composites frames on a background thread.
+
+With `RENDER_THREAD` set, the states don't draw to the screen directly but
+to a `Canvas`, which only records what would be drawn: the surfaces and
+where they go, and calls of `pygame.draw` functions (see `draw_shape()`).
+At the end of a frame, the recording is taken as an immutable `Snapshot`
+and handed to the `RenderThread`, which composites it onto the screen while
+the next frame is simulated. Blitting releases the GIL, so this pays off
+when frames are fill-rate bound.
+
+The canvas and the render thread are double-buffered: one snapshot can be
+composited while the next one is recorded, and handing over a snapshot
+waits until the previous one is done. The display is flipped from the main
+thread, as SDL wants, right before the next snapshot is handed over. So
+frames appear one frame later than without the render thread.
+
+Sprites are resolved into surfaces (rotated, scaled) while recording, so
+the sprite caches are only ever used by the main thread. Surfaces drawn to
+the canvas must not be changed afterwards, which holds for all assets and
+cached sprites.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, NamedTuple
+
+from pygame import Rect, Surface
+
+import dirty
+from constants import *
+
+
+class _Call(NamedTuple):
+    """A recorded drawing function call, `function(screen, *args, **kwargs)`"""
+
+    function: Callable
+    args: tuple
+    kwargs: dict
+
+
+class Snapshot(NamedTuple):
+    """Everything needed to composite one frame
+
+    `commands` are blits as `(surface, dest[, area])` and `_Call`s, in
+    order. `rects` are the areas of the display to update, None for all of
+    it (see `dirty.DirtyRenderer.end_frame()`)."""
+
+    commands: tuple
+    rects: tuple[Rect, ...] | None
+
+
+def draw_shape(screen: Surface | Canvas, function: Callable, *args, **kwargs):
+    """Call the `pygame.draw` function `function` on `screen`
+
+    On a `Canvas`, the call is recorded and returns nothing."""
+    if isinstance(screen, Canvas):
+        screen.call(function, *args, **kwargs)
+        return None
+    return function(screen, *args, **kwargs)
+
+
+class Canvas:
+    """Stands in for the screen Surface, recording what is drawn to it
+
+    Implements the parts of the Surface API the game draws with. Blits
+    return the area they would have changed on the screen, as `Surface.blit`
+    does, so that dirty rendering works unchanged."""
+
+    def __init__(self, size: tuple[int, int] = (SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self._rect = Rect((0, 0), size)
+        self._commands = []
+
+    def get_size(self) -> tuple[int, int]:
+        return self._rect.size
+
+    def get_width(self) -> int:
+        return self._rect.width
+
+    def get_height(self) -> int:
+        return self._rect.height
+
+    def blit(self, source: Surface, dest, area: Rect | None = None) -> Rect:
+        if area is None:
+            self._commands.append((source, dest))
+            w, h = source.get_size()
+        else:
+            self._commands.append((source, dest, area))
+            w, h = Rect(area).clip(source.get_rect()).size
+        if isinstance(dest, Rect):
+            x, y = dest.topleft
+        else:
+            x, y = int(dest[0]), int(dest[1])
+        return Rect(x, y, w, h).clip(self._rect)
+
+    def blits(self, blit_sequence, doreturn: bool = True) -> list[Rect] | None:
+        rects = [self.blit(*args) for args in blit_sequence]
+        return rects if doreturn else None
+
+    def call(self, function: Callable, *args, **kwargs):
+        """Record the call `function(screen, *args, **kwargs)`"""
+        self._commands.append(_Call(function, args, kwargs))
+
+    def take(self, rects: list[Rect] | None = None) -> Snapshot:
+        """The snapshot of everything drawn since the last `take()`"""
+        commands, self._commands = tuple(self._commands), []
+        return Snapshot(commands, None if rects is None else tuple(rects))
+
+
+def composite(screen: Surface, snapshot: Snapshot):
+    """Draw `snapshot` onto `screen`"""
+    blits = []
+    for command in snapshot.commands:
+        if isinstance(command, _Call):
+            screen.blits(blits, doreturn=False)
+            blits = []
+            command.function(screen, *command.args, **command.kwargs)
+        else:
+            blits.append(command)
+    screen.blits(blits, doreturn=False)
+
+
+class RenderThread:
+    """Composites snapshots onto `screen` in a background thread
+
+    Draw each frame to `canvas`, then hand it over with `submit(rects)`.
+    Errors of the render thread are raised by the next `submit()`."""
+
+    def __init__(self, screen: Surface):
+        self.screen = screen
+        self.canvas = Canvas(screen.get_size())
+        # snapshot waiting to be composited, and the one being composited
+        self._pending: Snapshot | None = None
+        self._compositing: Snapshot | None = None
+        # composited snapshot that hasn't been pushed to the display yet
+        self._done: Snapshot | None = None
+        self._error: BaseException | None = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="render", daemon=True)
+        self._thread.start()
+
+    def submit(self, rects: list[Rect] | None = None):
+        """Hand the frame drawn to `canvas` over to the render thread
+
+        Waits until the previous frame is composited and pushes it to the
+        display. `rects` are the areas to update, None for the full screen."""
+        snapshot = self.canvas.take(rects)
+        with self._condition:
+            self._wait()
+            self._present()
+            self._pending = snapshot
+            self._condition.notify_all()
+
+    def close(self):
+        """Composite and display the last frame, then stop the thread"""
+        with self._condition:
+            self._wait()
+            self._present()
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _wait(self):
+        """Wait until no snapshot is pending or being composited"""
+        while self._error is None and (
+            self._pending is not None or self._compositing is not None
+        ):
+            self._condition.wait()
+        if self._error is not None:
+            raise RuntimeError("render thread failed") from self._error
+
+    def _present(self):
+        if self._done is not None:
+            dirty.present(self._done.rects)
+            self._done = None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                snapshot = self._compositing = self._pending
+                self._pending = None
+            try:
+                composite(self.screen, snapshot)
+            except BaseException as e:
+                with self._condition:
+                    self._error = e
+                    self._compositing = None
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self._done = snapshot
+                self._compositing = None
+                self._condition.notify_all()
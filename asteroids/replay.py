@@ -0,0 +1,275 @@
+"""Module replay records the input of game sessions and plays them back.
+
+A game is fully determined by the seed of its world and the input of every
+simulation step, so that is all a `Recording` holds. Played back in headless
+mode, a recording reproduces the session bit for bit, e.g. to profile a
+slowdown a player ran into.
+
+Per step, the input is the state of `RECORDED_KEYS` and the mouse buttons as
+a bit mask, and the mouse position. Layout of a recording file:
+
+- the magic bytes `RECORDING_MAGIC`
+- the header: game mode (8 bytes, zero padded), seed (unsigned 64 bit),
+  simulation step length in seconds (double) and flags (byte), little-endian
+- the records, zlib-compressed if the flags contain `FLAG_ZLIB`. One record
+  per change of the input:
+  - a flags byte: `CHANGED_BUTTONS` and/or `CHANGED_MOUSE`
+  - with `CHANGED_BUTTONS`, the new bit mask (unsigned 16 bit)
+  - with `CHANGED_MOUSE`, the change of the mouse x and y position
+    (zigzag varints)
+  - the number of steps this input is held for (varint)
+
+The input usually stays the same for many steps, so a recording takes a few
+bytes per second of play. Records are written as the game goes on, see
+`recorder.py`.
+
+Run `python replay.py FILE` to play a recording back.
+"""
+
+from __future__ import annotations
+
+import argparse
+import struct
+import time
+import zlib
+
+import pygame
+
+import controls
+from constants import *
+import headless
+import state
+
+RECORDING_MAGIC = b"ASTREC01"
+_HEADER = struct.Struct("<8sQdB")
+_BUTTONS = struct.Struct("<H")
+
+FLAG_ZLIB = 1
+
+CHANGED_BUTTONS = 1
+CHANGED_MOUSE = 2
+
+# keys the ships read, in bit order
+RECORDED_KEYS = (
+    pygame.K_LEFT,
+    pygame.K_RIGHT,
+    pygame.K_UP,
+    pygame.K_DOWN,
+    pygame.K_SPACE,
+    pygame.K_a,
+    pygame.K_d,
+    pygame.K_w,
+    pygame.K_s,
+)
+# the mouse buttons follow the keys
+_MOUSE_SHIFT = len(RECORDED_KEYS)
+
+# names of the game modes, as in `headless.MODES`
+MODE_NAMES = {
+    state.Endless: "endless",
+    state.Level: "level",
+    state.EndlessTaurus: "taurus",
+}
+
+
+def write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def pack_input(keys, buttons: tuple[bool, bool, bool]) -> int:
+    """Bit mask of the pressed `RECORDED_KEYS` and mouse buttons"""
+    bits = 0
+    for i, key in enumerate(RECORDED_KEYS):
+        if keys[key]:
+            bits |= 1 << i
+    for i, pressed in enumerate(buttons):
+        if pressed:
+            bits |= 1 << (_MOUSE_SHIFT + i)
+    return bits
+
+
+def unpack_input(bits: int) -> tuple[controls.KeyState, tuple[bool, bool, bool]]:
+    """Keyboard state and mouse buttons of a bit mask from `pack_input()`"""
+    keys = controls.KeyState(k for i, k in enumerate(RECORDED_KEYS) if bits >> i & 1)
+    buttons = tuple(bool(bits >> (_MOUSE_SHIFT + i) & 1) for i in range(3))
+    return keys, buttons
+
+
+def encode_header(mode: str, seed: int, dt: float, flags: int = 0) -> bytes:
+    return RECORDING_MAGIC + _HEADER.pack(mode.encode(), seed, dt, flags)
+
+
+class InputEncoder:
+    """Encodes the input of consecutive steps into records
+
+    The record of an input is only complete once a different input follows,
+    so the input of the last steps is held back until `finish()`."""
+
+    def __init__(self):
+        self.last = (0, 0, 0)
+        # number of steps the last input has been held for so far
+        self.run = 0
+
+    def encode(self, frames) -> bytes:
+        """Records of the `(bits, x, y)` in `frames` that are complete"""
+        out = bytearray()
+        last_bits, last_x, last_y = self.last
+        run = self.run
+        for bits, x, y in frames:
+            if run and (bits, x, y) == (last_bits, last_x, last_y):
+                run += 1
+                continue
+            if run:
+                write_varint(out, run)
+            flags = 0
+            if bits != last_bits or not run:
+                flags |= CHANGED_BUTTONS
+            if (x, y) != (last_x, last_y):
+                flags |= CHANGED_MOUSE
+            out.append(flags)
+            if flags & CHANGED_BUTTONS:
+                out += _BUTTONS.pack(bits)
+            if flags & CHANGED_MOUSE:
+                write_varint(out, zigzag(x - last_x))
+                write_varint(out, zigzag(y - last_y))
+            last_bits, last_x, last_y = bits, x, y
+            run = 1
+        self.last = (last_bits, last_x, last_y)
+        self.run = run
+        return bytes(out)
+
+    def finish(self) -> bytes:
+        """The rest of the records"""
+        out = bytearray()
+        if self.run:
+            write_varint(out, self.run)
+        self.run = 0
+        return bytes(out)
+
+
+class Recording:
+    """The input of every simulation step of one game session
+
+    `frames` holds `(bits, x, y)` per step: the bit mask from `pack_input()`
+    and the mouse position."""
+
+    def __init__(
+        self,
+        mode: str,
+        seed: int,
+        dt: float = SIMULATION_DT,
+        frames: list[tuple[int, int, int]] | None = None,
+    ):
+        self.mode = mode
+        self.seed = seed
+        self.dt = dt
+        self.frames = frames if frames is not None else []
+
+    def to_bytes(self, compress: bool = False) -> bytes:
+        encoder = InputEncoder()
+        records = encoder.encode(self.frames) + encoder.finish()
+        if compress:
+            records = zlib.compress(records)
+        flags = FLAG_ZLIB if compress else 0
+        return encode_header(self.mode, self.seed, self.dt, flags) + records
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Recording:
+        if data[: len(RECORDING_MAGIC)] != RECORDING_MAGIC:
+            raise ValueError("not an input recording")
+        offset = len(RECORDING_MAGIC)
+        mode, seed, dt, flags = _HEADER.unpack_from(data, offset)
+        offset += _HEADER.size
+        if flags & FLAG_ZLIB:
+            data = zlib.decompress(data[offset:])
+            offset = 0
+        frames = []
+        bits, x, y = 0, 0, 0
+        while offset < len(data):
+            flags = data[offset]
+            offset += 1
+            if flags & CHANGED_BUTTONS:
+                (bits,) = _BUTTONS.unpack_from(data, offset)
+                offset += _BUTTONS.size
+            if flags & CHANGED_MOUSE:
+                dx, offset = read_varint(data, offset)
+                dy, offset = read_varint(data, offset)
+                x += unzigzag(dx)
+                y += unzigzag(dy)
+            run, offset = read_varint(data, offset)
+            frames.extend([(bits, x, y)] * run)
+        return cls(mode.rstrip(b"\0").decode(), seed, dt, frames)
+
+    def save(self, filename: str, compress: bool = False):
+        with open(filename, "wb") as f:
+            f.write(self.to_bytes(compress))
+
+    @classmethod
+    def load(cls, filename: str) -> Recording:
+        with open(filename, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def replay_controls(recording: Recording) -> controls.ScriptedControls:
+    """Input source playing back the input of `recording`"""
+
+    def script(frame: int, source: controls.ScriptedControls):
+        bits, x, y = recording.frames[frame]
+        keys, buttons = unpack_input(bits)
+        source.keys = set(keys.pressed)
+        source.set_mouse(pos=(x, y), buttons=buttons)
+
+    return controls.ScriptedControls(script)
+
+
+def play(screen: pygame.Surface, recording: Recording) -> tuple[state.Loop, int]:
+    """Play `recording` back, returns the last state and the number of frames"""
+    loop = headless.MODES[recording.mode](screen, recording.seed)
+    return headless.run(
+        loop, len(recording.frames), recording.dt, replay_controls(recording)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back an input recording")
+    parser.add_argument("recording")
+    parser.add_argument("--draw", action="store_true", help="also draw each frame")
+    args = parser.parse_args()
+
+    recording = Recording.load(args.recording)
+    screen = headless.init(render=args.draw)
+
+    start = time.perf_counter()
+    loop, frames = play(screen, recording)
+    elapsed = time.perf_counter() - start
+
+    print(f"mode:   {recording.mode} (seed {recording.seed})")
+    print(f"state:  {type(loop).__name__}")
+    print(f"score:  {headless.score(loop)}")
+    print(f"frames: {frames} of {len(recording.frames)} in {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""Module server runs authoritative multiplayer games over UDP.
+
+The server runs an `Arena`, an endless game with one ship per client. The
+clients only send their input (see `netcode.py`), which steers their ship
+until the next input arrives. Every `SERVER_SNAPSHOT_INTERVAL` ticks, each
+client gets a snapshot of all entities, delta-compressed against the last
+snapshot it acknowledged.
+
+Destroyed ships come back after `SERVER_RESPAWN_TIME` seconds. Clients that
+haven't sent anything for `SERVER_CLIENT_TIMEOUT` seconds are dropped.
+
+`Server.metrics()` reports the tick times and, per client, the bandwidth
+used and the round-trip time.
+
+Run e.g. `python server.py taurus --port 9999`, and connect with
+`python client.py --port 9999`. Pass `--loss` and `--latency` to test how
+the game holds up on a bad network.
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import socket
+import statistics
+import time
+from typing import Callable
+
+import pygame
+
+from constants import *
+import controls
+import netcode
+from pipeline import Stage
+from player import Player
+from replay import unpack_input
+from spawner import SpawnScheduler
+import state
+from taurus import Taurus
+
+SERVER_PORT = 9999
+SERVER_MAX_CLIENTS = 16
+# snapshots are sent every this many ticks
+SERVER_SNAPSHOT_INTERVAL = 2
+# snapshots kept to serve as baselines
+SERVER_SNAPSHOT_HISTORY = 64
+SERVER_RESPAWN_TIME = 3.0
+SERVER_CLIENT_TIMEOUT = 5.0
+# ticks the tick time metrics are taken over
+SERVER_METRICS_TICKS = 600
+# seconds the bandwidth is averaged over
+SERVER_METRICS_WINDOW = 1.0
+
+SHIPS = {"endless": Player, "taurus": Taurus}
+
+
+def respawn_ships(arena: Arena, dt: float):
+    """Bring destroyed ships back"""
+    for ship_id in list(arena.respawns):
+        arena.respawns[ship_id] -= dt
+        if arena.respawns[ship_id] <= 0:
+            del arena.respawns[ship_id]
+            arena.spawn_ship(ship_id)
+
+
+class Arena(state.Game):
+    """Endless game with any number of ships, each steered by its own input
+
+    Asteroids spawn as in `state.Endless`, everybody scores for the team.
+    Arenas don't handle any pygame events and never end."""
+
+    stages = (
+        Stage("collect", state.collect_pools, "events"),
+        Stage("spawn", state.spawn_asteroids, "spawn"),
+        Stage("respawn", respawn_ships, "spawn"),
+        Stage("integrate", state.cull_and_move, "update"),
+        Stage("collisions", state.detect_collisions, "collisions"),
+        Stage("resolve", state.resolve_collisions, "collisions"),
+    )
+
+    def __init__(self, ship: type, seed: int | None = None):
+        super().__init__(screen=None, storage={}, seed=seed)
+        self.ship = ship
+        self.spawner = SpawnScheduler(self.world)
+        self.sources: dict[int, controls.Controls] = {}
+        # seconds until destroyed ships are back
+        self.respawns: dict[int, float] = {}
+        # network ids of the entities by their generation, see `entities()`
+        self.ids = {}
+        self.last_id = 0
+
+    def join(self, ship_id: int, source: controls.Controls):
+        """Add the ship `ship_id`, steered by `source`"""
+        self.sources[ship_id] = source
+        self.spawn_ship(ship_id)
+
+    def leave(self, ship_id: int):
+        ship = self.ships.pop(ship_id, None)
+        if ship is not None:
+            ship.kill()
+        self.sources.pop(ship_id, None)
+        self.respawns.pop(ship_id, None)
+
+    def spawn_ship(self, ship_id: int):
+        center = pygame.Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+        ship = self.ship(self.world, center)
+        ship.input = self.sources[ship_id]
+        self.ships[ship_id] = ship
+
+    def ship_lost(self, ship_id: int, explode: bool = True) -> None:
+        """Destroyed ships come back after `SERVER_RESPAWN_TIME`"""
+        ship = self.ships.pop(ship_id)
+        ship.kill()
+        if explode:
+            ship.explode()
+        self.respawns[ship_id] = SERVER_RESPAWN_TIME
+        return None
+
+    def entities(self) -> dict[int, netcode.Entity]:
+        """The quantized state of all entities, by network id
+
+        Entities get a new id when they are first seen, and keep it for as
+        long as they are in the game. Ids go by the spawn, not the sprite, so
+        that a re-used sprite is a new entity."""
+        owners = {ship: ship_id for ship_id, ship in self.ships.items()}
+        ids = {}
+        entities = {}
+        for sprite in self.world.drawable:
+            entity = netcode.quantize(sprite, owners.get(sprite, 0))
+            if entity is None:
+                continue
+            entity_id = self.ids.get(sprite.generation)
+            if entity_id is None:
+                self.last_id += 1
+                entity_id = self.last_id
+            ids[sprite.generation] = entity_id
+            entities[entity_id] = entity
+        self.ids = ids
+        return entities
+
+
+class ClientStats:
+    """Traffic and latency of one client"""
+
+    def __init__(self):
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.packets_received = 0
+        self.bytes_received = 0
+        self.full_snapshots = 0
+        self.delta_snapshots = 0
+        # inputs arriving after a newer one
+        self.late_inputs = 0
+        # exponential moving average of the round-trip time, in seconds
+        self.rtt: float | None = None
+        # (time, bytes) of the packets sent during the last window
+        self._sent = collections.deque()
+
+    def sent(self, now: float, size: int, full: bool):
+        self.packets_sent += 1
+        self.bytes_sent += size
+        if full:
+            self.full_snapshots += 1
+        else:
+            self.delta_snapshots += 1
+        self._sent.append((now, size))
+
+    def round_trip(self, rtt: float):
+        self.rtt = rtt if self.rtt is None else self.rtt * 0.9 + rtt * 0.1
+
+    def bandwidth(self, now: float) -> float:
+        """Bytes per second sent over the last `SERVER_METRICS_WINDOW`"""
+        while self._sent and self._sent[0][0] < now - SERVER_METRICS_WINDOW:
+            self._sent.popleft()
+        return sum(size for _, size in self._sent) / SERVER_METRICS_WINDOW
+
+
+class Connection:
+    """A client of the server"""
+
+    def __init__(self, ship_id: int, address, now: float):
+        self.ship_id = ship_id
+        self.address = address
+        self.controls = controls.ScriptedControls()
+        self.sequence = -1
+        # the last snapshot tick the client acknowledged
+        self.ack: int | None = None
+        self.last_seen = now
+        self.stats = ClientStats()
+
+
+class Server:
+    """Runs an `Arena` of `mode` ("endless" or "taurus") for UDP clients
+
+    `sock` is a bound UDP socket, e.g. a `netcode.LossySocket`; by default
+    one is bound to `address`. Call `tick()` at `tick_rate`, or let
+    `serve_forever()` do that."""
+
+    def __init__(
+        self,
+        mode: str = "endless",
+        address=("127.0.0.1", SERVER_PORT),
+        seed: int | None = None,
+        sock=None,
+        tick_rate: int = SIMULATION_HZ,
+        snapshot_interval: int = SERVER_SNAPSHOT_INTERVAL,
+    ):
+        self.mode = mode
+        self.arena = Arena(SHIPS[mode], seed)
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(address)
+        sock.setblocking(False)
+        self.sock = sock
+        self.address = sock.getsockname()
+        self.tick_rate = tick_rate
+        self.snapshot_interval = snapshot_interval
+        self.tick_count = 0
+        self.connections: dict[tuple, Connection] = {}
+        # the entities of the last snapshots and when they were sent, by tick
+        self.history: dict[int, tuple[dict[int, netcode.Entity], float]] = {}
+        self.tick_times = collections.deque(maxlen=SERVER_METRICS_TICKS)
+        self.running = False
+
+    def tick(self):
+        """Receive the clients' input, step the game and send snapshots"""
+        start = time.perf_counter()
+        self._receive(start)
+        self._drop_idle(start)
+        self.arena.update(1 / self.tick_rate)
+        self.tick_count += 1
+        if self.tick_count % self.snapshot_interval == 0:
+            self._send_snapshots()
+        self.tick_times.append(time.perf_counter() - start)
+
+    def serve_forever(self, on_tick: Callable[[Server], None] | None = None):
+        """Tick at `tick_rate` until `stop()` is called
+
+        `on_tick(server)` is called after every tick."""
+        self.running = True
+        period = 1 / self.tick_rate
+        next_tick = time.perf_counter()
+        while self.running:
+            self.tick()
+            if on_tick is not None:
+                on_tick(self)
+            next_tick += period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -period * MAX_SIMULATION_STEPS:
+                # fallen too far behind, don't try to catch up
+                next_tick = time.perf_counter()
+
+    def stop(self):
+        self.running = False
+
+    def _receive(self, now: float):
+        while True:
+            try:
+                data, address = self.sock.recvfrom(netcode.MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            except ConnectionResetError:
+                # an ICMP error for an earlier datagram, on Windows
+                continue
+            if not data:
+                continue
+            connection = self.connections.get(address)
+            if data[0] == netcode.HELLO:
+                if connection is None:
+                    connection = self._connect(address, now)
+                if connection is not None:
+                    self.sock.sendto(
+                        netcode.encode_welcome(
+                            connection.ship_id,
+                            self.mode,
+                            self.tick_rate,
+                            self.snapshot_interval,
+                        ),
+                        address,
+                    )
+                continue
+            if connection is None:
+                continue
+            connection.last_seen = now
+            connection.stats.packets_received += 1
+            connection.stats.bytes_received += len(data)
+            if data[0] == netcode.INPUT:
+                self._input(connection, data, now)
+            elif data[0] == netcode.BYE:
+                self._disconnect(connection)
+
+    def _connect(self, address, now: float) -> Connection | None:
+        used = {c.ship_id for c in self.connections.values()}
+        free = [i for i in range(1, SERVER_MAX_CLIENTS + 1) if i not in used]
+        if not free:
+            return None
+        connection = Connection(free[0], address, now)
+        self.connections[address] = connection
+        self.arena.join(connection.ship_id, connection.controls)
+        return connection
+
+    def _disconnect(self, connection: Connection):
+        self.arena.leave(connection.ship_id)
+        del self.connections[connection.address]
+
+    def _drop_idle(self, now: float):
+        for connection in list(self.connections.values()):
+            if now - connection.last_seen > SERVER_CLIENT_TIMEOUT:
+                self._disconnect(connection)
+
+    def _input(self, connection: Connection, data: bytes, now: float):
+        sequence, ack, bits, x, y = netcode.decode_input(data)
+        if sequence <= connection.sequence:
+            connection.stats.late_inputs += 1
+            return
+        connection.sequence = sequence
+        keys, buttons = unpack_input(bits)
+        connection.controls.keys = set(keys.pressed)
+        connection.controls.set_mouse(pos=(x, y), buttons=buttons)
+        if ack != netcode.NO_BASELINE and ack in self.history:
+            if connection.ack is None or ack > connection.ack:
+                connection.ack = ack
+                connection.stats.round_trip(now - self.history[ack][1])
+
+    def _send_snapshots(self):
+        now = time.perf_counter()
+        entities = self.arena.entities()
+        self.history[self.tick_count] = (entities, now)
+        oldest = self.tick_count - SERVER_SNAPSHOT_HISTORY * self.snapshot_interval
+        for tick in [t for t in self.history if t <= oldest]:
+            del self.history[tick]
+
+        # clients acknowledging the same snapshot get the same packet
+        packets = {}
+        for connection in self.connections.values():
+            baseline = connection.ack if connection.ack in self.history else None
+            packet = packets.get(baseline)
+            if packet is None:
+                packet = packets[baseline] = netcode.encode_snapshot(
+                    self.tick_count,
+                    baseline,
+                    self.history[baseline][0] if baseline is not None else {},
+                    entities,
+                    self.arena.score,
+                )
+            self.sock.sendto(packet, connection.address)
+            connection.stats.sent(now, len(packet), full=baseline is None)
+
+    def metrics(self) -> dict:
+        """Tick times in milliseconds and per-client traffic"""
+        now = time.perf_counter()
+        times = sorted(t * 1000 for t in self.tick_times) or [0.0]
+        clients = {}
+        for c in self.connections.values():
+            s = c.stats
+            clients[c.ship_id] = {
+                "address": f"{c.address[0]}:{c.address[1]}",
+                "bandwidth": round(s.bandwidth(now)),
+                "bytes_sent": s.bytes_sent,
+                "packets_sent": s.packets_sent,
+                "bytes_received": s.bytes_received,
+                "packets_received": s.packets_received,
+                "full_snapshots": s.full_snapshots,
+                "delta_snapshots": s.delta_snapshots,
+                "late_inputs": s.late_inputs,
+                "rtt_ms": None if s.rtt is None else round(s.rtt * 1000, 2),
+            }
+        return {
+            "tick": self.tick_count,
+            "entities": len(self.arena.ids),
+            "tick_mean_ms": round(statistics.mean(times), 4),
+            "tick_p95_ms": round(times[int(len(times) * 0.95)], 4),
+            "tick_max_ms": round(times[-1], 4),
+            "clients": clients,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a multiplayer game server")
+    parser.add_argument("mode", choices=SHIPS)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--loss", type=float, default=0.0, help="packet loss, 0-1")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    args = parser.parse_args()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((args.host, args.port))
+    if args.loss or args.latency or args.jitter:
+        sock = netcode.LossySocket(sock, args.loss, args.latency, args.jitter)
+    server = Server(args.mode, seed=args.seed, sock=sock)
+    print(f"serving {args.mode} on {args.host}:{args.port}", flush=True)
+
+    def report(server: Server):
+        if server.tick_count % (server.tick_rate * 5):
+            return
+        m = server.metrics()
+        print(
+            f"tick {m['tick']}: {len(m['clients'])} clients, "
+            f"{m['entities']} entities, tick mean {m['tick_mean_ms']}ms "
+            f"p95 {m['tick_p95_ms']}ms max {m['tick_max_ms']}ms",
+            flush=True,
+        )
+        for ship_id, c in m["clients"].items():
+            print(
+                f"  ship {ship_id} {c['address']}: {c['bandwidth']} B/s, "
+                f"rtt {c['rtt_ms']}ms, {c['full_snapshots']} full / "
+                f"{c['delta_snapshots']} delta snapshots",
+                flush=True,
+            )
+
+    try:
+        server.serve_forever(report)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
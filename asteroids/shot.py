@@ -1,51 +1,67 @@
-import random
-
 import pygame
 
 from assets import ASSETS
-from circleshape import CircleShape
+from store import StoredShape
 from constants import *
 
 
-class Shot(CircleShape):
+class Shot(StoredShape):
     """Projectiles for the normal PLasma Cannon"""
 
-    def __init__(self, position):
-        super().__init__(position, radius=SHOT_RADIUS)
-        self.kind = random.randint(1, SHOT_KINDS)
+    world_groups = ("shots", "drawable")
+    world_store = "shot_store"
+    pool_cap = SHOT_POOL_CAP
+
+    # normal shots are consumed when hitting an asteroid
+    piercing = False
+
+    def __init__(self, world, position):
+        super().__init__(world, position, radius=SHOT_RADIUS)
+        self.kind = world.random.randint(1, SHOT_KINDS)
 
-    def draw(self, screen: pygame.Surface):
+    def draw(self, screen: pygame.Surface, alpha=1.0):
         """Shots are just drawn as circles"""
         img = ASSETS[f"shot_{self.kind}.png"]
         offset = img.get_rect().height / 2
-        x = self.position.x - offset
-        y = self.position.y - offset
-        screen.blit(img, (x, y))
+        position = self.interpolated(alpha)
+        x = position.x - offset
+        y = position.y - offset
+        rect = screen.blit(img, (x, y))
 
         if DEBUG_SHOW_HITBOX:
             self.debug_draw_hitbox(screen)
+        return rect
 
     def update(self, dt: float):
         self.position += self.velocity * dt
 
 
-class Mjolnir(CircleShape):
+class Mjolnir(StoredShape):
     """Projectiles for the Mjolnir Cannon"""
 
-    def __init__(self, position):
-        super().__init__(position, radius=MJOLNIR_RADIUS)
-        self.kind = random.randint(1, MJOLNIR_KINDS)
+    world_groups = ("shots", "drawable")
+    world_store = "shot_store"
+    pool_cap = SHOT_POOL_CAP
+
+    # Mjolnir shots pass through asteroids
+    piercing = True
+
+    def __init__(self, world, position):
+        super().__init__(world, position, radius=MJOLNIR_RADIUS)
+        self.kind = world.random.randint(1, MJOLNIR_KINDS)
 
-    def draw(self, screen: pygame.Surface):
+    def draw(self, screen: pygame.Surface, alpha=1.0):
         """Shots are just drawn as circles"""
         img = ASSETS[f"mjolnir_{self.kind}.png"]
         offset = img.get_rect().height / 2
-        x = self.position.x - offset
-        y = self.position.y - offset
-        screen.blit(img, (x, y))
+        position = self.interpolated(alpha)
+        x = position.x - offset
+        y = position.y - offset
+        rect = screen.blit(img, (x, y))
 
         if DEBUG_SHOW_HITBOX:
             self.debug_draw_hitbox(screen)
+        return rect
 
     def update(self, dt: float):
         self.position += self.velocity * dt
@@ -0,0 +1,253 @@
+"""Module spawner schedules the asteroids and explosions of the endless modes.
+
+A `SpawnScheduler` plays a script of `Wave`s: each wave spawns `count`
+asteroids every `interval` seconds for `duration` seconds, then the next one
+starts, the last one lasts forever. The default script, `ENDLESS_WAVES`,
+spawns one asteroid of any size every `ASTEROID_SPAWN_COOLDOWN` seconds, as
+the endless modes always did.
+
+Asteroids are counted in units: the number of pieces they can split into,
+`2 ** (size - 1)`. Splitting keeps the units, so the number of asteroids
+alive can never go over the units, and capping the units caps the asteroids
+for good. Spawns are held back while they would go over
+`SPAWN_MAX_ASTEROIDS` units or the wave's `budget`, and while the frame
+load (see `budget.py`) is above `SPAWN_THROTTLE_LOAD`, for at most
+`SPAWN_MAX_DEFER` seconds. Held back spawns are deferred, not dropped: the
+wave waits for them. Explosions of asteroids are skipped beyond
+`SPAWN_MAX_EXPLOSIONS`, and while the load is above
+`EXPLOSION_THROTTLE_LOAD`.
+
+The caps apply to the default script as well: long or crowded games spawn
+fewer asteroids and show fewer explosions than they did before the caps.
+
+Throttling by load depends on the machine, so throttled games can't be
+replayed. Recordings turn it off with `SpawnScheduler.set_adaptive(False)`.
+
+Every decision is logged to `log` as a `Decision`, and counted in `counts`.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, deque
+from typing import NamedTuple
+
+import numpy as np
+
+from asteroid import Asteroid
+from budget import BUDGET, FrameBudget
+from constants import *
+
+# decisions
+SPAWN = "spawn"
+DEFER = "defer"
+SKIP_EXPLOSION = "skip_explosion"
+NEXT_WAVE = "next_wave"
+THROTTLE_SPAWNS = "throttle_spawns"
+RESUME_SPAWNS = "resume_spawns"
+THROTTLE_EXPLOSIONS = "throttle_explosions"
+RESUME_EXPLOSIONS = "resume_explosions"
+
+# reasons
+CAP = "cap"
+WAVE_BUDGET = "wave_budget"
+LOAD = "load"
+# spawned although throttled, because it was deferred for too long
+OVERDUE = "overdue"
+
+# throttling stops once the load is this far below where it started
+THROTTLE_HYSTERESIS = 0.1
+
+
+class Wave(NamedTuple):
+    """A phase of the spawn script
+
+    `sizes` are the sizes to draw from, all sizes by default. `duration` is
+    None for a wave lasting forever. `budget` caps the asteroid units during
+    the wave, below `SPAWN_MAX_ASTEROIDS`."""
+
+    interval: float
+    count: int = 1
+    sizes: tuple[int, ...] | None = None
+    duration: float | None = None
+    budget: int | None = None
+
+
+ENDLESS_WAVES = (Wave(ASTEROID_SPAWN_COOLDOWN),)
+
+
+class Decision(NamedTuple):
+    """A decision taken `time` seconds into the game
+
+    `value` is the asteroid size for spawns, the wave index for new waves,
+    and the frame load for everything else."""
+
+    time: float
+    action: str
+    reason: str | None
+    value: float
+
+
+def units(size: int) -> int:
+    """Number of pieces an asteroid of `size` can split into"""
+    return 1 << (size - 1)
+
+
+def asteroid_units(world) -> int:
+    """Units of all asteroids in `world`"""
+    store = world.asteroid_store
+    sizes = store.size[store.live_slots()].astype(np.int64)
+    return int(np.left_shift(1, sizes - 1).sum())
+
+
+class SpawnScheduler:
+    """Spawns the asteroids of `world` by the script `waves`
+
+    `meter` measures the frame load, by default the main loop's `BUDGET`."""
+
+    adaptive = True
+
+    @classmethod
+    def set_adaptive(cls, adaptive: bool):
+        """Enable or disable throttling by frame load for all schedulers"""
+        SpawnScheduler.adaptive = adaptive
+
+    def __init__(
+        self,
+        world,
+        waves: tuple[Wave, ...] = ENDLESS_WAVES,
+        meter: FrameBudget = BUDGET,
+    ):
+        self.world = world
+        self.waves = waves
+        self.meter = meter
+        self.time = 0.0
+        self.wave = 0
+        self.wave_time = 0.0
+        self.cooldown = 0.0
+        # sizes of the asteroids due, but not spawned yet
+        self.pending: list[int] = []
+        # why the pending asteroids are held back, and for how long
+        self.deferred: str | None = None
+        self.deferred_time = 0.0
+        self.load = 0.0
+        self.spawns_throttled = False
+        self.explosions_throttled = False
+        self.log: deque[Decision] = deque(maxlen=SPAWN_LOG_SIZE)
+        self.counts: Counter[str] = Counter()
+
+    def _decide(
+        self, action: str, reason: str | None = None, value: float | None = None
+    ):
+        if value is None:
+            value = self.load
+        self.log.append(Decision(self.time, action, reason, value))
+        self.counts[action] += 1
+
+    def _throttle(self):
+        """Throttle or resume spawns and explosions by the frame load"""
+        self.load = self.meter.load() if self.adaptive else 0.0
+        for attribute, threshold, throttle, resume in (
+            ("spawns_throttled", SPAWN_THROTTLE_LOAD, THROTTLE_SPAWNS, RESUME_SPAWNS),
+            (
+                "explosions_throttled",
+                EXPLOSION_THROTTLE_LOAD,
+                THROTTLE_EXPLOSIONS,
+                RESUME_EXPLOSIONS,
+            ),
+        ):
+            throttled = getattr(self, attribute)
+            if not throttled and self.load >= threshold:
+                setattr(self, attribute, True)
+                self._decide(throttle, LOAD)
+            elif throttled and self.load < threshold - THROTTLE_HYSTERESIS:
+                setattr(self, attribute, False)
+                self._decide(resume, LOAD)
+
+    def update(self, dt: float):
+        """Advance the script by `dt` seconds and spawn what is due"""
+        self.time += dt
+        self._throttle()
+
+        wave = self.waves[self.wave]
+        self.wave_time += dt
+        if (
+            wave.duration is not None
+            and self.wave_time >= wave.duration
+            and self.wave < len(self.waves) - 1
+        ):
+            self.wave += 1
+            self.wave_time = 0.0
+            wave = self.waves[self.wave]
+            self.cooldown = min(self.cooldown, wave.interval)
+            self._decide(NEXT_WAVE, value=self.wave)
+
+        # the wave waits while spawns are deferred
+        if not self.pending:
+            self.cooldown -= dt
+            if self.cooldown <= 0:
+                rng = self.world.random
+                for _ in range(wave.count):
+                    if wave.sizes is None:
+                        self.pending.append(rng.randint(1, ASTEROID_SIZES))
+                    else:
+                        self.pending.append(rng.choice(wave.sizes))
+                self.cooldown = wave.interval
+        if self.pending:
+            self._spawn_pending(wave, dt)
+
+    def _hold(self, size: int, alive: int, wave: Wave) -> str | None:
+        """Why an asteroid of `size` can't spawn now, None if it can"""
+        if alive + units(size) > SPAWN_MAX_ASTEROIDS:
+            return CAP
+        if wave.budget is not None and alive + units(size) > wave.budget:
+            return WAVE_BUDGET
+        if self.spawns_throttled and self.deferred_time < SPAWN_MAX_DEFER:
+            return LOAD
+        return None
+
+    def _spawn_pending(self, wave: Wave, dt: float):
+        alive = asteroid_units(self.world)
+        while self.pending:
+            size = self.pending[0]
+            reason = self._hold(size, alive, wave)
+            if reason is not None:
+                if reason != self.deferred:
+                    self._decide(DEFER, reason, size)
+                self.deferred = reason
+                self.deferred_time += dt
+                return
+            overdue = self.spawns_throttled
+            Asteroid.spawn(self.world, size=size)
+            self._decide(SPAWN, OVERDUE if overdue else None, size)
+            alive += units(size)
+            self.pending.pop(0)
+            self.deferred = None
+            self.deferred_time = 0.0
+
+    def explode(self, sprite) -> bool:
+        """Let `sprite` explode, unless explosions are capped or throttled
+
+        Returns if it exploded."""
+        if len(self.world.explosions) >= SPAWN_MAX_EXPLOSIONS:
+            reason = CAP
+        elif self.explosions_throttled:
+            reason = LOAD
+        else:
+            sprite.explode()
+            return True
+        self._decide(SKIP_EXPLOSION, reason)
+        return False
+
+    def stats(self) -> dict:
+        """The current state of the scheduler and its decision counts"""
+        return {
+            "time": self.time,
+            "wave": self.wave,
+            "load": self.load,
+            "pending": len(self.pending),
+            "deferred": self.deferred,
+            "spawns_throttled": self.spawns_throttled,
+            "explosions_throttled": self.explosions_throttled,
+            "asteroid_units": asteroid_units(self.world),
+            "counts": dict(self.counts),
+        }
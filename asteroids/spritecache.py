@@ -0,0 +1,99 @@
+"""Module spritecache contains caches for transformed sprites.
+
+Transforming a surface allocates a new one every time, which is expensive to
+do for every sprite on every frame. The caches here keep the results around,
+evicting the least recently used ones once they are full.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Hashable
+
+import pygame
+
+from constants import *
+
+
+class LRUCache:
+    """A mapping of limited size that evicts the least recently used items
+
+    Counts `hits` and `misses`, so the hit-rate can be checked."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable):
+        """Return the item of `key` or None"""
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return item
+
+    def put(self, key: Hashable, item):
+        self._items[key] = item
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+        self.hits = self.misses = 0
+
+
+class RotationCache(LRUCache):
+    """Cache of rotated sprites
+
+    Angles are quantized to multiples of `step` degrees, so at most
+    `360 / step` rotations per sprite exist. Sprites are identified by a key,
+    usually their asset name."""
+
+    def __init__(
+        self, step: float = ROTATION_STEP, max_size: int = ROTATION_CACHE_SIZE
+    ):
+        super().__init__(max_size)
+        self.step = step
+
+    def quantize(self, angle: float) -> float:
+        return round(angle / self.step) * self.step % 360
+
+    def rotated(self, key: Hashable, surface: pygame.Surface, angle: float):
+        """Return `surface` rotated counterclockwise by `angle` degrees"""
+        cache_key = (key, self.quantize(angle))
+        rotated = self.get(cache_key)
+        if rotated is None:
+            rotated = pygame.transform.rotate(surface, cache_key[1])
+            self.put(cache_key, rotated)
+        return rotated
+
+    def warm(self, key: Hashable, surface: pygame.Surface):
+        """Build all rotations of `surface` up front"""
+        steps = round(360 / self.step)
+        for i in range(steps):
+            self.rotated(key, surface, i * self.step)
+
+
+class ScaleCache(LRUCache):
+    """Cache of scaled sprites, identified by a key and the target size"""
+
+    def scaled(self, key: Hashable, surface: pygame.Surface, size: tuple):
+        """Return `surface` scaled to `size`"""
+        cache_key = (key, size)
+        scaled = self.get(cache_key)
+        if scaled is None:
+            scaled = pygame.transform.scale(surface, size)
+            self.put(cache_key, scaled)
+        return scaled
+
+
+ROTATIONS = RotationCache()
+SCALES = ScaleCache(EXPLOSION_CACHE_SIZE)
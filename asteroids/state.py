@@ -9,27 +9,68 @@ from pygame import Surface
 from pygame.sprite import Group
 
 from assets import ASSETS
+import collision
 from asteroid import Asteroid
+from circleshape import CircleShape
 from constants import *
+from dirty import DIRTY
+from pipeline import Pipeline, Stage
 from player import Player
+from profiler import PROFILER
+from quality import QUALITY
+from spawner import SpawnScheduler
 from taurus import Taurus
 import text
-from shot import Mjolnir, Shot
+from world import World
 from explosion import Explosion
 
 
 class Loop:
-    """A game loop or state"""
+    """A game loop or state
+
+    A state is advanced by `update(dt)`, which runs one simulation step, and
+    drawn by `draw(alpha)`. Both are separate so that the simulation can run
+    at a fixed rate while the rendering runs at its own (see `main.py`).
+
+    If `render` is False, states skip all drawing and only run the simulation,
+    e.g. for headless runs."""
+
+    render = True
+
+    @classmethod
+    def set_render(cls, render: bool):
+        """Enable or disable drawing for all states"""
+        Loop.render = render
 
     def __init__(self, screen: Surface, storage: dict):
         self.screen = screen
         self.storage = storage
 
+    def warm_explosions(self):
+        """Scale the explosion frames of all asteroids and `self.player` up front"""
+        if not self.render:
+            return
+        radii = [ASTEROID_MIN_RADIUS * size for size in range(1, ASTEROID_SIZES + 1)]
+        Explosion.warm(radii + [self.player.radius * SHIP_EXPLOSION_SCALE])
+
+    def update(self, dt: float) -> Loop:
+        """Subclasses have to override this.
+
+        Update returns the state that should be changed into"""
+        raise NotImplementedError("Loops must implement `update()`")
+
+    def draw(self, alpha: float = 1.0):
+        """Draw the state, `alpha` of the way between the last two updates"""
+        pass
+
     def step(self, dt: float) -> Loop:
-        """Subclasse have to override this.
+        """Update the state and draw it, unless it changed into another one
 
         Step returns the state that should be changed into"""
-        raise NotImplementedError("Loops must implement `step()`")
+        next_state = self.update(dt)
+        if next_state is self and self.render:
+            self.draw()
+        return next_state
 
 
 class Menu(Loop):
@@ -39,7 +80,7 @@ class Menu(Loop):
         super().__init__(screen, storage)
         self.score = storage.get("score", 0)
 
-    def step(self, dt: float) -> Loop:
+    def update(self, dt: float) -> Loop:
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -54,17 +95,20 @@ class Menu(Loop):
                 if event.key == pygame.K_t:
                     return EndlessTaurus(self.screen, {})
 
+        return self
+
+    def draw(self, alpha: float = 1.0):
         # redraw background
-        self.screen.blit(ASSETS["bkgrd.jpg"], (0, 0))
+        DIRTY.draw_background(self.screen, ASSETS["bkgrd.jpg"])
 
         # draw title logo
         logo = ASSETS["logo_400.png"]
         x = SCREEN_WIDTH / 2 - logo.get_width() / 2
         y = SCREEN_HEIGHT / 4 - logo.get_height() / 2 + 20
-        self.screen.blit(logo, (x, y))
+        DIRTY.add(self.screen.blit(logo, (x, y)))
 
         # draw menu
-        text.draw_lines_mid(
+        rect = text.draw_lines_mid(
             self.screen,
             lines=[
                 "-GAME MODE-",
@@ -74,7 +118,7 @@ class Menu(Loop):
             ],
             y_start=SCREEN_HEIGHT / 5 * 3,
         )
-        return self
+        DIRTY.add(rect)
 
 
 class GameOver(Loop):
@@ -88,7 +132,7 @@ class GameOver(Loop):
         self.score = storage.get("score", 0)
         self.groups = groups
 
-    def step(self, dt: float) -> Loop:
+    def update(self, dt: float) -> Loop:
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -97,25 +141,28 @@ class GameOver(Loop):
                 if event.key == pygame.K_q:
                     return Menu(self.screen, storage={})
 
+        for entity in chain(*self.groups):
+            entity.update(dt)
+
+        return self
+
+    def draw(self, alpha: float = 1.0):
         # redraw background
-        self.screen.blit(ASSETS["bkgrd.jpg"], (0, 0))
+        DIRTY.draw_background(self.screen, ASSETS["bkgrd.jpg"])
 
         # draw groups
         for entity in chain(*self.groups):
-            entity.update(dt)
-        for entity in chain(*self.groups):
-            entity.draw(self.screen)
+            DIRTY.add(entity.draw(self.screen))
 
         # draw text
-        text.draw_lines_mid(
+        rect = text.draw_lines_mid(
             self.screen,
             lines=[
                 "-- GAME OVER --",
                 f"SCORE: {self.score}",
             ],
         )
-
-        return self
+        DIRTY.add(rect)
 
 
 class Quit(Loop):
@@ -134,7 +181,7 @@ class Pause(Loop):
         super().__init__(screen, storage)
         self.previous_state = previous_state
 
-    def step(self, dt: float) -> Loop:
+    def update(self, dt: float) -> Loop:
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -145,14 +192,18 @@ class Pause(Loop):
                 if event.key == pygame.K_p:
                     return self.previous_state
 
-        # draw text
-        text.draw_lines_mid(self.screen, lines=["-- GAME PAUSED --"])
-
         return self
 
+    def draw(self, alpha: float = 1.0):
+        # draw text over the frozen game
+        rect = text.draw_lines_mid(self.screen, lines=["-- GAME PAUSED --"])
+        DIRTY.add(rect)
+
 
 class LevelCleared(Loop):
-    """Level Clear Screen"""
+    """Level Clear Screen
+
+    The next level is played with `seed`."""
 
     def __init__(
         self,
@@ -160,12 +211,14 @@ class LevelCleared(Loop):
         storage: dict,
         level: int,
         groups: list[pygame.sprite.Group],
+        seed: int | None = None,
     ):
         super().__init__(screen, storage)
         self.level = level
         self.groups = groups
+        self.seed = seed
 
-    def step(self, dt: float) -> Loop:
+    def update(self, dt: float) -> Loop:
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -174,340 +227,312 @@ class LevelCleared(Loop):
                 if event.key == pygame.K_q:
                     return Menu(self.screen, storage={})
                 if event.key == pygame.K_n:
-                    return Level(self.screen, self.storage, self.level + 1)
+                    return Level(
+                        self.screen, self.storage, self.level + 1, seed=self.seed
+                    )
+
+        for entity in chain(*self.groups):
+            entity.update(dt)
+
+        return self
 
+    def draw(self, alpha: float = 1.0):
         # redraw background
-        self.screen.blit(ASSETS["bkgrd.jpg"], (0, 0))
+        DIRTY.draw_background(self.screen, ASSETS["bkgrd.jpg"])
 
         # draw groups
         for entity in chain(*self.groups):
-            entity.update(dt)
-        for entity in chain(*self.groups):
-            entity.draw(self.screen)
+            DIRTY.add(entity.draw(self.screen))
 
         # draw text
-        text.draw_lines_mid(
+        rect = text.draw_lines_mid(
             self.screen,
             lines=[f"-- LEVEL {self.level} cleared --", "Press N to continue"],
         )
+        DIRTY.add(rect)
 
-        return self
 
+# systems the games are made of, run as the stages of a `pipeline.Pipeline`:
+# `system(game, dt)` returns the state to change into, or None to go on
 
-class Level(Loop):
-    """Level Based Game
 
-    A set number of asteroids spawn at once. Objects going over the edge of the
-    screen re-appear on the other side (except for shots)"""
+def collect_pools(game: Game, dt: float):
+    """Entities killed during the last frame can be re-used from now on"""
+    game.world.collect_pools()
 
-    def __init__(self, screen, storage: dict, level):
-        super().__init__(screen, storage)
 
-        self.level = level
+def handle_input(game: Game, dt: float) -> Loop | None:
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            return Quit(game.screen, storage={})
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_q:
+                return Menu(game.screen, storage={})
+            if event.key == pygame.K_p:
+                return Pause(game.screen, game.storage, game)
+            if event.key == pygame.K_F3:
+                PROFILER.toggle()
+    return None
 
-        # setup groups
-        self.drawable = pygame.sprite.Group()
-        self.updateable = pygame.sprite.Group()
-        self.asteroids = pygame.sprite.Group()
-        self.shots = pygame.sprite.Group()
 
-        # Set default groups for classes
-        Player.set_default_groups(self.drawable, self.updateable)
-        Asteroid.set_default_groups(self.asteroids, self.updateable, self.drawable)
-        Shot.set_default_groups(self.shots, self.updateable, self.drawable)
-        Explosion.set_default_groups(self.drawable, self.updateable)
+def spawn_asteroids(game: Game, dt: float):
+    game.spawner.update(dt)
 
-        # spawn player
-        self.player = Player(pygame.Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2))
-
-        # spawn asteroids
-        for _ in range(self.level * 2):
-            Asteroid.spawn(size=ASTEROID_SIZES)
 
-        # score tracker
-        self.score = self.storage.get("score", 0)
+def wrap_and_move(game: Game, dt: float):
+    """Run the updates and move everything, wrapping objects around the
+    screen edges (except for shots)"""
+    # entities spawned during the updates only move from the next frame on
+    asteroid_slots, shot_slots = game.world.live_slots()
 
-    def step(self, dt: float) -> Loop:
-        """A single step in this game loop"""
+    for u in game.world.updateable:
+        if u.position.x - u.radius > SCREEN_WIDTH:
+            u.position.x = -u.radius
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return Quit(self.screen, storage={})
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_q:
-                    return Menu(self.screen, storage={})
-                if event.key == pygame.K_p:
-                    return Pause(self.screen, self.storage, self)
+        if u.position.x < -u.radius:
+            u.position.x = SCREEN_WIDTH + u.radius
 
-        # redraw background
-        self.screen.blit(ASSETS["bkgrd.jpg"], (0, 0))
-
-        # run updates and remove out-of-screen objects
-        for u in self.updateable:
-
-            # shots don't wrap around
-            if isinstance(u, Shot) and (
-                u.position.x > SCREEN_WIDTH
-                or u.position.x < 0
-                or u.position.y > SCREEN_HEIGHT
-                or u.position.y < 0
-            ):
-                u.kill()
-                continue
+        if u.position.y - u.radius > SCREEN_HEIGHT:
+            u.position.y = -u.radius
 
-            if u.position.x - u.radius > SCREEN_WIDTH:
-                u.position.x = -u.radius
+        if u.position.y < -u.radius:
+            u.position.y = SCREEN_HEIGHT + u.radius
 
-            if u.position.x < -u.radius:
-                u.position.x = SCREEN_WIDTH + u.radius
+        u.update(dt)
 
-            if u.position.y - u.radius > SCREEN_HEIGHT:
-                u.position.y = -u.radius
+    # asteroids wrap around, shots don't, both move in a single pass
+    game.world.wrap_and_move(dt, asteroid_slots, shot_slots)
 
-            if u.position.y < -u.radius:
-                u.position.y = SCREEN_HEIGHT + u.radius
 
-            u.update(dt)
+def cull_and_move(game: Game, dt: float) -> Loop | None:
+    """Run the updates and move everything, removing out-of-screen objects"""
+    # entities spawned during the updates only move from the next frame on
+    asteroid_slots, shot_slots = game.world.live_slots()
 
-        # determine if asteroids hit player
-        for a in self.asteroids:
-            if a.collides_with(self.player):
-                self.storage["score"] = self.score
-                self.player.kill()
-                self.player.explode()
+    owners = {ship: ship_id for ship_id, ship in game.ships.items()}
+    for u in game.world.updateable:
+        if (
+            u.position.x - u.radius > SCREEN_WIDTH
+            or u.position.x < -u.radius
+            or u.position.y - u.radius > SCREEN_HEIGHT
+            or u.position.y < -u.radius
+        ):
+            # ships crash into the void
+            if u in owners:
+                next_state = game.ship_lost(owners[u], explode=False)
+                if next_state is not None:
+                    return next_state
+            else:
+                u.kill()
+            continue
+        u.update(dt)
+
+    # asteroids and shots are culled and moved in a single pass
+    game.world.cull_and_move(dt, asteroid_slots, shot_slots)
+    return None
+
+
+def detect_collisions(game: Game, dt: float):
+    """Find the shots hitting asteroids and the asteroids hitting ships, in
+    the order it happened during the step, ships first on a tie"""
+    asteroids = game.world.asteroids.sprites()
+    hits = collision.shot_impacts(asteroids, game.world.shots.sprites())
+    crashes = collision.ship_impacts(
+        list(game.ships.values()), asteroids, collision.hit_times(hits)
+    )
+    # as (time, 0 for crashes and 1 for hits, asteroid, ship id or shot)
+    impacts = [(t, 1, a, s) for t, a, s in hits]
+    for ship_id, crash in zip(game.ships, crashes):
+        if crash is not None:
+            impacts.append((crash[0], 0, crash[1], ship_id))
+    impacts.sort(key=lambda impact: impact[:2])
+    game.impacts = impacts
+
+
+def resolve_collisions(game: Game, dt: float) -> Loop | None:
+    """Destroy the ships and split the asteroids that were hit, in order"""
+    for _, is_hit, a, other in game.impacts:
+        if not is_hit:
+            next_state = game.ship_lost(other)
+            # the asteroid may have hit another ship already
+            if a.alive():
                 a.kill()
                 a.split()
-                a.explode()
-                return GameOver(
-                    self.screen, storage=self.storage, groups=[self.updateable]
-                )
-
-        # determine if shots hit asteroids
-        for a in self.asteroids:
-            for s in self.shots:
-                if a.collides_with(s):
-                    s.kill()
-                    a.split()
-                    a.explode()
-                    self.score += 1
-                    break
-
-        # check if level complete
-        if len(self.asteroids) == 0:
-            self.storage["score"] = self.score
-            return LevelCleared(
-                self.screen,
-                storage=self.storage,
-                level=self.level,
-                groups=[self.updateable],
-            )
-
-        # draw sprites
-        for d in self.drawable:
-            d.draw(self.screen)
-
-        # draw scoreboard
-        text.draw_bottom_right(self.screen, f"SCORE: {self.score}")
+                game.explode(a)
+            if next_state is not None:
+                return next_state
+        elif a.alive():
+            if not other.piercing:
+                other.kill()
+            a.split()
+            game.explode(a)
+            game.score += 1
+    return None
+
+
+def check_level_cleared(game: Level, dt: float) -> Loop | None:
+    if len(game.world.asteroids) == 0:
+        game.storage["score"] = game.score
+        return LevelCleared(
+            game.screen,
+            storage=game.storage,
+            level=game.level,
+            groups=game.world.moving_groups(),
+            seed=game.world.random.getrandbits(32),
+        )
+    return None
 
-        return self
 
+def draw_background(game: Game, alpha: float):
+    DIRTY.draw_background(game.screen, ASSETS["bkgrd.jpg"])
 
-class Endless(Loop):
-    """Endless game. Asteroids spawn continuously from the edges."""
 
-    def __init__(self, screen, storage: dict):
+def draw_sprites(game: Game, alpha: float):
+    for d in QUALITY.drawable(game.world):
+        DIRTY.add(d.draw(game.screen, alpha))
+
+
+def draw_score(game: Game, alpha: float):
+    DIRTY.add(text.draw_bottom_right(game.screen, f"SCORE: {game.score}"))
+
+
+class Game(Loop):
+    """A game being played, made of the systems in `stages`
+
+    Every game runs its own `pipeline` of the stages, so that the stages of
+    a single game can be reordered, swapped or skipped (see `pipeline.py`).
+    The systems work on all `ships` in the game, and leave what happens to a
+    crashed ship to `ship_lost()`.
+
+    With a `seed`, the game is reproducible (see `world.World`)."""
+
+    stages: tuple[Stage, ...] = ()
+
+    def __init__(self, screen, storage: dict, seed: int | None = None):
         super().__init__(screen, storage)
 
-        # setup groups
-        self.drawable = pygame.sprite.Group()
-        self.updateable = pygame.sprite.Group()
-        self.asteroids = pygame.sprite.Group()
-        self.shots = pygame.sprite.Group()
+        # the world holding all entities of this game
+        self.world = World(seed)
 
-        # Set default groups for classes
-        Player.set_default_groups(self.drawable, self.updateable)
-        Asteroid.set_default_groups(self.asteroids, self.updateable, self.drawable)
-        Shot.set_default_groups(self.shots, self.updateable, self.drawable)
-        Explosion.set_default_groups(self.drawable, self.updateable)
+        # asteroid spawns and explosions, none for a fixed set of asteroids
+        self.spawner: SpawnScheduler | None = None
 
-        self.asteroid_cooldown = 0
+        # the ships in the game by id, see `ship_lost`
+        self.ships: dict[int, CircleShape] = {}
 
-        # instanciate player
-        self.player = Player(pygame.Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2))
+        # collisions of the current step, see `detect_collisions`
+        self.impacts = []
 
         # score tracker
         self.score = 0
 
-    def step(self, dt: float) -> Loop:
-        """A single step in this game loop"""
+        self.pipeline = Pipeline(self.stages)
+
+    def explode(self, asteroid: Asteroid):
+        """Let `asteroid` explode, as far as the spawner allows"""
+        if self.spawner is None:
+            asteroid.explode()
+        else:
+            self.spawner.explode(asteroid)
+
+    def ship_lost(self, ship_id: int, explode: bool = True) -> Loop | None:
+        """The ship `ship_id` crashed, into the void unless it should `explode`
+
+        Returns the state to change into, by default the game is over."""
+        ship = self.ships[ship_id]
+        self.storage["score"] = self.score
+        ship.kill()
+        if explode:
+            ship.explode()
+        return GameOver(
+            self.screen,
+            storage=self.storage,
+            groups=self.world.moving_groups(),
+        )
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return Quit(self.screen, storage={})
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_q:
-                    return Menu(self.screen, storage={})
-                if event.key == pygame.K_p:
-                    return Pause(self.screen, self.storage, self)
+    def update(self, dt: float) -> Loop:
+        """A single simulation step in this game loop"""
+        # collisions are found anew in every step
+        self.impacts = []
+        return self.pipeline.update(self, dt)
 
-        # redraw background
-        self.screen.blit(ASSETS["bkgrd.jpg"], (0, 0))
+    def draw(self, alpha: float = 1.0):
+        self.pipeline.draw(self, alpha)
 
-        # spawn asteroids
-        self.asteroid_cooldown -= dt
-        if self.asteroid_cooldown <= 0:
-            Asteroid.spawn()
-            self.asteroid_cooldown = ASTEROID_SPAWN_COOLDOWN
-
-        # run updates and remove out-of-screen objects
-        for u in self.updateable:
-            if (
-                u.position.x - u.radius > SCREEN_WIDTH
-                or u.position.x < -u.radius
-                or u.position.y - u.radius > SCREEN_HEIGHT
-                or u.position.y < -u.radius
-            ):
-                # detect ship crashing into the void
-                if u is self.player:
-                    self.storage["score"] = self.score
-                    self.player.kill()
-                    return GameOver(
-                        self.screen, storage=self.storage, groups=[self.updateable]
-                    )
-                u.kill()
-                continue
-            u.update(dt)
-
-        # determine if asteroids hit player
-        for a in self.asteroids:
-            if a.collides_with(self.player):
-                self.storage["score"] = self.score
-                self.player.kill()
-                self.player.explode()
-                a.kill()
-                a.split()
-                a.explode()
-                return GameOver(
-                    self.screen, storage=self.storage, groups=[self.updateable]
-                )
-
-        # determine if shots hit asteroids
-        for a in self.asteroids:
-            for s in self.shots:
-                if a.collides_with(s):
-                    s.kill()
-                    a.split()
-                    a.explode()
-                    self.score += 1
-                    break
-
-        # draw sprites
-        for d in self.drawable:
-            d.draw(self.screen)
-
-        # draw scoreboard
-        text.draw_bottom_right(self.screen, f"SCORE: {self.score}")
 
-        return self
+class Level(Game):
+    """Level Based Game
 
+    A set number of asteroids spawn at once. Objects going over the edge of the
+    screen re-appear on the other side (except for shots)
 
-class EndlessTaurus(Loop):
-    """Endless game but using the Taurus mobile defense platform"""
+    With a `seed`, the game is reproducible (see `world.World`)."""
 
-    def __init__(self, screen, storage: dict):
-        super().__init__(screen, storage)
+    stages = (
+        Stage("collect", collect_pools, "events"),
+        Stage("input", handle_input, "events"),
+        Stage("integrate", wrap_and_move, "update"),
+        Stage("collisions", detect_collisions, "collisions"),
+        Stage("resolve", resolve_collisions, "collisions"),
+        Stage("level_cleared", check_level_cleared, "collisions"),
+        Stage("background", draw_background, "background", draw=True),
+        Stage("sprites", draw_sprites, "draw", draw=True),
+        Stage("hud", draw_score, "hud", draw=True),
+    )
+
+    def __init__(self, screen, storage: dict, level, seed: int | None = None):
+        super().__init__(screen, storage, seed)
 
-        # setup groups
-        self.drawable = pygame.sprite.Group()
-        self.updateable = pygame.sprite.Group()
-        self.asteroids = pygame.sprite.Group()
-        self.shots = pygame.sprite.Group()
+        self.level = level
 
-        # Set default groups for classes
-        Taurus.set_default_groups(self.drawable, self.updateable)
-        Asteroid.set_default_groups(self.asteroids, self.updateable, self.drawable)
-        Shot.set_default_groups(self.shots, self.updateable, self.drawable)
-        Mjolnir.set_default_groups(self.shots, self.updateable, self.drawable)
-        Explosion.set_default_groups(self.drawable, self.updateable)
+        # spawn player
+        center = pygame.Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+        self.player = Player(self.world, center)
+        self.ships[0] = self.player
+        self.warm_explosions()
 
-        self.asteroid_cooldown = 0
+        # spawn asteroids
+        for _ in range(self.level * 2):
+            Asteroid.spawn(self.world, size=ASTEROID_SIZES)
 
-        # instanciate player
-        self.player = Taurus(pygame.Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2))
+        self.score = self.storage.get("score", 0)
 
-        # score tracker
-        self.score = 0
 
-    def step(self, dt: float) -> Loop:
-        """A single step in this game loop"""
+class Endless(Game):
+    """Endless game. Asteroids spawn continuously from the edges.
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return Quit(self.screen, storage={})
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_q:
-                    return Menu(self.screen, storage={})
-                if event.key == pygame.K_p:
-                    return Pause(self.screen, self.storage, self)
+    With a `seed`, the game is reproducible (see `world.World`)."""
 
-        # redraw background
-        self.screen.blit(ASSETS["bkgrd.jpg"], (0, 0))
+    stages = (
+        Stage("collect", collect_pools, "events"),
+        Stage("input", handle_input, "events"),
+        Stage("spawn", spawn_asteroids, "spawn"),
+        Stage("integrate", cull_and_move, "update"),
+        Stage("collisions", detect_collisions, "collisions"),
+        Stage("resolve", resolve_collisions, "collisions"),
+        Stage("background", draw_background, "background", draw=True),
+        Stage("sprites", draw_sprites, "draw", draw=True),
+        Stage("hud", draw_score, "hud", draw=True),
+    )
 
-        # spawn asteroids
-        self.asteroid_cooldown -= dt
-        if self.asteroid_cooldown <= 0:
-            Asteroid.spawn()
-            self.asteroid_cooldown = ASTEROID_SPAWN_COOLDOWN
-
-        # run updates and remove out-of-screen objects
-        for u in self.updateable:
-            if (
-                u.position.x - u.radius > SCREEN_WIDTH
-                or u.position.x < -u.radius
-                or u.position.y - u.radius > SCREEN_HEIGHT
-                or u.position.y < -u.radius
-            ):
-                # detect ship crashing into the void
-                if u is self.player:
-                    self.storage["score"] = self.score
-                    self.player.kill()
-                    return GameOver(
-                        self.screen, storage=self.storage, groups=[self.updateable]
-                    )
-                u.kill()
-                continue
-            u.update(dt)
-
-        # determine if asteroids hit player
-        for a in self.asteroids:
-            if a.collides_with(self.player):
-                self.storage["score"] = self.score
-                self.player.kill()
-                self.player.explode()
-                a.kill()
-                a.split()
-                a.explode()
-                return GameOver(
-                    self.screen, storage=self.storage, groups=[self.updateable]
-                )
-
-        # determine if shots hit asteroids
-        for a in self.asteroids:
-            for s in self.shots:
-                if a.collides_with(s):
-                    # Mjolnir shots pass through asteroids
-                    if not isinstance(s, Mjolnir):
-                        s.kill()
-                    a.split()
-                    a.explode()
-                    self.score += 1
-                    break
-
-        # draw sprites
-        for d in self.drawable:
-            d.draw(self.screen)
-
-        # draw scoreboard
-        text.draw_bottom_right(self.screen, f"SCORE: {self.score}")
+    # class of the player's ship
+    ship = Player
 
-        return self
+    def __init__(self, screen, storage: dict, seed: int | None = None):
+        super().__init__(screen, storage, seed)
+
+        self.spawner = SpawnScheduler(self.world)
+
+        # instanciate player
+        center = pygame.Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+        self.player = self.ship(self.world, center)
+        self.ships[0] = self.player
+        self.warm_explosions()
+
+
+class EndlessTaurus(Endless):
+    """Endless game but using the Taurus mobile defense platform
+
+    With a `seed`, the game is reproducible (see `world.World`)."""
+
+    ship = Taurus
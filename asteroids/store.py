@@ -0,0 +1,253 @@
+"""Module store contains the array-backed storage for our most numerous entities.
+
+Asteroids and shots exist in large numbers, so instead of every one of them
+owning its own `pygame.Vector2`s, their state lives in contiguous NumPy
+columns. Moving and culling them is then a single vectorized pass, while the
+sprite objects are thin views used for drawing and collision handling.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pygame
+
+from circleshape import CircleShape
+from constants import *
+
+
+class EntityStore:
+    """Structure-of-arrays storage of entity state
+
+    Every entity owns a slot, which is its row in each of the columns
+    (`position`, `velocity`, `previous`, `radius`, `size`, `kind`). Released slots go on a
+    free-list and are reused by the next allocation. When no slot is free,
+    all columns double in size.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.position = np.zeros((capacity, 2), dtype=np.float64)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float64)
+        # positions before the last `integrate()`, for interpolated drawing
+        self.previous = np.zeros((capacity, 2), dtype=np.float64)
+        self.radius = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.int8)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        # the sprite object owning each slot
+        self.owners = [None] * capacity
+        # reversed, so that `pop()` hands out the lowest slot first
+        self.free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self.owners) - len(self.free)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.owners)
+
+    def _grow(self):
+        """Double the size of all columns"""
+        old = self.capacity
+        new = old * 2
+        columns = ("position", "velocity", "previous", "radius", "size", "kind")
+        for name in columns + ("alive",):
+            column = getattr(self, name)
+            grown = np.zeros((new,) + column.shape[1:], dtype=column.dtype)
+            grown[:old] = column
+            setattr(self, name, grown)
+        self.owners.extend([None] * old)
+        self.free.extend(range(new - 1, old - 1, -1))
+
+    def allocate(self, owner) -> int:
+        """Reserve a slot for `owner` and return it"""
+        if not self.free:
+            self._grow()
+        slot = self.free.pop()
+        self.owners[slot] = owner
+        self.alive[slot] = True
+        self.position[slot] = 0
+        self.velocity[slot] = 0
+        self.previous[slot] = 0
+        self.radius[slot] = 0
+        self.size[slot] = 0
+        self.kind[slot] = 0
+        return slot
+
+    def release(self, slot: int):
+        """Give `slot` back to the free-list"""
+        self.owners[slot] = None
+        self.alive[slot] = False
+        self.free.append(slot)
+
+    def live_slots(self) -> np.ndarray:
+        """Return the indices of all slots currently in use"""
+        return np.flatnonzero(self.alive)
+
+    def _still_alive(self, slots: np.ndarray | None) -> np.ndarray:
+        if slots is None:
+            return self.live_slots()
+        return slots[self.alive[slots]]
+
+    def integrate(self, dt: float, slots: np.ndarray | None = None):
+        """Move the entities in `slots` (all by default) by their velocity"""
+        slots = self._still_alive(slots)
+        self.previous[slots] = self.position[slots]
+        self.position[slots] += self.velocity[slots] * dt
+
+    def outside(self, slots: np.ndarray | None = None, margin=True) -> np.ndarray:
+        """Return the slots whose entity is outside of the screen
+
+        With `margin`, an entity only counts as outside once it is off the
+        screen by its full radius.
+        """
+        slots = self._still_alive(slots)
+        x = self.position[slots, 0]
+        y = self.position[slots, 1]
+        r = self.radius[slots] if margin else 0
+        mask = (x - r > SCREEN_WIDTH) | (x < -r) | (y - r > SCREEN_HEIGHT) | (y < -r)
+        return slots[mask]
+
+    def cull(self, slots: np.ndarray | None = None, margin=True):
+        """Kill all entities in `slots` that are outside of the screen"""
+        for slot in self.outside(slots, margin):
+            self.owners[slot].kill()
+
+    def wrap(self, slots: np.ndarray | None = None):
+        """Entities going over the edge re-appear on the other side"""
+        slots = self._still_alive(slots)
+        x = self.position[slots, 0]
+        y = self.position[slots, 1]
+        r = self.radius[slots]
+        x = np.where(x - r > SCREEN_WIDTH, -r, x)
+        x = np.where(x < -r, SCREEN_WIDTH + r, x)
+        y = np.where(y - r > SCREEN_HEIGHT, -r, y)
+        y = np.where(y < -r, SCREEN_HEIGHT + r, y)
+        self.position[slots, 0] = x
+        self.position[slots, 1] = y
+
+
+class StoredShape(CircleShape):
+    """A CircleShape whose state lives in an `EntityStore`
+
+    `position`, `velocity`, `previous_position`, `radius`, `size` and `kind`
+    are views into the store: reading a position or `velocity` returns a fresh `pygame.Vector2`,
+    assigning to them (`+=` included) writes back into the store. Mutating a
+    returned vector in place does NOT change the shape.
+
+    When killed, a shape releases its slot but keeps a copy of its state, so
+    that e.g. `split()` and `explode()` still work after `kill()`.
+
+    The store is the one named by `world_store` in the shape's world. Without
+    one, the state is kept on the shape itself.
+    """
+
+    def __init__(self, world, position, radius):
+        self.store = world.store_of(type(self))
+        self.slot = None
+        self._state = {}
+        if self.store is not None:
+            self.slot = self.store.allocate(self)
+        super().__init__(world, position, radius)
+
+    def _detach(self):
+        """Copy the state out of the store and release the slot"""
+        self._state = {
+            "position": self.position,
+            "velocity": self.velocity,
+            "previous_position": self.previous_position,
+            "radius": self.radius,
+            "size": self.size,
+            "kind": self.kind,
+        }
+        self.store.release(self.slot)
+        self.slot = None
+
+    def kill(self):
+        super().kill()
+        if self.slot is not None:
+            self._detach()
+
+    @property
+    def position(self) -> pygame.Vector2:
+        if self.slot is None:
+            return pygame.Vector2(self._state["position"])
+        return pygame.Vector2(*self.store.position[self.slot].tolist())
+
+    @position.setter
+    def position(self, value):
+        if self.slot is None:
+            self._state["position"] = pygame.Vector2(value)
+        else:
+            self.store.position[self.slot] = value
+
+    @property
+    def velocity(self) -> pygame.Vector2:
+        if self.slot is None:
+            return pygame.Vector2(self._state["velocity"])
+        return pygame.Vector2(*self.store.velocity[self.slot].tolist())
+
+    @velocity.setter
+    def velocity(self, value):
+        if self.slot is None:
+            self._state["velocity"] = pygame.Vector2(value)
+        else:
+            self.store.velocity[self.slot] = value
+
+    @property
+    def previous_position(self) -> pygame.Vector2:
+        if self.slot is None:
+            return pygame.Vector2(self._state["previous_position"])
+        return pygame.Vector2(*self.store.previous[self.slot].tolist())
+
+    @previous_position.setter
+    def previous_position(self, value):
+        if self.slot is None:
+            self._state["previous_position"] = pygame.Vector2(value)
+        else:
+            self.store.previous[self.slot] = value
+
+    def interpolated(self, alpha: float) -> pygame.Vector2:
+        if alpha >= 1 or self.slot is None:
+            return self.position
+        px, py = self.store.previous[self.slot].tolist()
+        x, y = self.store.position[self.slot].tolist()
+        return pygame.Vector2(px + (x - px) * alpha, py + (y - py) * alpha)
+
+    @property
+    def radius(self) -> float:
+        if self.slot is None:
+            return self._state["radius"]
+        return float(self.store.radius[self.slot])
+
+    @radius.setter
+    def radius(self, value):
+        if self.slot is None:
+            self._state["radius"] = value
+        else:
+            self.store.radius[self.slot] = value
+
+    @property
+    def size(self) -> int:
+        if self.slot is None:
+            return self._state.get("size", 0)
+        return int(self.store.size[self.slot])
+
+    @size.setter
+    def size(self, value):
+        if self.slot is None:
+            self._state["size"] = value
+        else:
+            self.store.size[self.slot] = value
+
+    @property
+    def kind(self) -> int:
+        if self.slot is None:
+            return self._state.get("kind", 0)
+        return int(self.store.kind[self.slot])
+
+    @kind.setter
+    def kind(self, value):
+        if self.slot is None:
+            self._state["kind"] = value
+        else:
+            self.store.kind[self.slot] = value
@@ -4,6 +4,7 @@ from pygame import Vector2
 
 from assets import ASSETS
 from circleshape import CircleShape
+import controls
 from shot import Mjolnir, Shot
 from constants import *
 from explosion import Explosion
@@ -12,8 +13,10 @@ from explosion import Explosion
 class Taurus(CircleShape):
     """The Taurus mobile defense platform"""
 
-    def __init__(self, position):
-        super().__init__(position, radius=TAURUS_RADIUS)
+    world_groups = ("drawable", "updateable")
+
+    def __init__(self, world, position):
+        super().__init__(world, position, radius=TAURUS_RADIUS)
 
         # cooldown for the plasma shots
         self.shot_cooldown = 0
@@ -26,8 +29,12 @@ class Taurus(CircleShape):
         self.engine_left = False
         self.engine_right = False
 
-    def draw(self, screen: pygame.Surface):
+        # input source steering this ship, the installed one if None
+        self.input: controls.Controls | None = None
+
+    def draw(self, screen: pygame.Surface, alpha=1.0):
         """Draw the Taurus and the currently running engines"""
+        position = self.interpolated(alpha)
 
         taurus = ASSETS["taurus.png"]
         taurus_cd = ASSETS["taurus_cd.png"]
@@ -44,26 +51,29 @@ class Taurus(CircleShape):
 
         # rot_img = pygame.transform.rotate(ASSETS[asset_name], -self.rotation)
         # blit the engines
+        rects = []
         if self.engine_top:
-            x, y = self.position.x - 5, self.position.y - 50 - 20
-            screen.blit(engine_top, (x, y))
+            x, y = position.x - 5, position.y - 50 - 20
+            rects.append(screen.blit(engine_top, (x, y)))
         if self.engine_bottom:
-            x, y = self.position.x - 5, self.position.y + 50
-            screen.blit(engine_bottom, (x, y))
+            x, y = position.x - 5, position.y + 50
+            rects.append(screen.blit(engine_bottom, (x, y)))
         if self.engine_left:
-            x, y = self.position.x - 50 - 20, self.position.y - 5
-            screen.blit(engine_left, (x, y))
+            x, y = position.x - 50 - 20, position.y - 5
+            rects.append(screen.blit(engine_left, (x, y)))
         if self.engine_right:
-            x, y = self.position.x + 50, self.position.y - 5
-            screen.blit(engine_right, (x, y))
+            x, y = position.x + 50, position.y - 5
+            rects.append(screen.blit(engine_right, (x, y)))
 
         # blit the station on top
-        x = self.position.x - tw / 2
-        y = self.position.y - th / 2
-        screen.blit(taurus_cd if self.mjolnir_cooldown > 0 else taurus, (x, y))
+        x = position.x - tw / 2
+        y = position.y - th / 2
+        station = taurus_cd if self.mjolnir_cooldown > 0 else taurus
+        rect = screen.blit(station, (x, y))
 
         if DEBUG_SHOW_HITBOX:
             self.debug_draw_hitbox(screen)
+        return rect.unionall(rects)
 
     def update(self, dt: float):
         """Update the Taurus"""
@@ -77,8 +87,9 @@ class Taurus(CircleShape):
             False
         )
 
-        keys = pygame.key.get_pressed()
-        m_left, m_mid, m_right = pygame.mouse.get_pressed()
+        source = self.source()
+        keys = source.get_pressed()
+        m_left, m_mid, m_right = source.mouse_pressed()
         if any((keys[pygame.K_RIGHT], keys[pygame.K_d])):
             self.engine_left = True
         if any((keys[pygame.K_LEFT], keys[pygame.K_a])):
@@ -95,7 +106,11 @@ class Taurus(CircleShape):
             self.fire_mjolnir()
 
         self.accelerate(dt)
-        self.move()
+        self.move(dt)
+
+    def source(self) -> controls.Controls:
+        """The input source steering this ship"""
+        return controls.source() if self.input is None else self.input
 
     def accelerate(self, dt: float):
         """Accelerate the spaceship in the current direction"""
@@ -110,11 +125,10 @@ class Taurus(CircleShape):
         if self.velocity.magnitude() >= TAURUS_MAX_SPEED:
             self.velocity = velocity_old
 
-    def move(self):
+    def move(self, dt: float):
         """Move the player spaceship ahead"""
-
-        # forward pointing unit-vector
-        self.position += self.velocity
+        self.previous_position = Vector2(self.position)
+        self.position += self.velocity * (dt * SHIP_VELOCITY_HZ)
 
     def shoot(self):
         """Spawn a new shot"""
@@ -122,10 +136,13 @@ class Taurus(CircleShape):
             return
         # the direction vector for the shot, from position:
         # mouse-vector - position-vector
-        v_mouse = Vector2(pygame.mouse.get_pos())
+        v_mouse = Vector2(self.source().mouse_pos())
         direction = self.position - v_mouse
+        if direction.length_squared() == 0:
+            # can't aim at the center of the ship
+            return
         direction.normalize_ip()
-        shot = Shot(self.position - direction * self.radius)  # type: ignore
+        shot = Shot(self.world, self.position - direction * self.radius)  # type: ignore
         shot.velocity = -direction * SHOT_SPEED
         self.shot_cooldown = SHOT_COOLDOWN
 
@@ -134,13 +151,15 @@ class Taurus(CircleShape):
         if self.mjolnir_cooldown > 0:
             return
 
-        v_mouse = Vector2(pygame.mouse.get_pos())
+        v_mouse = Vector2(self.source().mouse_pos())
         direction = self.position - v_mouse
+        if direction.length_squared() == 0:
+            return
         direction.normalize_ip()
         pos = self.position - direction * self.radius  # type: ignore
-        shot_1 = Mjolnir(pos)
-        shot_2 = Mjolnir(pos)
-        shot_3 = Mjolnir(pos)
+        shot_1 = Mjolnir(self.world, pos)
+        shot_2 = Mjolnir(self.world, pos)
+        shot_3 = Mjolnir(self.world, pos)
         shot_1.velocity = -direction.rotate(20) * MJOLNIR_SPEED
         shot_2.velocity = -direction * MJOLNIR_SPEED
         shot_3.velocity = -direction.rotate(-20) * MJOLNIR_SPEED
@@ -148,4 +167,4 @@ class Taurus(CircleShape):
         self.mjolnir_cooldown = MJOLNIR_COOLDOWN
 
     def explode(self):
-        Explosion(self.position, self.radius * 1.5)
+        Explosion(self.world, self.position, self.radius * SHIP_EXPLOSION_SCALE)
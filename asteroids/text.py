@@ -4,18 +4,31 @@ from pygame.font import Font, SysFont
 
 from assets import FONT_ASSETS
 from constants import *
+from spritecache import LRUCache
+
+# rendered lines, keyed by (text, size, color)
+_rendered = LRUCache(TEXT_CACHE_SIZE)
+# layouts of multi-line blocks, lists of (surface, position)
+_layouts = LRUCache(TEXT_CACHE_SIZE)
+
+
+def render(line: str, size: int, color: str) -> Surface:
+    """Render a line of text, or return it from the cache
+
+    The returned surface is shared and must not be modified."""
+    key = (line, size, color)
+    surface = _rendered.get(key)
+    if surface is None:
+        font = FONT_ASSETS["monogram.ttf"]
+        surface, _ = font.render(line, fgcolor=color, size=size)
+        _rendered.put(key, surface)
+    return surface
 
 
 def draw_bottom_right(screen: Surface, line: str):
     """Draw a line to the bottom right"""
-    font = FONT_ASSETS["monogram.ttf"]
-
-    scoreboard, _ = font.render(
-        line,
-        fgcolor=SCORE_COLOR,
-        size=SCORE_SIZE,
-    )
-    screen.blit(
+    scoreboard = render(line, SCORE_SIZE, SCORE_COLOR)
+    return screen.blit(
         source=scoreboard,
         dest=(
             SCREEN_WIDTH - scoreboard.get_width(),
@@ -24,11 +37,8 @@ def draw_bottom_right(screen: Surface, line: str):
     )
 
 
-def draw_lines_mid(screen: Surface, lines: list[str], y_start=None):
-    """Write lines in the middle of the screen, centered along X and Y axis
-
-    If y_start is set, it becomes the vertical starting point instead.
-    """
+def _layout_mid(lines: tuple[str, ...], y_start) -> list[tuple[Surface, tuple]]:
+    """Render and position the lines of `draw_lines_mid`"""
     font = FONT_ASSETS["monogram.ttf"]
 
     # height of a line
@@ -39,9 +49,39 @@ def draw_lines_mid(screen: Surface, lines: list[str], y_start=None):
     if y_start is None:
         y_start = SCREEN_HEIGHT / 2 - total_h / 2
     y_offset = 0
+    layout = []
     for l in lines:
-        text, _ = font.render(l, fgcolor=MENU_COLOR, size=MENU_SIZE)
+        text = render(l, MENU_SIZE, MENU_COLOR)
         w = text.get_width()
         dest = (SCREEN_WIDTH / 2 - w / 2, y_start + y_offset)
-        screen.blit(text, dest)
+        layout.append((text, dest))
         y_offset += h + MENU_SPACING
+    return layout
+
+
+def draw_lines_mid(screen: Surface, lines: list[str], y_start=None):
+    """Write lines in the middle of the screen, centered along X and Y axis
+
+    If y_start is set, it becomes the vertical starting point instead.
+    """
+    key = (tuple(lines), y_start)
+    layout = _layouts.get(key)
+    if layout is None:
+        layout = _layout_mid(key[0], y_start)
+        _layouts.put(key, layout)
+    rects = screen.blits(layout)
+    return rects[0].unionall(rects[1:])
+
+
+def draw_lines_top_left(screen: Surface, lines: list[str], y_start=0):
+    """Write small debug lines to the top left of the screen"""
+    if not lines:
+        return pygame.Rect(0, y_start, 0, 0)
+    font = FONT_ASSETS["monogram.ttf"]
+
+    h = font.get_sized_height(PROFILER_SIZE)
+    rects = []
+    for i, l in enumerate(lines):
+        text = render(l, PROFILER_SIZE, PROFILER_COLOR)
+        rects.append(screen.blit(text, (0, y_start + i * h)))
+    return rects[0].unionall(rects[1:])
@@ -0,0 +1,122 @@
+"""Module world contains the container for everything that exists in a game.
+
+A `World` owns the sprite groups, entity stores and pools of one game. Entities are
+created into a world (it's the first argument of every entity class) and
+pick their groups and store from it according to their archetype: the class
+attributes `world_groups` and `world_store`. Entities spawning other
+entities (shots, splits, explosions) spawn them into their own world.
+
+Since nothing is stored on the classes anymore, any number of worlds can
+exist side by side, e.g. the game and a level-cleared animation, or several
+headless games.
+
+All randomness of a game comes from its world's `random`, a generator seeded
+with `seed`. A game is fully determined by its seed and its input, which is
+what recordings (see `replay.py`) rely on.
+"""
+
+from __future__ import annotations
+
+import random
+
+import numpy as np
+from pygame.sprite import Group
+
+from circleshape import Pool
+from store import EntityStore
+
+
+class World:
+    """Groups, stores and systems of one game
+
+    Groups:
+    - `drawable`: everything drawn to the screen
+    - `updateable`: entities updated one by one (ships, explosions)
+    - `asteroids` and `shots`: used for collision detection
+    - `explosions`: counted against the cap of the endless modes
+
+    Stores (array-backed archetype storage, see `store.EntityStore`):
+    - `asteroid_store`: all asteroids
+    - `shot_store`: all shots, normal and Mjolnir
+
+    Pools of killed instances for re-use, one per class with a `pool_cap`
+    (see `pool_of`).
+
+    Without a `seed`, one is drawn from the global `random` module.
+    """
+
+    GROUPS = ("drawable", "updateable", "asteroids", "shots", "explosions")
+    STORES = ("asteroid_store", "shot_store")
+
+    def __init__(self, seed: int | None = None):
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.random = random.Random(self.seed)
+        self.drawable = Group()
+        self.updateable = Group()
+        self.asteroids = Group()
+        self.shots = Group()
+        self.explosions = Group()
+        self.asteroid_store = EntityStore()
+        self.shot_store = EntityStore()
+        # resolved archetypes, by class
+        self._groups = {}
+        # killed instances kept for re-use, by class
+        self._pools: dict[type, Pool] = {}
+
+    def groups_of(self, cls: type) -> tuple[Group, ...]:
+        """The groups instances of `cls` are added to"""
+        groups = self._groups.get(cls)
+        if groups is None:
+            groups = tuple(getattr(self, name) for name in cls.world_groups)
+            self._groups[cls] = groups
+        return groups
+
+    def store_of(self, cls: type) -> EntityStore | None:
+        """The store holding the state of instances of `cls`, if any"""
+        if cls.world_store is None:
+            return None
+        return getattr(self, cls.world_store)
+
+    def pool_of(self, cls: type) -> Pool | None:
+        """The pool killed instances of `cls` are re-used from, if any"""
+        if cls.pool_cap is None:
+            return None
+        pool = self._pools.get(cls)
+        if pool is None:
+            pool = self._pools[cls] = Pool(cls.pool_cap)
+        return pool
+
+    def collect_pools(self):
+        """Instances killed since the last call can be re-used from now on"""
+        for pool in self._pools.values():
+            pool.collect()
+
+    def moving_groups(self) -> list[Group]:
+        """All groups of entities that move on their own"""
+        return [self.updateable, self.asteroids, self.shots]
+
+    # systems working on the stores
+
+    def live_slots(self) -> tuple[np.ndarray, np.ndarray]:
+        """Slots in use in the asteroid and shot store right now
+
+        Entities spawned later on during a frame only move from the next
+        frame on, so the systems below are applied to these slots only."""
+        return self.asteroid_store.live_slots(), self.shot_store.live_slots()
+
+    def cull_and_move(self, dt: float, asteroid_slots, shot_slots):
+        """Remove asteroids and shots outside of the screen, move all others"""
+        for store, slots in (
+            (self.asteroid_store, asteroid_slots),
+            (self.shot_store, shot_slots),
+        ):
+            store.cull(slots)
+            store.integrate(dt, slots)
+
+    def wrap_and_move(self, dt: float, asteroid_slots, shot_slots):
+        """Wrap asteroids around the screen edges, remove shots outside of the
+        screen, move all others"""
+        self.asteroid_store.wrap(asteroid_slots)
+        self.asteroid_store.integrate(dt, asteroid_slots)
+        self.shot_store.cull(shot_slots, margin=False)
+        self.shot_store.integrate(dt, shot_slots)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the game modules are imported flat, from inside the `asteroids` directory
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "asteroids"))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,314 @@
+"""The collision kernels against `CircleShape.collides_with`"""
+
+import pygame
+import pytest
+
+import collision
+from asteroid import Asteroid
+from constants import *
+from player import Player
+from shot import Mjolnir, Shot
+from world import World
+
+KERNELS = [collision.hit_pairs, collision.hit_pairs_python]
+
+
+def field(seed: int, asteroids: int, shots: int, mjolnirs: int = 0):
+    """Random asteroids and shots, packed close enough to hit a lot"""
+    world = World(seed)
+    rng = world.random
+
+    def position():
+        return pygame.Vector2(rng.uniform(0, 300), rng.uniform(0, 200))
+
+    field_asteroids = []
+    for _ in range(asteroids):
+        size = rng.randint(1, ASTEROID_SIZES)
+        field_asteroids.append(
+            Asteroid(world, position(), ASTEROID_MIN_RADIUS * size, size)
+        )
+    field_shots = [Shot(world, position()) for _ in range(shots)]
+    field_shots += [Mjolnir(world, position()) for _ in range(mjolnirs)]
+    rng.shuffle(field_shots)
+    return field_asteroids, field_shots
+
+
+def nested_loops(asteroids, shots):
+    """The collision loops of the game before the kernels"""
+    consumed = set()
+    pairs = []
+    for i, asteroid in enumerate(asteroids):
+        for j, shot in enumerate(shots):
+            if j in consumed:
+                continue
+            if asteroid.collides_with(shot):
+                pairs.append((i, j))
+                if not shot.piercing:
+                    consumed.add(j)
+                break
+    return pairs
+
+
+def run(kernel, asteroids, shots, **kwargs):
+    return kernel(
+        [tuple(a.position) for a in asteroids],
+        [a.radius for a in asteroids],
+        [tuple(s.position) for s in shots],
+        [s.radius for s in shots],
+        [s.piercing for s in shots],
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_collides_with(kernel, seed):
+    asteroids, shots = field(seed, asteroids=40, shots=30, mjolnirs=5)
+    expected = nested_loops(asteroids, shots)
+    assert expected
+    assert run(kernel, asteroids, shots) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 500])
+@pytest.mark.parametrize("seed", range(5))
+def test_chunk_boundaries(chunk_size, seed):
+    asteroids, shots = field(seed, asteroids=40, shots=30, mjolnirs=5)
+    assert chunk_size < len(asteroids) * len(shots)
+    pairs = run(collision.hit_pairs, asteroids, shots, chunk_size=chunk_size)
+    assert pairs == nested_loops(asteroids, shots)
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_mjolnir_pierces(kernel):
+    world = World(0)
+    asteroids = [
+        Asteroid(world, pygame.Vector2(x, 100), ASTEROID_MIN_RADIUS, 1)
+        for x in (90, 100, 110)
+    ]
+    mjolnir = Mjolnir(world, pygame.Vector2(100, 100))
+    pairs = run(kernel, asteroids, [mjolnir])
+    assert pairs == [(0, 0), (1, 0), (2, 0)]
+    assert pairs == nested_loops(asteroids, [mjolnir])
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_shot_is_consumed(kernel):
+    world = World(0)
+    asteroids = [
+        Asteroid(world, pygame.Vector2(x, 100), ASTEROID_MIN_RADIUS, 1)
+        for x in (95, 105)
+    ]
+    shot = Shot(world, pygame.Vector2(100, 100))
+    assert run(kernel, asteroids, [shot]) == [(0, 0)]
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+@pytest.mark.parametrize("seed", range(5))
+def test_one_hit_per_asteroid(kernel, seed):
+    asteroids, shots = field(seed, asteroids=20, shots=60, mjolnirs=10)
+    hit = [i for i, _ in run(kernel, asteroids, shots)]
+    assert len(hit) == len(set(hit))
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_empty(kernel):
+    asteroids, shots = field(0, asteroids=5, shots=5)
+    assert run(kernel, [], shots) == []
+    assert run(kernel, asteroids, []) == []
+    assert run(kernel, [], []) == []
+
+
+def crash_field(seed: int):
+    """Random moving asteroids and ships, with some asteroids shot down"""
+    world = World(seed)
+    rng = world.random
+    asteroids, _ = field(seed, asteroids=40, shots=0)
+    for a in asteroids:
+        a.previous_position = a.position - pygame.Vector2(
+            rng.uniform(-40, 40), rng.uniform(-40, 40)
+        )
+    ships = []
+    for _ in range(4):
+        ship = Player(world, pygame.Vector2(rng.uniform(0, 300), rng.uniform(0, 200)))
+        ship.previous_position = ship.position - pygame.Vector2(
+            rng.uniform(-200, 200), rng.uniform(-200, 200)
+        )
+        ships.append(ship)
+    gone = {a: rng.random() for a in asteroids if rng.random() < 0.3}
+    return ships, asteroids, gone
+
+
+def first_crash(ship, asteroids, gone):
+    """The asteroid `ship` runs into first, looping over all of them"""
+    first = None
+    for a in asteroids:
+        t = collision.time_of_impact(
+            ship.previous_position,
+            ship.position,
+            a.previous_position,
+            a.position,
+            ship.radius + a.radius,
+        )
+        if t is None or gone.get(a, 1.0) < t:
+            continue
+        if first is None or t < first[0]:
+            first = (t, a)
+    return first
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_ship_impacts(monkeypatch, seed):
+    ships, asteroids, gone = crash_field(seed)
+    expected = [first_crash(ship, asteroids, gone) for ship in ships]
+    assert any(expected)
+    monkeypatch.setattr(collision, "CONTINUOUS_COLLISION", True)
+    assert collision.ship_impacts(ships, asteroids, gone) == expected
+    assert collision.ship_impacts_python(ships, asteroids, gone) == expected
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_ship_impacts_at_end_of_step(monkeypatch, seed):
+    ships, asteroids, gone = crash_field(seed)
+    expected = []
+    for ship in ships:
+        hit = next((a for a in asteroids if ship.collides_with(a)), None)
+        expected.append(None if hit is None else (0.0, hit))
+    monkeypatch.setattr(collision, "CONTINUOUS_COLLISION", False)
+    assert collision.ship_impacts(ships, asteroids, gone) == expected
+    assert collision.ship_impacts_python(ships, asteroids, gone) == expected
+
+
+def test_ship_impacts_empty():
+    ships, asteroids, _ = crash_field(0)
+    assert collision.ship_impacts(ships, []) == [None] * len(ships)
+    assert collision.ship_impacts([], asteroids) == []
+
+
+SWEPT_KERNELS = [collision.impact_pairs, collision.impact_pairs_python]
+
+
+def swept_field(seed: int, asteroids: int, shots: int, mjolnirs: int = 0):
+    """A random field of moving asteroids and fast shots"""
+    field_asteroids, field_shots = field(seed, asteroids, shots, mjolnirs)
+    rng = World(seed).random
+    for a in field_asteroids:
+        a.previous_position = a.position - pygame.Vector2(
+            rng.uniform(-20, 20), rng.uniform(-20, 20)
+        )
+    for s in field_shots:
+        s.previous_position = s.position - pygame.Vector2(
+            rng.uniform(-150, 150), rng.uniform(-150, 150)
+        )
+    return field_asteroids, field_shots
+
+
+def run_swept(kernel, asteroids, shots, **kwargs):
+    return kernel(
+        [tuple(a.previous_position) for a in asteroids],
+        [tuple(a.position) for a in asteroids],
+        [a.radius for a in asteroids],
+        [tuple(s.previous_position) for s in shots],
+        [tuple(s.position) for s in shots],
+        [s.radius for s in shots],
+        [s.piercing for s in shots],
+        **kwargs,
+    )
+
+
+def brute_force_impacts(asteroids, shots):
+    """All impacts by `time_of_impact`, resolved in time order"""
+    impacts = []
+    for i, a in enumerate(asteroids):
+        for j, s in enumerate(shots):
+            t = collision.time_of_impact(
+                a.previous_position,
+                a.position,
+                s.previous_position,
+                s.position,
+                a.radius + s.radius,
+            )
+            if t is not None:
+                impacts.append((t, i, j))
+    hit, consumed = set(), set()
+    pairs = []
+    for t, i, j in sorted(impacts):
+        if i in hit or j in consumed:
+            continue
+        pairs.append((t, i, j))
+        hit.add(i)
+        if not shots[j].piercing:
+            consumed.add(j)
+    return pairs
+
+
+def test_time_of_impact():
+    # already touching at the start of the step
+    assert collision.time_of_impact((0, 0), (0, 0), (5, 0), (50, 0), 10) == 0.0
+    # moving apart, or not moving relative to each other
+    assert collision.time_of_impact((0, 0), (0, 0), (20, 0), (40, 0), 10) is None
+    assert collision.time_of_impact((0, 0), (10, 0), (20, 0), (30, 0), 10) is None
+    # head on, touching halfway through the step
+    assert collision.time_of_impact((0, 0), (10, 0), (40, 0), (30, 0), 30) == 0.5
+    # passing each other, and not getting there within the step
+    assert collision.time_of_impact((0, 0), (0, 0), (-50, 20), (50, 20), 10) is None
+    assert collision.time_of_impact((0, 0), (0, 0), (100, 0), (50, 0), 10) is None
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_impact_pairs_matches_python(seed):
+    asteroids, shots = swept_field(seed, asteroids=40, shots=30, mjolnirs=5)
+    expected = run_swept(collision.impact_pairs_python, asteroids, shots)
+    assert expected
+    assert run_swept(collision.impact_pairs, asteroids, shots) == expected
+
+
+@pytest.mark.parametrize("kernel", SWEPT_KERNELS)
+@pytest.mark.parametrize("seed", range(10))
+def test_impact_pairs_brute_force(kernel, seed):
+    asteroids, shots = swept_field(seed, asteroids=40, shots=30, mjolnirs=5)
+    pairs = run_swept(kernel, asteroids, shots)
+    assert pairs == brute_force_impacts(asteroids, shots)
+    hit = [i for _, i, _ in pairs]
+    assert len(hit) == len(set(hit))
+    assert [t for t, _, _ in pairs] == sorted(t for t, _, _ in pairs)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 500])
+@pytest.mark.parametrize("seed", range(5))
+def test_impact_pairs_chunk_boundaries(chunk_size, seed):
+    asteroids, shots = swept_field(seed, asteroids=40, shots=30, mjolnirs=5)
+    pairs = run_swept(collision.impact_pairs, asteroids, shots, chunk_size=chunk_size)
+    assert pairs == brute_force_impacts(asteroids, shots)
+
+
+def crossing_shot(world, shot_class=Shot):
+    """A shot crossing the whole screen in a single step"""
+    shot = shot_class(world, pygame.Vector2(200, 100))
+    shot.previous_position = pygame.Vector2(0, 100)
+    return shot
+
+
+@pytest.mark.parametrize("kernel", SWEPT_KERNELS)
+def test_no_tunneling(kernel):
+    world = World(0)
+    asteroid = Asteroid(world, pygame.Vector2(100, 100), ASTEROID_MIN_RADIUS, 1)
+    shot = crossing_shot(world)
+    # outside of the asteroid at both ends of the step
+    assert not asteroid.collides_with(shot)
+    assert run(collision.hit_pairs, [asteroid], [shot]) == []
+    assert run_swept(kernel, [asteroid], [shot]) == [(0.375, 0, 0)]
+
+
+@pytest.mark.parametrize("kernel", SWEPT_KERNELS)
+def test_earlier_impact_consumes_shot(kernel):
+    world = World(0)
+    # the asteroid hit later comes first
+    asteroids = [
+        Asteroid(world, pygame.Vector2(x, 100), ASTEROID_MIN_RADIUS, 1)
+        for x in (140, 60)
+    ]
+    shot = crossing_shot(world)
+    assert run_swept(kernel, asteroids, [shot]) == [(0.175, 1, 0)]
+    mjolnir = crossing_shot(world, Mjolnir)
+    t = (60 - ASTEROID_MIN_RADIUS - MJOLNIR_RADIUS) / 200
+    assert run_swept(kernel, asteroids, [mjolnir]) == [(t, 1, 0), (t + 0.4, 0, 0)]